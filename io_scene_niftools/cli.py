@@ -0,0 +1,236 @@
+"""Command line entry point for exporting nif files without user interface, eg. on a build server.
+
+Run inside blender, in background mode::
+
+    blender -b --python-expr "from io_scene_niftools import cli; cli.main()" -- export manifest.json --report report.json
+
+or with ``python -m io_scene_niftools.cli export manifest.json`` where bpy is available as a module.
+
+The manifest is a json list of exports, each with the keys:
+
+* ``blend``: the blend file to export from, the currently loaded file is reused if it is the same
+* ``output``: the nif file to write
+* ``objects``: optional, names of the objects to export, otherwise everything in the scene is exported
+* ``game``: optional, the game to export for, otherwise the game stored in the blend file is used
+* ``settings``: optional, values for any other property of the nif export operator
+
+Relative paths are relative to the manifest.
+
+The catalog command indexes the nif headers of a data directory in a SQLite database and queries it::
+
+    blender -b --python-expr "from io_scene_niftools import cli; cli.main()" -- catalog index.sqlite update Data/meshes
+    blender -b --python-expr "from io_scene_niftools import cli; cli.main()" -- catalog index.sqlite find --block-type BSDismemberSkinInstance
+"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2016, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the NIF File Format Library and Tools
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import addon_utils
+import bpy
+
+from io_scene_niftools.file_io.catalog import NifCatalog
+from io_scene_niftools.nif_export import NifExport
+from io_scene_niftools.operators.nif_export_op import NifExportOperator
+from io_scene_niftools.utils.logging import NifLog
+
+DEFAULT_VALUES = {
+    "BoolProperty": False,
+    "IntProperty": 0,
+    "FloatProperty": 0.0,
+    "StringProperty": "",
+}
+
+
+def get_property_defaults(operator_class):
+    """Collect the default values of all bpy properties declared on operator_class and its bases."""
+    defaults = {}
+    for cls in reversed(operator_class.__mro__):
+        for name, prop in getattr(cls, "__annotations__", {}).items():
+            # deferred property in newer blender versions, (function, keywords) tuple in older ones
+            function, keywords = getattr(prop, "function", None), getattr(prop, "keywords", None)
+            if function is None and isinstance(prop, tuple) and len(prop) == 2:
+                function, keywords = prop
+            if function is None:
+                continue
+            if "default" in keywords:
+                defaults[name] = keywords["default"]
+            elif function.__name__ == "EnumProperty" and not callable(keywords.get("items")):
+                defaults[name] = keywords["items"][0][0]
+            elif function.__name__ in DEFAULT_VALUES:
+                defaults[name] = DEFAULT_VALUES[function.__name__]
+    return defaults
+
+
+class HeadlessOperator:
+    """Stands in for an operator when running without user interface.
+    Holds the operator properties, the messages are already logged to the console and kept in the NifLog buffer."""
+
+    def __init__(self, operator_class, **settings):
+        self.properties = argparse.Namespace(**get_property_defaults(operator_class))
+        for name, value in settings.items():
+            setattr(self.properties, name, value)
+
+    def report(self, level, message):
+        pass
+
+
+def get_messages():
+    """Return the warnings and errors in the log buffer."""
+    return [f"{level_name}: {message}" for level_name, message in NifLog.buffer if level_name in ('WARNING', 'ERROR')]
+
+
+def load_blend(blend_path):
+    """Open the blend file, unless it is already loaded."""
+    if os.path.normcase(os.path.abspath(bpy.data.filepath)) != os.path.normcase(os.path.abspath(blend_path)):
+        bpy.ops.wm.open_mainfile(filepath=blend_path)
+
+
+def select_objects(object_names):
+    """Select the given objects, or nothing so that the whole scene is exported."""
+    for b_obj in bpy.context.view_layer.objects:
+        b_obj.select_set(b_obj.name in object_names)
+    missing = set(object_names) - set(bpy.context.scene.objects.keys())
+    if missing:
+        raise KeyError(f"Objects not found: {', '.join(sorted(missing))}")
+
+
+def export_nif(entry, root_dir):
+    """Run one export of the manifest, returns its report."""
+    blend_path = os.path.join(root_dir, entry["blend"])
+    output_path = os.path.join(root_dir, entry["output"])
+    report = {"blend": blend_path, "output": output_path}
+    start = time.perf_counter()
+    NifLog.clear()
+    try:
+        load_blend(blend_path)
+        select_objects(entry.get("objects", ()))
+        if entry.get("game"):
+            bpy.context.scene.niftools_scene.game = entry["game"]
+        settings = {"scale_correction": bpy.context.scene.niftools_scene.scale_correction}
+        settings.update(entry.get("settings", {}))
+        settings["filepath"] = output_path
+        operator = HeadlessOperator(NifExportOperator, **settings)
+        result = NifExport(operator, bpy.context).execute()
+        report["status"] = "FINISHED" if 'FINISHED' in result else "CANCELLED"
+    except Exception as e:
+        report["status"] = "FAILED"
+        report["error"] = f"{type(e).__name__}: {e}"
+    report["seconds"] = round(time.perf_counter() - start, 3)
+    report["messages"] = get_messages()
+    return report
+
+
+def export(manifest_path, report_path=None):
+    """Run all exports of the manifest and write the report. Returns True if all succeeded."""
+    with open(manifest_path) as manifest_file:
+        entries = json.load(manifest_file)
+    root_dir = os.path.dirname(os.path.abspath(manifest_path))
+
+    addon_utils.enable(__package__, default_set=True)
+    start = time.perf_counter()
+    reports = []
+    for entry in entries:
+        report = export_nif(entry, root_dir)
+        NifLog.info(f"{report['status']} {report['output']} in {report['seconds']}s")
+        reports.append(report)
+
+    summary = {
+        "seconds": round(time.perf_counter() - start, 3),
+        "succeeded": sum(report["status"] == "FINISHED" for report in reports),
+        "failed": sum(report["status"] != "FINISHED" for report in reports),
+        "files": reports,
+    }
+    if report_path:
+        with open(report_path, "w") as report_file:
+            json.dump(summary, report_file, indent=2)
+    return not summary["failed"]
+
+
+def catalog(args):
+    """Update or query a nif catalog, see NifCatalog."""
+    with NifCatalog(args.database, args.workers) as nif_catalog:
+        if args.catalog_command == "update":
+            inspected, removed, failed = nif_catalog.update(args.root, args.pattern, args.full)
+            NifLog.info(f"Inspected {inspected} files, removed {removed}, {failed} could not be read")
+            for path, error in nif_catalog.get_errors():
+                NifLog.warn(f"{path}: {error}")
+        elif args.catalog_command == "find":
+            for path in nif_catalog.find(block_type=args.block_type, texture=args.texture, string=args.string,
+                                         version=args.version, user_version=args.user_version):
+                print(path)
+
+
+def main(argv=None):
+    if argv is None:
+        # blender passes the script arguments after --
+        argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else sys.argv[1:]
+    parser = argparse.ArgumentParser(prog="io_scene_niftools.cli", description="Blender Niftools Addon command line")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_parser = commands.add_parser("export", help="Export nif files listed in a manifest.")
+    export_parser.add_argument("manifest", help="Json manifest of the exports.")
+    export_parser.add_argument("--report", help="Write a json report with the status and timing of each export.")
+
+    catalog_parser = commands.add_parser("catalog", help="Index nif headers in a SQLite database and query it.")
+    catalog_parser.add_argument("database", help="Path of the SQLite database.")
+    catalog_parser.add_argument("--workers", type=int, help="Number of worker processes.")
+    catalog_commands = catalog_parser.add_subparsers(dest="catalog_command", required=True)
+    update_parser = catalog_commands.add_parser("update", help="Index the new and changed files of a directory.")
+    update_parser.add_argument("root", help="Data directory to scan.")
+    update_parser.add_argument("--pattern", default="**/*.nif", help="Glob pattern of the files, relative to root.")
+    update_parser.add_argument("--full", action="store_true", help="Read whole files instead of headers only.")
+    find_parser = catalog_commands.add_parser("find", help="Print the paths of the indexed files matching all criteria.")
+    find_parser.add_argument("--block-type", help="Block type, for example BSDismemberSkinInstance.")
+    find_parser.add_argument("--texture", help="Texture path, case insensitive.")
+    find_parser.add_argument("--string", help="Entry of the string palette.")
+    find_parser.add_argument("--version", help="Nif version, for example 20.2.0.7.")
+    find_parser.add_argument("--user-version", type=int, help="Nif user version.")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        sys.exit(0 if export(args.manifest, args.report) else 1)
+    elif args.command == "catalog":
+        catalog(args)
+
+
+if __name__ == "__main__":
+    main()
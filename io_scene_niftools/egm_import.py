@@ -54,6 +54,7 @@ class EgmImport(NifCommon):
         # Helper systems
         self.morph_anim = MorphAnimation()
 
+    @NifCommon.profile_execute
     def execute(self):
         """Main import function."""
 
@@ -61,14 +62,16 @@ class EgmImport(NifCommon):
             egm_path = NifOp.props.filepath
 
             if egm_path:
-                EGMData.init(EGMFile.load_egm(egm_path))
+                with self.phase("parse"):
+                    EGMData.init(EGMFile.load_egm(egm_path))
                 # scale the data
                 EGMData.data.apply_scale(NifOp.props.scale_correction)
                 # TODO [morph][egm] if there is an egm, the assumption is that there is only one mesh in the nif
                 # grab the active object
                 b_obj = bpy.context.view_layer.objects.active
                 if b_obj and b_obj.type == "MESH":
-                    self.morph_anim.import_egm_morphs(b_obj)
+                    with self.phase("animation"):
+                        self.morph_anim.import_egm_morphs(b_obj)
         except NifError:
             return {'CANCELLED'}
 
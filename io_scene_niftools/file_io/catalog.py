@@ -0,0 +1,237 @@
+"""This module indexes the headers of many nif files in a SQLite database, so they can be queried without reading them again"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2016, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the NIF File Format Library and Tools
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+from collections import Counter
+from concurrent.futures import BrokenExecutor
+import glob
+import os
+import sqlite3
+
+from pyffi.formats.nif import NifFormat
+
+from io_scene_niftools.file_io.loader import NifLoader
+
+TEXTURE_EXTENSIONS = (".dds", ".tga", ".bmp", ".png", ".jpg", ".tif")
+TEXTURE_FIELDS = ("file_name", "source_texture", "greyscale_texture", "textures")
+
+
+def _decode(value):
+    if isinstance(value, bytes):
+        return value.decode("latin-1")
+    return str(value)
+
+
+def _is_texture(name):
+    return name.lower().endswith(TEXTURE_EXTENSIONS)
+
+
+def normalize_texture(name):
+    """Texture paths are matched case insensitive and with backslashes, like the games do."""
+    return name.replace("/", "\\").lower()
+
+
+def get_header_info(data):
+    """Collect what the catalog stores of a nif, must be a module level function to run in a worker process.
+    Uses the blocks if data was fully read, otherwise only the header, which has no block types before 5.0.0.1."""
+    header = data.header
+    strings = [_decode(s) for s in header.strings]
+    if data.blocks:
+        block_types = Counter(block.__class__.__name__ for block in data.blocks)
+    else:
+        type_names = [_decode(t) for t in header.block_types]
+        # the high bit flags blocks in the pyffi extension of the format
+        block_types = Counter(type_names[index & 0x7FFF] for index in header.block_type_index)
+
+    textures = {name for name in strings if _is_texture(name)}
+    for block in data.blocks:
+        for field in TEXTURE_FIELDS:
+            value = getattr(block, field, None)
+            # texture sets hold an array of names
+            names = list(value) if field == "textures" and value is not None else [value]
+            for name in names:
+                if name and _is_texture(_decode(name)):
+                    textures.add(_decode(name))
+
+    return {
+        "version": data.version,
+        "user_version": data.user_version,
+        "user_version_2": data.user_version_2,
+        "block_types": dict(block_types),
+        "strings": strings,
+        "textures": sorted(textures),
+    }
+
+
+class NifCatalog:
+    """Index of the nif files below a directory, stored in a SQLite database.
+
+    update() only inspects the files that were added or changed since the last update, by modification
+    time and size, or that could not be read before, and drops files that were removed. By default only the headers are read, in worker processes.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS files (
+            id INTEGER PRIMARY KEY,
+            path TEXT UNIQUE NOT NULL,
+            mtime REAL NOT NULL,
+            size INTEGER NOT NULL,
+            version INTEGER,
+            user_version INTEGER,
+            user_version_2 INTEGER,
+            full INTEGER NOT NULL DEFAULT 0,
+            error TEXT
+        );
+        CREATE TABLE IF NOT EXISTS block_types (
+            file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+            block_type TEXT NOT NULL,
+            count INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS strings (
+            file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+            string TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS textures (
+            file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+            texture TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS block_types_block_type ON block_types(block_type);
+        CREATE INDEX IF NOT EXISTS block_types_file_id ON block_types(file_id);
+        CREATE INDEX IF NOT EXISTS strings_file_id ON strings(file_id);
+        CREATE INDEX IF NOT EXISTS textures_texture ON textures(texture);
+        CREATE INDEX IF NOT EXISTS textures_file_id ON textures(file_id);
+    """
+
+    def __init__(self, db_path, max_workers=None):
+        self.db_path = db_path
+        self.loader = NifLoader(max_workers)
+        self.connection = sqlite3.connect(db_path)
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.executescript(self.SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def update(self, root_dir, pattern="**/*.nif", full=False):
+        """Index the files matching pattern below root_dir. With full, files are read completely,
+        which also finds the block types of old files and texture names outside the string palette.
+        Returns the number of (inspected, removed, failed) files."""
+        root_dir = os.path.abspath(root_dir)
+        on_disk = {}
+        for file_path in glob.iglob(os.path.join(root_dir, pattern), recursive=True):
+            if os.path.isfile(file_path):
+                stat = os.stat(file_path)
+                on_disk[file_path] = (stat.st_mtime, stat.st_size)
+
+        prefix = os.path.join(root_dir, "")
+        indexed = {path: ((mtime, size), was_full, error) for path, mtime, size, was_full, error in self.connection.execute(
+            "SELECT path, mtime, size, full, error FROM files WHERE substr(path, 1, ?) = ?", (len(prefix), prefix))}
+        removed = [path for path in indexed if path not in on_disk]
+        # files that could not be read are tried again,
+        # and a full update also reads the unchanged files that were only inspected before
+        changed = sorted(path for path, stat in on_disk.items()
+                         if path not in indexed or indexed[path][0] != stat or indexed[path][2] is not None
+                         or full and not indexed[path][1])
+
+        failed = 0
+        with self.connection:
+            self.connection.executemany("DELETE FROM files WHERE path = ?", ((path,) for path in removed))
+            for file_path, info, exc in self.loader.map(get_header_info, changed, header_only=not full):
+                if exc is None and info["version"] < 0:
+                    exc = ValueError("Not a supported NIF file.")
+                failed += exc is not None
+                if isinstance(exc, BrokenExecutor):
+                    # the worker died, which says nothing about the file, so leave it to the next update
+                    continue
+                self.add_file(file_path, on_disk[file_path], info, exc, full)
+        return len(changed), len(removed), failed
+
+    def add_file(self, file_path, stat, info, exc, full=False):
+        cursor = self.connection.cursor()
+        cursor.execute("DELETE FROM files WHERE path = ?", (file_path,))
+        if exc is not None:
+            cursor.execute("INSERT INTO files (path, mtime, size, error) VALUES (?, ?, ?, ?)",
+                           (file_path, stat[0], stat[1], f"{type(exc).__name__}: {exc}"))
+            return
+        cursor.execute("INSERT INTO files (path, mtime, size, version, user_version, user_version_2, full) "
+                       "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                       (file_path, stat[0], stat[1], info["version"], info["user_version"], info["user_version_2"], full))
+        file_id = cursor.lastrowid
+        cursor.executemany("INSERT INTO block_types (file_id, block_type, count) VALUES (?, ?, ?)",
+                           ((file_id, block_type, count) for block_type, count in info["block_types"].items()))
+        cursor.executemany("INSERT INTO strings (file_id, string) VALUES (?, ?)",
+                           ((file_id, string) for string in info["strings"]))
+        cursor.executemany("INSERT INTO textures (file_id, texture) VALUES (?, ?)",
+                           ((file_id, normalize_texture(texture)) for texture in info["textures"]))
+
+    def find(self, block_type=None, texture=None, string=None, version=None, user_version=None):
+        """Get the sorted paths of the indexed files matching all given criteria."""
+        query = "SELECT path FROM files WHERE error IS NULL"
+        args = []
+        if block_type is not None:
+            query += " AND id IN (SELECT file_id FROM block_types WHERE block_type = ?)"
+            args.append(block_type)
+        if texture is not None:
+            query += " AND id IN (SELECT file_id FROM textures WHERE texture = ?)"
+            args.append(normalize_texture(texture))
+        if string is not None:
+            query += " AND id IN (SELECT file_id FROM strings WHERE string = ?)"
+            args.append(string)
+        if version is not None:
+            query += " AND version = ?"
+            args.append(version if isinstance(version, int) else NifFormat.version_number(version))
+        if user_version is not None:
+            query += " AND user_version = ?"
+            args.append(user_version)
+        return [path for path, in self.connection.execute(query + " ORDER BY path", args)]
+
+    def get_block_types(self, file_path):
+        """Get the block type histogram of an indexed file."""
+        return dict(self.connection.execute(
+            "SELECT block_type, count FROM block_types JOIN files ON files.id = file_id WHERE path = ?",
+            (os.path.abspath(file_path),)))
+
+    def get_errors(self):
+        """Get the (path, error) of all indexed files that could not be read."""
+        return self.connection.execute("SELECT path, error FROM files WHERE error IS NOT NULL ORDER BY path").fetchall()
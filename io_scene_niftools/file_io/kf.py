@@ -38,32 +38,27 @@
 # ***** END LICENSE BLOCK *****
 
 
-from pyffi.formats.nif import NifFormat
+from io_scene_niftools.file_io.nif import NifFile
 from io_scene_niftools.utils.logging import NifLog, NifError
 
 
 class KFFile:
     """Class to load and save a NifFile"""
 
+    @staticmethod
+    def check_version(kf_file):
+        """Reports the version of a kf file read by NifFile.read_nif, raises a NifError if it could not be read"""
+        if kf_file.version >= 0:
+            NifLog.info(f"KF file version: {kf_file.version:x}")
+        elif kf_file.version == -1:
+            raise NifError("Unsupported KF version.")
+        else:
+            raise NifError("Not a KF file.")
+
     @staticmethod
     def load_kf(file_path):
         """Loads a Kf file from the given path"""
         NifLog.info(f"Loading {file_path}")
-
-        kf_file = NifFormat.Data()
-
-        # open keyframe file for binary reading
-        with open(file_path, "rb") as kf_stream:
-            # check if nif file is valid
-            kf_file.inspect_version_only(kf_stream)
-            if kf_file.version >= 0:
-                # it is valid, so read the file
-                NifLog.info(f"KF file version: {kf_file.version:x}")
-                NifLog.info("Reading keyframe file")
-                kf_file.read(kf_stream)
-            elif kf_file.version == -1:
-                raise NifError("Unsupported KF version.")
-            else:
-                raise NifError("Not a KF file.")
-
+        kf_file = NifFile.read_nif(file_path)
+        KFFile.check_version(kf_file)
         return kf_file
@@ -0,0 +1,103 @@
+"""This module is used to read many Nif files concurrently"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2016, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the NIF File Format Library and Tools
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import itertools
+import multiprocessing
+import os
+
+from io_scene_niftools.file_io.nif import NifFile
+
+
+def _read_and_apply(file_path, func):
+    """Worker entry point: read a file and only send the (picklable) result of func back."""
+    return func(NifFile.read_nif(file_path))
+
+
+def _inspect_and_apply(file_path, func):
+    """Worker entry point: read the header of a file and only send the result of func back."""
+    return func(NifFile.inspect_nif(file_path))
+
+
+class NifLoader:
+    """Service to read nif and kf files on a pool of workers.
+
+    Reading is done with pyffi only and does not touch bpy. At most max_pending files are read
+    ahead of the consumer, so memory stays bounded no matter how many files are queued.
+
+    Parsed NifFormat.Data can not be pickled, so load() reads in threads of this process, while
+    map() reads in separate processes and only returns what the given function extracts from the data.
+    """
+
+    def __init__(self, max_workers=None, max_pending=None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max(max_pending or 2 * self.max_workers, 1)
+
+    def load(self, file_paths):
+        """Yields a (file_path, data, exception) tuple per file, in the order of file_paths.
+        Either data or exception is None. Versions are not checked, see NifFile.check_version."""
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            yield from self._run(executor, file_paths, NifFile.read_nif)
+
+    def map(self, func, file_paths, header_only=False):
+        """Yields a (file_path, result, exception) tuple per file, in the order of file_paths,
+        where result is func(data) evaluated in a worker process. func must be a picklable module level function.
+        With header_only, data only holds the header, see NifFile.inspect_nif."""
+        worker = _inspect_and_apply if header_only else _read_and_apply
+        # forking a running blender is not safe, and spawned workers behave the same on all platforms
+        with ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+            yield from self._run(executor, file_paths, worker, func)
+
+    def _run(self, executor, file_paths, worker, *args):
+        pending = deque()
+        file_paths = iter(file_paths)
+        while True:
+            # top up the queue of files being read
+            for file_path in itertools.islice(file_paths, self.max_pending - len(pending)):
+                pending.append((file_path, executor.submit(worker, file_path, *args)))
+            if not pending:
+                return
+            file_path, future = pending.popleft()
+            try:
+                result = future.result()
+            except Exception as e:
+                yield file_path, None, e
+            else:
+                yield file_path, result, None
@@ -47,10 +47,9 @@ class NifFile:
     """Class to load and save a NifFile"""
 
     @staticmethod
-    def load_nif(file_path):
-        """Loads a nif from the given file path"""
-        NifLog.info(f"Importing {file_path}")
-
+    def read_nif(file_path):
+        """Reads a nif from the given file path without reporting anything, so it is safe to call off the main thread.
+        The version of the returned data is negative if the file could not be read."""
         data = NifFormat.Data()
 
         # open file for binary reading
@@ -59,12 +58,34 @@ class NifFile:
             data.inspect_version_only(nif_stream)
             if data.version >= 0:
                 # it is valid, so read the file
-                NifLog.info(f"NIF file version: {data.version:x}")
-                NifLog.info("Reading file")
                 data.read(nif_stream)
-            elif data.version == -1:
-                raise NifError("Unsupported NIF version.")
-            else:
-                raise NifError("Not a NIF file.")
 
         return data
+
+    @staticmethod
+    def inspect_nif(file_path):
+        """Reads only the header of a nif, like read_nif. The blocks of the returned data are not read."""
+        data = NifFormat.Data()
+        with open(file_path, "rb") as nif_stream:
+            data.inspect_version_only(nif_stream)
+            if data.version >= 0:
+                data.inspect(nif_stream)
+        return data
+
+    @staticmethod
+    def check_version(data):
+        """Reports the version of data read by read_nif, raises a NifError if it could not be read"""
+        if data.version >= 0:
+            NifLog.info(f"NIF file version: {data.version:x}")
+        elif data.version == -1:
+            raise NifError("Unsupported NIF version.")
+        else:
+            raise NifError("Not a NIF file.")
+
+    @staticmethod
+    def load_nif(file_path):
+        """Loads a nif from the given file path"""
+        NifLog.info(f"Importing {file_path}")
+        data = NifFile.read_nif(file_path)
+        NifFile.check_version(data)
+        return data
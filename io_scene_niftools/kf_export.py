@@ -60,6 +60,7 @@ class KfExport(NifCommon):
         # Helper systems
         self.transform_anim = TransformAnimation()
 
+    @NifCommon.profile_execute
     def execute(self):
         """Main export function."""
 
@@ -80,7 +81,8 @@ class KfExport(NifCommon):
             math.set_bone_orientation(b_armature.data.niftools.axis_forward, b_armature.data.niftools.axis_up)
 
         NifLog.info("Creating keyframe tree")
-        kf_root = self.transform_anim.export_kf_root(b_armature)
+        with self.phase("animation"):
+            kf_root = self.transform_anim.export_kf_root(b_armature)
 
         # write kf (and xkf if asked)
         ext = ".kf"
@@ -93,7 +95,7 @@ class KfExport(NifCommon):
         self.apply_scale(data, round(1 / NifOp.props.scale_correction))
 
         kffile = os.path.join(directory, prefix + filebase + ext)
-        with open(kffile, "wb") as stream:
+        with self.phase("write"), open(kffile, "wb") as stream:
             data.write(stream)
 
         NifLog.info("Finished successfully")
@@ -42,6 +42,7 @@ import os
 import pyffi.spells.nif.fix
 
 from io_scene_niftools.file_io.kf import KFFile
+from io_scene_niftools.file_io.loader import NifLoader
 from io_scene_niftools.modules.nif_export import armature
 from io_scene_niftools.modules.nif_import.animation.transform import TransformAnimation
 from io_scene_niftools.nif_common import NifCommon
@@ -58,6 +59,7 @@ class KfImport(NifCommon):
         # Helper systems
         self.tranform_anim = TransformAnimation()
 
+    @NifCommon.profile_execute
     def execute(self):
         """Main import function."""
 
@@ -73,15 +75,19 @@ class KfImport(NifCommon):
 
             # get nif space bind pose of armature here for all anims
             bind_data = armature.get_bind_data(b_armature)
-            for kf_file in kf_files:
-                kfdata = KFFile.load_kf(kf_file)
+            for kf_file, kfdata, exception in NifLoader().load(kf_files):
+                NifLog.info(f"Loading {kf_file}")
+                if exception:
+                    raise NifError(f"Could not read {kf_file}: {exception}")
+                KFFile.check_version(kfdata)
 
                 self.apply_scale(kfdata, NifOp.props.scale_correction)
 
                 # calculate and set frames per second
-                self.tranform_anim.set_frames_per_second(kfdata.roots)
-                for kf_root in kfdata.roots:
-                    self.tranform_anim.import_kf_root(kf_root, b_armature, bind_data)
+                with self.phase("animation"):
+                    self.tranform_anim.set_frames_per_second(kfdata.roots)
+                    for kf_root in kfdata.roots:
+                        self.tranform_anim.import_kf_root(kf_root, b_armature, bind_data)
 
         except NifError:
             return {'CANCELLED'}
@@ -37,6 +37,7 @@
 #
 # ***** END LICENSE BLOCK *****
 
+import numpy as np
 from pyffi.formats.nif import NifFormat
 from pyffi.formats.egm import EgmFormat
 
@@ -54,7 +55,8 @@ class MorphAnimation(Animation):
         super().__init__()
         EGMData.data = None
 
-    def export_morph(self, b_mesh, n_trishape, vertmap):
+    def export_morph(self, b_mesh, n_trishape, nif_to_b):
+        """Export the shape keys of b_mesh, nif_to_b holds the blender vertex index of each vertex of n_trishape."""
         # shape b_key morphing
         b_key = b_mesh.shape_keys
         if b_key and len(b_key.key_blocks) > 1:
@@ -65,10 +67,11 @@ class MorphAnimation(Animation):
                 # egm export!
                 self.export_egm(b_key.key_blocks)
             elif b_key.animation_data:
-                self.export_morph_animation(b_mesh, b_key, n_trishape, vertmap)
+                self.export_morph_animation(b_mesh, b_key, n_trishape, nif_to_b)
 
     def export_egm(self, key_blocks):
         EGMData.data = EgmFormat.Data(num_vertices=len(key_blocks[0].data))
+        base_coords = self.get_coords(key_blocks[0].data)
         for key_block in key_blocks:
             if key_block.name.startswith("EGM SYM"):
                 morph = EGMData.data.add_sym_morph()
@@ -77,14 +80,17 @@ class MorphAnimation(Animation):
             else:
                 continue
             NifLog.info(f"Exporting morph {key_block.name} to egm")
-            relative_vertices = []
-
             # note: key_blocks[0] is base b_key
-            for base_vert, key_vert in zip(key_blocks[0].data, key_block.data):
-                relative_vertices.append(key_vert.co - base_vert.co)
-            morph.set_relative_vertices(relative_vertices)
+            morph.set_relative_vertices((self.get_coords(key_block.data) - base_coords).tolist())
+
+    @staticmethod
+    def get_coords(b_data):
+        """Return the coordinates of mesh vertices or shape key points as an (N, 3) array."""
+        coords = np.empty(len(b_data) * 3, dtype=np.float32)
+        b_data.foreach_get("co", coords)
+        return coords.reshape(-1, 3)
 
-    def export_morph_animation(self, b_mesh, b_key, n_trishape, vertmap):
+    def export_morph_animation(self, b_mesh, b_key, n_trishape, nif_to_b):
         
         # regular morph_data export
         b_shape_action = self.get_active_action(b_key)
@@ -112,6 +118,7 @@ class MorphAnimation(Animation):
         # TODO [morph] just guessing here, data seems to be zero always
         morph_ctrl.num_unknown_ints = len(b_key.key_blocks)
         morph_ctrl.unknown_ints.update_size()
+        base_coords = self.get_coords(b_mesh.vertices)
         for key_block_num, key_block in enumerate(b_key.key_blocks):
             # export morphed vertices
             n_morph = morph_data.morphs[key_block_num]
@@ -119,22 +126,15 @@ class MorphAnimation(Animation):
             NifLog.info(f"Exporting n_morph {key_block.name}: vertices")
             n_morph.arg = morph_data.num_vertices
             n_morph.vectors.update_size()
-            for b_v_index, (n_v_indices, b_vert) in enumerate(list(zip(vertmap, key_block.data))):
-                # see if this b_vert is used in the nif
-                if not n_v_indices:
-                    continue
-                # copy blender shapekey vertex
-                mv = b_vert.co.copy()
-                # make the consecutive keys relative to base shapekey
-                if key_block_num > 0:
-                    mv.x -= b_mesh.vertices[b_v_index].co.x
-                    mv.y -= b_mesh.vertices[b_v_index].co.y
-                    mv.z -= b_mesh.vertices[b_v_index].co.z
-                # update nif morph vectors
-                for n_v_index in n_v_indices:
-                    n_morph.vectors[n_v_index].x = mv.x
-                    n_morph.vectors[n_v_index].y = mv.y
-                    n_morph.vectors[n_v_index].z = mv.z
+            coords = self.get_coords(key_block.data)
+            # make the consecutive keys relative to base shapekey
+            if key_block_num > 0:
+                coords -= base_coords
+            # copy each blender shapekey vertex to all nif vertices it was split into
+            for n_vector, (x, y, z) in zip(n_morph.vectors, coords[nif_to_b].tolist()):
+                n_vector.x = x
+                n_vector.y = y
+                n_vector.z = z
 
             # create interpolator for shape b_key (needs to be there even if there is no fcu)
             interpol = block_store.create_block("NiFloatInterpolator")
@@ -39,6 +39,7 @@
 
 import bpy
 import mathutils
+import numpy as np
 
 from pyffi.formats.nif import NifFormat
 
@@ -66,6 +67,26 @@ class TransformAnimation(Animation):
             key = [k.co[1] for k in point]
             yield frame, mathutilclass(key)
 
+    @staticmethod
+    def get_frames_keys(fcurves):
+        """
+        Get the frames and keys of all fcurves as arrays of shape (N,) and (N, len(fcurves)).
+        Same assumptions as iter_frame_key.
+        """
+        num_keys = min(len(fcu.keyframe_points) for fcu in fcurves) if fcurves else 0
+        frames = np.zeros(num_keys, dtype=np.float32)
+        keys = np.zeros((num_keys, len(fcurves)), dtype=np.float32)
+        co = np.empty(num_keys * 2, dtype=np.float32)
+        for i, fcu in enumerate(fcurves):
+            if len(fcu.keyframe_points) == num_keys:
+                fcu.keyframe_points.foreach_get("co", co)
+            else:
+                co[:] = [c for point in fcu.keyframe_points[:num_keys] for c in point.co]
+            if i == 0:
+                frames[:] = co[0::2]
+            keys[:, i] = co[1::2]
+        return frames, keys
+
     def export_kf_root(self, b_armature=None):
 
         scene = bpy.context.scene
@@ -220,19 +241,20 @@ class TransformAnimation(Animation):
         euler_curve = []
         trans_curve = []
         scale_curve = []
-        for frame, quat in self.iter_frame_key(quaternions, mathutils.Quaternion):
-            quat = math.export_keymat(bind_rot, quat.to_matrix().to_4x4(), bone).to_quaternion()
-            quat_curve.append((frame, quat))
-
-        for frame, euler in self.iter_frame_key(eulers, mathutils.Euler):
-            keymat = math.export_keymat(bind_rot, euler.to_matrix().to_4x4(), bone)
-            euler = keymat.to_euler("XYZ", euler)
-            euler_curve.append((frame, euler))
-
-        for frame, trans in self.iter_frame_key(translations, mathutils.Vector):
-            keymat = math.export_keymat(bind_rot, mathutils.Matrix.Translation(trans), bone)
-            trans = keymat.to_translation() + bind_trans
-            trans_curve.append((frame, trans))
+        if quaternions:
+            frames, quats = self.get_frames_keys(quaternions)
+            quats = math.export_keymat_quaternions(bind_rot, quats, bone)
+            quat_curve = [(frame, mathutils.Quaternion(quat)) for frame, quat in zip(frames.tolist(), quats)]
+
+        if eulers:
+            frames, euls = self.get_frames_keys(eulers)
+            euls = math.export_keymat_eulers(bind_rot, euls, bone)
+            euler_curve = [(frame, mathutils.Euler(euler)) for frame, euler in zip(frames.tolist(), euls)]
+
+        if translations:
+            frames, trans = self.get_frames_keys(translations)
+            trans = math.export_keymat_translations(bind_rot, trans, bone) + np.array(bind_trans)
+            trans_curve = [(frame, mathutils.Vector(t)) for frame, t in zip(frames.tolist(), trans)]
 
         for frame, scale in self.iter_frame_key(scales, mathutils.Vector):
             # just use the first scale curve and assume even scale over all curves
@@ -37,6 +37,8 @@
 #
 # ***** END LICENSE BLOCK *****
 
+import itertools
+
 from pyffi.formats.nif import NifFormat
 
 import io_scene_niftools.utils.logging
@@ -56,6 +58,16 @@ class ExportBlockRegistry:
 
     def __init__(self):
         self._block_to_obj = {}
+        # reverse indices, kept up to date by register_block
+        self._block_order = {}
+        self._obj_to_blocks = {}
+        self._type_to_blocks = {}
+        self._name_to_node = {}
+        # content-addressed table of shareable blocks, and id(block) -> (key, get_key) it was interned with
+        self._interned = {}
+        self._intern_keys = {}
+        self.dedup_hits = 0
+        self.dedup_misses = 0
 
     @property
     def block_to_obj(self): 
@@ -63,7 +75,17 @@ class ExportBlockRegistry:
 
     @block_to_obj.setter
     def block_to_obj(self, value):
-        self._block_to_obj = value
+        self._block_to_obj = {}
+        self._block_order = {}
+        self._obj_to_blocks = {}
+        self._type_to_blocks = {}
+        self._name_to_node = {}
+        self._interned = {}
+        self._intern_keys = {}
+        self.dedup_hits = 0
+        self.dedup_misses = 0
+        for block, b_obj in value.items():
+            self._add_to_indices(block, b_obj)
 
     def register_block(self, block, b_obj=None):
         """Helper function to register a newly created block in the list of
@@ -73,12 +95,132 @@ class ExportBlockRegistry:
         @param b_obj: The Blender object.
         @return: C{block}"""
         if b_obj is None:
-            NifLog.info(f"Exporting {block.__class__.__name__} block")
+            NifLog.debug("Exporting %s block", block.__class__.__name__)
         else:
-            NifLog.info(f"Exporting {b_obj} as {block.__class__.__name__} block")
-        self._block_to_obj[block] = b_obj
+            NifLog.debug("Exporting %s as %s block", b_obj, block.__class__.__name__)
+        self._add_to_indices(block, b_obj)
         return block
 
+    def _add_to_indices(self, block, b_obj):
+        if block in self._block_to_obj:
+            # re-registration only changes the associated object
+            try:
+                self._obj_to_blocks[self._block_to_obj[block]].remove(block)
+            except (KeyError, TypeError, ValueError):
+                pass
+        else:
+            self._block_order[block] = len(self._block_order)
+            self._type_to_blocks.setdefault(type(block), []).append(block)
+        self._block_to_obj[block] = b_obj
+        try:
+            self._obj_to_blocks.setdefault(b_obj, []).append(block)
+        except TypeError:
+            # some blocks are keyed on unhashable helpers (eg. lists of fcurves), these are never looked up
+            pass
+
+    def get_blocks_for_obj(self, b_obj, block_type=None):
+        """Return the exported blocks associated with a Blender object, in export order.
+
+        :param b_obj: The Blender object (or bone, material...).
+        :param block_type: If given, only return blocks that are instances of this nif block type.
+        :return: List of nif blocks.
+        """
+        try:
+            blocks = self._obj_to_blocks.get(b_obj, [])
+        except TypeError:
+            return []
+        if block_type is None:
+            return list(blocks)
+        return [block for block in blocks if isinstance(block, block_type)]
+
+    def get_block_count(self):
+        """Number of exported blocks, use as start index for get_blocks_from."""
+        return len(self._block_order)
+
+    def get_block_index(self, block):
+        """Position of block in export order."""
+        return self._block_order[block]
+
+    def get_blocks_from(self, index):
+        """Return the blocks exported after the first index blocks, in export order."""
+        return list(itertools.islice(self._block_order, index, None))
+
+    def get_blocks_of_type(self, block_type):
+        """Return all exported blocks that are instances of block_type (subclasses included), in export order.
+
+        :param block_type: The nif block type, for instance NifFormat.NiNode.
+        :return: List of nif blocks.
+        """
+        buckets = [blocks for cls, blocks in self._type_to_blocks.items() if issubclass(cls, block_type)]
+        if len(buckets) == 1:
+            return list(buckets[0])
+        # restore export order across subclasses
+        return sorted((block for blocks in buckets for block in blocks), key=self._block_order.__getitem__)
+
+    def has_block_of_type(self, block_type):
+        """Whether any block of block_type (subclasses included) was exported."""
+        return any(blocks and issubclass(cls, block_type) for cls, blocks in self._type_to_blocks.items())
+
+    def get_node_by_name(self, name):
+        """Return the exported NiNode called name, or None if there is none.
+
+        Nodes are named after creation and can be renamed, so the name index is validated on lookup and rebuilt on a
+        miss.
+        """
+        if isinstance(name, str):
+            name = name.encode()
+        n_node = self._name_to_node.get(name)
+        if n_node is None or n_node.name != name:
+            self._name_to_node = {}
+            for n_block in self.get_blocks_of_type(NifFormat.NiNode):
+                self._name_to_node.setdefault(n_block.name, n_block)
+            n_node = self._name_to_node.get(name)
+        return n_node
+
+    def intern_block(self, block, b_obj=None, key=None, get_key=None):
+        """Return an already exported block identical to block, or register block and return it if there is none.
+
+        Blocks are looked up by (block type, key), where key defaults to get_key(block), or the block's content hash.
+        Use this for blocks which can be shared between several parents, such as properties and source textures.
+
+        @param block: The nif block.
+        @param b_obj: The Blender object, only used when block gets registered.
+        @param key: Hashable description of the block content, fixed for the lifetime of the block.
+        @param get_key: Function computing the key from the block content, defaults to C{block.get_hash()}.
+        @return: The existing identical block, or C{block}."""
+        fixed_key = key
+        if key is None:
+            key = (get_key or self._get_hash)(block)
+        key = (type(block), key)
+        n_block = self._interned.get(key)
+        if n_block is not None and fixed_key is None:
+            n_key = (type(n_block), (get_key or self._get_hash)(n_block))
+            if n_key != key:
+                # the interned block was modified after export (eg. a controller was added), so file it under its new key
+                del self._interned[key]
+                if self._interned.setdefault(n_key, n_block) is not n_block:
+                    del self._intern_keys[id(n_block)]
+                n_block = None
+        if n_block is not None:
+            self.dedup_hits += 1
+            return n_block
+        self.dedup_misses += 1
+        self._interned[key] = block
+        self._intern_keys[id(block)] = (fixed_key, get_key)
+        return self.register_block(block, b_obj)
+
+    @staticmethod
+    def _get_hash(block):
+        return block.get_hash()
+
+    def is_interned(self, block):
+        """Whether block is shared through intern_block."""
+        return id(block) in self._intern_keys
+
+    def get_intern_keys(self, block):
+        """The key and get_key arguments block was interned with, to intern a copy of it the same way."""
+        return self._intern_keys[id(block)]
+
     def create_block(self, block_type, b_obj=None):
         """Helper function to create a new block, register it in the list of
         exported blocks, and associate it with a Blender object.
@@ -0,0 +1,147 @@
+"""Script to cache generated mopps on disk, so unchanged collisions are not regenerated on every export."""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2016, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the NIF File Format Library and Tools
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import bpy
+import numpy as np
+import pyffi.utils.mopp
+
+from io_scene_niftools.utils.cache import DiskCache
+from io_scene_niftools.utils.logging import NifLog
+
+
+class MoppCache(DiskCache):
+    """Cache of the mopp code, origin, scale and welding info of bhkMoppBvTreeShape blocks,
+    keyed by the packed collision vertices, triangles, materials and scale, and the mopp generator."""
+
+    # bump whenever the key or the stored value changes
+    VERSION = 2
+    # only mopps of havok's generator are stored, pyffi's simple fallback mopp may be flawed in-game
+    GENERATOR = "havok"
+    DIRECTORY = "niftools_mopp_cache"
+    MAX_SIZE = 256 * 1024 * 1024
+
+    def __init__(self, directory=None, max_size=MAX_SIZE):
+        if directory is None:
+            directory = MoppCache.get_default_directory()
+        super().__init__(directory, max_size)
+
+    @staticmethod
+    def get_default_directory():
+        return bpy.utils.user_resource('DATAFILES', path=MoppCache.DIRECTORY)
+
+    @staticmethod
+    def get_key(n_mopp):
+        """Hash everything of the packed shape that goes into the mopp generator."""
+        n_shape = n_mopp.shape
+        n_data = n_shape.data
+        vertices = np.array([vert.as_tuple() for vert in n_data.vertices], dtype=np.float64)
+        triangles = np.array([(hktri.triangle.v_1, hktri.triangle.v_2, hktri.triangle.v_3)
+                              for hktri in n_data.triangles], dtype=np.int64)
+        # newer versions wrap the material enum in a HavokMaterial struct
+        sub_shapes = np.array([(sub_shape.num_vertices, int(getattr(sub_shape.material, "material", sub_shape.material)))
+                               for sub_shape in n_shape.get_sub_shapes()], dtype=np.int64)
+        scale = np.array((n_shape.scale.x, n_shape.scale.y, n_shape.scale.z), dtype=np.float64)
+        return DiskCache.hash_key(str(MoppCache.VERSION).encode(),
+                                  MoppCache.GENERATOR.encode(),
+                                  vertices.tobytes(),
+                                  triangles.tobytes(),
+                                  sub_shapes.tobytes(),
+                                  scale.tobytes())
+
+    @staticmethod
+    def get_mopp(n_mopp):
+        return {"origin": n_mopp.origin.as_tuple(),
+                "scale": n_mopp.scale,
+                "mopp": list(n_mopp.mopp_data),
+                "welding": [hktri.welding_info for hktri in n_mopp.shape.data.triangles]}
+
+    @staticmethod
+    def set_mopp(n_mopp, value):
+        n_mopp.origin.x, n_mopp.origin.y, n_mopp.origin.z = value["origin"]
+        n_mopp.scale = value["scale"]
+        n_mopp.mopp_data_size = len(value["mopp"])
+        n_mopp.mopp_data.update_size()
+        for i, b in enumerate(value["mopp"]):
+            n_mopp.mopp_data[i] = b
+        for hktri, welding_info in zip(n_mopp.shape.data.triangles, value["welding"]):
+            hktri.welding_info = welding_info
+
+    def update_mopp(self, n_mopp):
+        """Update the mopp of n_mopp from the cache, or generate and store it on a miss.
+        Returns True on a cache hit."""
+        key = MoppCache.get_key(n_mopp)
+        value = self.get(key)
+        if value is not None and len(value["welding"]) == n_mopp.shape.data.num_triangles:
+            NifLog.info("Reusing cached mopp...")
+            MoppCache.set_mopp(n_mopp, value)
+            return True
+
+        NifLog.info("Generating mopp...")
+        value = MoppCache.generate_mopp(n_mopp)
+        if value is None:
+            # pyffi falls back on a simple mopp, which is not worth caching
+            n_mopp.update_mopp()
+            return False
+        MoppCache.set_mopp(n_mopp, value)
+        try:
+            self.put(key, value)
+        except OSError as e:
+            NifLog.warn(f"Could not store mopp in cache {self.directory}: {e}")
+        return False
+
+    @staticmethod
+    def generate_mopp(n_mopp):
+        """Run havok's mopp generator on the packed shape, like bhkMoppBvTreeShape.update_mopp.
+        Returns the mopp as stored in the cache, or None if the generator is missing or failed."""
+        n_shape = n_mopp.shape
+        n_data = n_shape.data
+        material_per_vertex = []
+        for sub_shape in n_shape.get_sub_shapes():
+            # newer versions wrap the material enum in a HavokMaterial struct
+            material_per_vertex += [int(getattr(sub_shape.material, "material", sub_shape.material))] * sub_shape.num_vertices
+        try:
+            # credit havok
+            NifLog.debug(pyffi.utils.mopp.getMopperCredits())
+            origin, scale, mopp, welding = pyffi.utils.mopp.getMopperOriginScaleCodeWelding(
+                [vert.as_tuple() for vert in n_data.vertices],
+                [(hktri.triangle.v_1, hktri.triangle.v_2, hktri.triangle.v_3) for hktri in n_data.triangles],
+                [material_per_vertex[hktri.triangle.v_1] for hktri in n_data.triangles])
+        except (OSError, RuntimeError):
+            return None
+        return {"origin": tuple(origin), "scale": scale, "mopp": list(mopp), "welding": list(welding)}
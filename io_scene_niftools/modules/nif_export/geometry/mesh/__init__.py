@@ -36,8 +36,11 @@
 #
 # ***** END LICENSE BLOCK *****
 
+import hashlib
+
 import bpy
 import mathutils
+import numpy as np
 
 from pyffi.formats.nif import NifFormat
 
@@ -45,10 +48,12 @@ import io_scene_niftools.utils.logging
 from io_scene_niftools.modules.nif_export.geometry import mesh
 from io_scene_niftools.modules.nif_export.animation.morph import MorphAnimation
 from io_scene_niftools.modules.nif_export.block_registry import block_store
+from io_scene_niftools.modules.nif_export.geometry.mesh.cache import TriShapeCache
 from io_scene_niftools.modules.nif_export.property.object import ObjectProperty
 from io_scene_niftools.modules.nif_export.property.texture.types.nitextureprop import NiTextureProp
+from io_scene_niftools.nif_common import NifCommon
 from io_scene_niftools.utils import math
-from io_scene_niftools.utils.singleton import NifOp, NifData
+from io_scene_niftools.utils.singleton import NifOp, NifData, EGMData
 from io_scene_niftools.utils.logging import NifLog, NifError
 
 
@@ -58,6 +63,8 @@ class Mesh:
         self.texture_helper = NiTextureProp.get()
         self.object_property = ObjectProperty()
         self.morph_anim = MorphAnimation()
+        # instance key -> trishape data, shared by the objects which link the same blender mesh, see get_instance_key
+        self.instanced_data = {}
 
     def export_tri_shapes(self, b_obj, n_parent, trishape_name=None):
         """
@@ -77,6 +84,25 @@ class Mesh:
         # get mesh from b_obj
         b_mesh = self.get_triangulated_mesh(b_obj)
 
+        if not NifOp.props.use_incremental_export:
+            return self.export_mesh_tri_shapes(b_obj, b_mesh, n_parent, trishape_name)
+
+        # reuse the trishapes of the previous export if nothing changed
+        key = TriShapeCache.get_key(b_obj, b_mesh, n_parent, trishape_name)
+        if not NifOp.props.force_full_export:
+            trishape = TriShapeCache.splice(b_obj, key, n_parent)
+            if trishape:
+                return trishape
+        block_count = block_store.get_block_count()
+        egm_data = EGMData.data
+        trishape = self.export_mesh_tri_shapes(b_obj, b_mesh, n_parent, trishape_name)
+        # egm morphs are exported to a separate file, so they cannot be restored from the cache
+        if EGMData.data is egm_data:
+            TriShapeCache.store(b_obj, key, n_parent, block_store.get_blocks_from(block_count))
+        return trishape
+
+    def export_mesh_tri_shapes(self, b_obj, b_mesh, n_parent, trishape_name=None):
+        """Export the triangulated mesh b_mesh of b_obj as trishapes, see export_tri_shapes."""
         # getVertsFromGroup fails if the mesh has no vertices
         # (this happens when checking for fallout 3 body parts)
         # so quickly catch this (rare!) case
@@ -100,6 +126,8 @@ class Mesh:
         mesh_hasvcol = b_mesh.vertex_colors
         # list of body part (name, index, vertices) in this mesh
         bodypartgroups = self.get_body_part_groups(b_obj, b_mesh)
+        # bone weights are read on demand, once for the trishapes of all materials
+        skin_weights = None
 
         # Non-textured materials, vertex colors are used to color the mesh
         # Textured materials, they represent lighting details
@@ -160,7 +188,8 @@ class Mesh:
                 # refer to this mesh in the parent's children list
                 n_parent.add_child(trishape)
 
-            self.object_property.export_properties(b_obj, b_mat, trishape)
+            with NifCommon.phase("material"):
+                self.object_property.export_properties(b_obj, b_mat, trishape)
 
             # -> now comes the real export
 
@@ -183,112 +212,23 @@ class Mesh:
             # produce lists of vertices, uv-vertices, normals, vertex colors, and face indices.
 
             mesh_uv_layers = b_mesh.uv_layers
-            vertquad_list = []  # (vertex, uv coordinate, normal, vertex color) list
-            vertmap = [None for _ in range(len(b_mesh.vertices))]  # blender vertex -> nif vertices
-            vertlist = []
-            normlist = []
-            vcollist = []
-            uvlist = []
-            trilist = []
-            # for each face in trilist, a body part index
-            bodypartfacemap = []
-            polygons_without_bodypart = []
-            for poly in b_mesh.polygons:
-
-                # does the face belong to this trishape?
-                if b_mat is not None and poly.material_index != materialIndex:
-                    # we have a material but this face has another material, so skip
-                    continue
-
-                f_numverts = len(poly.vertices)
-                if f_numverts < 3:
-                    continue  # ignore degenerate polygons
-                assert ((f_numverts == 3) or (f_numverts == 4))  # debug
-                if mesh_uv_layers:
-                    # if we have uv coordinates double check that we have uv data
-                    if not b_mesh.uv_layer_stencil:
-                        NifLog.warn(f"No UV map for texture associated with poly {poly.index:s} of selected mesh '{b_mesh.name}'.")
-
-                # find (vert, uv-vert, normal, vcol) quad, and if not found, create it
-                f_index = [-1] * f_numverts
-                for i, loop_index in enumerate(range(poly.loop_start, poly.loop_start + poly.loop_total)):
-
-                    fv_index = b_mesh.loops[loop_index].vertex_index
-                    vertex = b_mesh.vertices[fv_index]
-                    vertex_index = vertex.index
-                    fv = vertex.co
-
-                    # smooth = vertex normal, non-smooth = face normal)
-                    if mesh_hasnormals:
-                        if poly.use_smooth:
-                            fn = vertex.normal
-                        else:
-                            fn = poly.normal
-                    else:
-                        fn = None
-
-                    fuv = [uv_layer.data[loop_index].uv for uv_layer in b_mesh.uv_layers]
 
-                    # TODO [geomotry][mesh] Need to map b_verts -> n_verts
-                    if mesh_hasvcol:
-                        f_col = list(b_mesh.vertex_colors[0].data[loop_index].color)
-                    else:
-                        f_col = None
-
-                    vertquad = (fv, fuv, fn, f_col)
-
-                    # check for duplicate vertquad?
-                    f_index[i] = len(vertquad_list)
-                    if vertmap[vertex_index] is not None:
-                        # iterate only over vertices with the same vertex index
-                        for j in vertmap[vertex_index]:
-                            # check if they have the same uvs, normals and colors
-                            if self.is_new_face_corner_data(vertquad, vertquad_list[j]):
-                                continue
-                            # all tests passed: so yes, we already have a vert with the same face corner data!
-                            f_index[i] = j
-                            break
-
-                    if f_index[i] > 65535:
-                        raise io_scene_niftools.utils.logging.NifError("Too many vertices. Decimate your mesh and try again.")
-
-                    if f_index[i] == len(vertquad_list):
-                        # first: add it to the vertex map
-                        if not vertmap[vertex_index]:
-                            vertmap[vertex_index] = []
-                        vertmap[vertex_index].append(len(vertquad_list))
-                        # new (vert, uv-vert, normal, vcol) quad: add it
-                        vertquad_list.append(vertquad)
-
-                        # add the vertex
-                        vertlist.append(vertquad[0])
-                        if mesh_hasnormals:
-                            normlist.append(vertquad[2])
-                        if mesh_hasvcol:
-                            vcollist.append(vertquad[3])
-                        if mesh_uv_layers:
-                            uvlist.append(vertquad[1])
-
-                # now add the (hopefully, convex) face, in triangles
-                for i in range(f_numverts - 2):
-                    if (b_obj.scale.x + b_obj.scale.y + b_obj.scale.z) > 0:
-                        f_indexed = (f_index[0], f_index[1 + i], f_index[2 + i])
-                    else:
-                        f_indexed = (f_index[0], f_index[2 + i], f_index[1 + i])
-                    trilist.append(f_indexed)
-
-                    # add body part number
-                    if bpy.context.scene.niftools_scene.game not in ('FALLOUT_3', 'SKYRIM') or not bodypartgroups:
-                        # TODO: or not self.EXPORT_FO3_BODYPARTS):
-                        bodypartfacemap.append(0)
-                    else:
-                        for bodypartname, bodypartindex, bodypartverts in bodypartgroups:
-                            if set(b_vert_index for b_vert_index in poly.vertices) <= bodypartverts:
-                                bodypartfacemap.append(bodypartindex)
-                                break
-                        else:
-                            # this signals an error
-                            polygons_without_bodypart.append(poly)
+            # objects linking the same mesh share its trishape data
+            instance_key = self.get_instance_key(b_obj, n_parent, b_mat, materialIndex)
+            if instance_key in self.instanced_data:
+                NifLog.info(f"Sharing trishape data of {b_obj.data.name} with {b_obj.name}")
+                trishape.data = self.instanced_data[instance_key]
+                if mesh_uv_layers and mesh_hasnormals:
+                    self.export_tangent_space(trishape)
+                continue
+
+            if NifOp.props.reference_vertex_split:
+                geom_data = self.get_geom_data_reference(b_obj, b_mesh, b_mat, materialIndex, mesh_hasnormals, mesh_hasvcol, bodypartgroups)
+            else:
+                geom_data = self.get_geom_data(b_obj, b_mesh, b_mat, materialIndex, mesh_hasnormals, mesh_hasvcol, bodypartgroups)
+            vertlist, normlist, vcollist, uvlist, trilist, bodypartfacemap, polygons_without_bodypart, vertmap = geom_data
+            # blender vertex of each nif vertex, shared by skin and morph export
+            nif_to_b = self.get_vertmap_index(vertmap, len(vertlist))
 
             # check that there are no missing body part polygons
             if polygons_without_bodypart:
@@ -349,142 +289,475 @@ class Mesh:
             # for extra shader texture games, only export it if those textures are actually exported
             # (civ4 seems to be consistent with not using tangent space on non shadered nifs)
             if mesh_uv_layers and mesh_hasnormals:
-                if bpy.context.scene.niftools_scene.game in ('OBLIVION', 'FALLOUT_3', 'SKYRIM') or (bpy.context.scene.niftools_scene.game in self.texture_helper.USED_EXTRA_SHADER_TEXTURES):
-                    if bpy.context.scene.niftools_scene.game == 'SKYRIM':
-                        tridata.bs_num_uv_sets = tridata.bs_num_uv_sets + 4096
-                    trishape.update_tangent_space(as_extra=(bpy.context.scene.niftools_scene.game == 'OBLIVION'))
+                if bpy.context.scene.niftools_scene.game == 'SKYRIM' and self.has_tangent_space():
+                    tridata.bs_num_uv_sets = tridata.bs_num_uv_sets + 4096
+                self.export_tangent_space(trishape)
+            if instance_key:
+                self.instanced_data[instance_key] = tridata
 
             # todo [mesh/object] use more sophisticated armature finding, also taking armature modifier into account
             # now export the vertex weights, if there are any
-            if b_obj.parent and b_obj.parent.type == 'ARMATURE':
-                b_obj_armature = b_obj.parent
-                vertgroups = {vertex_group.name for vertex_group in b_obj.vertex_groups}
-                bone_names = set(b_obj_armature.data.bones.keys())
-                # the vertgroups that correspond to bone_names are bones that influence the mesh
-                boneinfluences = vertgroups & bone_names
-                if boneinfluences:  # yes we have skinning!
-                    # create new skinning instance block and link it
-                    n_root_name = block_store.get_full_name(b_obj_armature)
-                    skininst, skindata = self.create_skin_inst_data(b_obj, n_root_name, bodypartgroups)
-                    trishape.skin_instance = skininst
-
-                    # Vertex weights,  find weights and normalization factors
-                    vert_list = {}
-                    vert_norm = {}
-                    unweighted_vertices = []
-
-                    for bone_group in boneinfluences:
-                        b_list_weight = []
-                        b_vert_group = b_obj.vertex_groups[bone_group]
-
-                        for b_vert in b_mesh.vertices:
-                            if len(b_vert.groups) == 0:  # check vert has weight_groups
-                                unweighted_vertices.append(b_vert)
-                                continue
-
-                            for g in b_vert.groups:
-                                if b_vert_group.name in boneinfluences:
-                                    if g.group == b_vert_group.index:
-                                        b_list_weight.append((b_vert.index, g.weight))
-                                        break
-
-                        vert_list[bone_group] = b_list_weight
-
-                        # create normalisation groupings
-                        for v in vert_list[bone_group]:
-                            if v[0] in vert_norm:
-                                vert_norm[v[0]] += v[1]
-                            else:
-                                vert_norm[v[0]] = v[1]
-
-                    self.select_unweighted_vertices(unweighted_vertices)
-
-                    # for each bone, first we get the bone block then we get the vertex weights and then we add it to the NiSkinData
-                    # note: allocate memory for faster performance
-                    vert_added = [False for _ in range(len(vertlist))]
-                    for b_bone_name in boneinfluences:
-                        # find bone in exported blocks
-                        bone_block = self.get_bone_block(b_obj_armature.data.bones[b_bone_name])
-
-                        # find vertex weights
-                        vert_weights = {}
-                        for v in vert_list[b_bone_name]:
-                            # v[0] is the original vertex index
-                            # v[1] is the weight
-
-                            # vertmap[v[0]] is the set of vertices (indices) to which v[0] was mapped
-                            # so we simply export the same weight as the original vertex for each new vertex
-
-                            # write the weights
-                            # extra check for multi material meshes
-                            if vertmap[v[0]] and vert_norm[v[0]]:
-                                for vert_index in vertmap[v[0]]:
-                                    vert_weights[vert_index] = v[1] / vert_norm[v[0]]
-                                    vert_added[vert_index] = True
-                        # add bone as influence, but only if there were actually any vertices influenced by the bone
-                        if vert_weights:
-                            trishape.add_bone(bone_block, vert_weights)
-
-                    # update bind position skinning data
-                    trishape.update_bind_position()
-
-                    # calculate center and radius for each skin bone data block
-                    trishape.update_skin_center_radius()
-
-                    if NifData.data.version >= 0x04020100 and NifOp.props.skin_partition:
-                        NifLog.info("Creating skin partition")
-                        lostweight = trishape.update_skin_partition(
-                            maxbonesperpartition=NifOp.props.max_bones_per_partition,
-                            maxbonespervertex=NifOp.props.max_bones_per_vertex,
-                            stripify=NifOp.props.stripify,
-                            stitchstrips=NifOp.props.stitch_strips,
-                            padbones=NifOp.props.pad_bones,
-                            triangles=trilist,
-                            trianglepartmap=bodypartfacemap,
-                            maximize_bone_sharing=(bpy.context.scene.niftools_scene.game in ('FALLOUT_3', 'SKYRIM')))
-
-                        # warn on bad config settings
-                        if bpy.context.scene.niftools_scene.game == 'OBLIVION':
-                            if NifOp.props.pad_bones:
-                                NifLog.warn("Using padbones on Oblivion export. Disable the pad bones option to get higher quality skin partitions.")
-                        if bpy.context.scene.niftools_scene.game in ('OBLIVION', 'FALLOUT_3'):
-                            if NifOp.props.max_bones_per_partition < 18:
-                                NifLog.warn("Using less than 18 bones per partition on Oblivion/Fallout 3 export."
-                                            "Set it to 18 to get higher quality skin partitions.")
-                        if bpy.context.scene.niftools_scene.game in 'SKYRIM':
-                            if NifOp.props.max_bones_per_partition < 24:
-                                NifLog.warn("Using less than 24 bones per partition on Skyrim export."
-                                            "Set it to 24 to get higher quality skin partitions.")
-                        if lostweight > NifOp.props.epsilon:
-                            NifLog.warn(f"Lost {lostweight:f} in vertex weights while creating a skin partition for Blender object '{b_obj.name}' (nif block '{trishape.name}')")
-
-                    if isinstance(skininst, NifFormat.BSDismemberSkinInstance):
-                        partitions = skininst.partitions
-                        b_obj_part_flags = b_obj.niftools_part_flags
-                        for s_part in partitions:
-                            s_part_index = NifFormat.BSDismemberBodyPartType._enumvalues.index(s_part.body_part)
-                            s_part_name = NifFormat.BSDismemberBodyPartType._enumkeys[s_part_index]
-                            for b_part in b_obj_part_flags:
-                                if s_part_name == b_part.name:
-                                    s_part.part_flag.pf_start_net_boneset = b_part.pf_startflag
-                                    s_part.part_flag.pf_editor_visible = b_part.pf_editorflag
-
-                    # clean up
-                    del vert_weights
-                    del vert_added
+            with NifCommon.phase("skin"):
+                if b_obj.parent and b_obj.parent.type == 'ARMATURE':
+                    b_obj_armature = b_obj.parent
+                    vertgroups = {vertex_group.name for vertex_group in b_obj.vertex_groups}
+                    bone_names = set(b_obj_armature.data.bones.keys())
+                    # the vertgroups that correspond to bone_names are bones that influence the mesh
+                    boneinfluences = vertgroups & bone_names
+                    if boneinfluences:  # yes we have skinning!
+                        # create new skinning instance block and link it
+                        n_root_name = block_store.get_full_name(b_obj_armature)
+                        skininst, skindata = self.create_skin_inst_data(b_obj, n_root_name, bodypartgroups)
+                        trishape.skin_instance = skininst
+
+                        # Vertex weights, normalized per vertex
+                        if skin_weights is None:
+                            skin_weights = self.get_skin_weights(b_obj, b_mesh, bone_names)
+                        bone_influences, bone_vertex_weights = self.get_trishape_weights(skin_weights, nif_to_b, len(vertmap))
+
+                        # for each bone, first we get the bone block then we add its vertex weights to the NiSkinData
+                        for b_bone_name, vert_weights in zip(bone_influences, bone_vertex_weights):
+                            # add bone as influence, but only if there were actually any vertices influenced by the bone
+                            if vert_weights:
+                                # find bone in exported blocks
+                                bone_block = self.get_bone_block(b_obj_armature.data.bones[b_bone_name])
+                                trishape.add_bone(bone_block, vert_weights)
+
+                        # update bind position skinning data
+                        trishape.update_bind_position()
+
+                        # calculate center and radius for each skin bone data block
+                        trishape.update_skin_center_radius()
+
+                        if NifData.data.version >= 0x04020100 and NifOp.props.skin_partition:
+                            NifLog.info("Creating skin partition")
+                            lostweight = trishape.update_skin_partition(
+                                maxbonesperpartition=NifOp.props.max_bones_per_partition,
+                                maxbonespervertex=NifOp.props.max_bones_per_vertex,
+                                stripify=NifOp.props.stripify,
+                                stitchstrips=NifOp.props.stitch_strips,
+                                padbones=NifOp.props.pad_bones,
+                                triangles=trilist,
+                                trianglepartmap=bodypartfacemap,
+                                maximize_bone_sharing=(bpy.context.scene.niftools_scene.game in ('FALLOUT_3', 'SKYRIM')))
+
+                            # warn on bad config settings
+                            if bpy.context.scene.niftools_scene.game == 'OBLIVION':
+                                if NifOp.props.pad_bones:
+                                    NifLog.warn("Using padbones on Oblivion export. Disable the pad bones option to get higher quality skin partitions.")
+                            if bpy.context.scene.niftools_scene.game in ('OBLIVION', 'FALLOUT_3'):
+                                if NifOp.props.max_bones_per_partition < 18:
+                                    NifLog.warn("Using less than 18 bones per partition on Oblivion/Fallout 3 export."
+                                                "Set it to 18 to get higher quality skin partitions.")
+                            if bpy.context.scene.niftools_scene.game in 'SKYRIM':
+                                if NifOp.props.max_bones_per_partition < 24:
+                                    NifLog.warn("Using less than 24 bones per partition on Skyrim export."
+                                                "Set it to 24 to get higher quality skin partitions.")
+                            if lostweight > NifOp.props.epsilon:
+                                NifLog.warn(f"Lost {lostweight:f} in vertex weights while creating a skin partition for Blender object '{b_obj.name}' (nif block '{trishape.name}')")
+
+                        if isinstance(skininst, NifFormat.BSDismemberSkinInstance):
+                            partitions = skininst.partitions
+                            b_obj_part_flags = b_obj.niftools_part_flags
+                            for s_part in partitions:
+                                s_part_index = NifFormat.BSDismemberBodyPartType._enumvalues.index(s_part.body_part)
+                                s_part_name = NifFormat.BSDismemberBodyPartType._enumkeys[s_part_index]
+                                for b_part in b_obj_part_flags:
+                                    if s_part_name == b_part.name:
+                                        s_part.part_flag.pf_start_net_boneset = b_part.pf_startflag
+                                        s_part.part_flag.pf_editor_visible = b_part.pf_editorflag
 
             # fix data consistency type
             tridata.consistency_flags = b_obj.niftools.consistency_flags
 
             # export EGM or NiGeomMorpherController animation
-            self.morph_anim.export_morph(b_mesh, trishape, vertmap)
+            with NifCommon.phase("animation"):
+                self.morph_anim.export_morph(b_mesh, trishape, nif_to_b)
         return trishape
 
+    def has_tangent_space(self):
+        """Whether the game uses tangent space, for extra shader texture games only if those textures are exported."""
+        game = bpy.context.scene.niftools_scene.game
+        return game in ('OBLIVION', 'FALLOUT_3', 'SKYRIM') or game in self.texture_helper.USED_EXTRA_SHADER_TEXTURES
+
+    def export_tangent_space(self, trishape):
+        """Update the tangent space of the trishape's data, or of the trishape itself (as binary extra data) for Oblivion."""
+        if self.has_tangent_space():
+            trishape.update_tangent_space(as_extra=(bpy.context.scene.niftools_scene.game == 'OBLIVION'))
+
+    @staticmethod
+    def get_instance_key(b_obj, n_parent, b_mat, material_index):
+        """Return what the trishape data of b_obj for material_index depends on besides the mesh itself, so objects
+        with the same key can share one data block. Returns None for skinned and morphed objects, which need data of
+        their own."""
+        b_mesh = b_obj.data
+        if b_mesh.users < 2 or b_mesh.shape_keys or (b_obj.parent and b_obj.parent.type == 'ARMATURE'):
+            return None
+        hasher = hashlib.sha256()
+        for b_mod in b_obj.modifiers:
+            TriShapeCache.add_rna(hasher, b_mod)
+        # negative scales flip the triangle winding
+        is_flipped = (b_obj.scale.x + b_obj.scale.y + b_obj.scale.z) <= 0
+        return (b_mesh.name_full, material_index, b_mat.name_full if b_mat else None, hasher.hexdigest(), is_flipped,
+                b_obj.niftools.consistency_flags, isinstance(n_parent, NifFormat.RootCollisionNode))
+
+    def get_geom_data_reference(self, b_obj, b_mesh, b_mat, material_index, mesh_hasnormals, mesh_hasvcol, bodypartgroups):
+        """Extract the unique (vert, uv-vert, normal, vcol) quads of the polygons using b_mat by walking every loop.
+        Slow, but kept as the reference for the vectorized get_geom_data."""
+        mesh_uv_layers = b_mesh.uv_layers
+        vertquad_list = []  # (vertex, uv coordinate, normal, vertex color) list
+        vertmap = [None for _ in range(len(b_mesh.vertices))]  # blender vertex -> nif vertices
+        vertlist = []
+        normlist = []
+        vcollist = []
+        uvlist = []
+        trilist = []
+        # for each face in trilist, a body part index
+        bodypartfacemap = []
+        polygons_without_bodypart = []
+        for poly in b_mesh.polygons:
+
+            # does the face belong to this trishape?
+            if b_mat is not None and poly.material_index != material_index:
+                # we have a material but this face has another material, so skip
+                continue
+
+            f_numverts = len(poly.vertices)
+            if f_numverts < 3:
+                continue  # ignore degenerate polygons
+            assert ((f_numverts == 3) or (f_numverts == 4))  # debug
+            if mesh_uv_layers:
+                # if we have uv coordinates double check that we have uv data
+                if not b_mesh.uv_layer_stencil:
+                    NifLog.warn(f"No UV map for texture associated with poly {poly.index:s} of selected mesh '{b_mesh.name}'.")
+
+            # find (vert, uv-vert, normal, vcol) quad, and if not found, create it
+            f_index = [-1] * f_numverts
+            for i, loop_index in enumerate(range(poly.loop_start, poly.loop_start + poly.loop_total)):
+
+                fv_index = b_mesh.loops[loop_index].vertex_index
+                vertex = b_mesh.vertices[fv_index]
+                vertex_index = vertex.index
+                fv = vertex.co
+
+                # smooth = vertex normal, non-smooth = face normal)
+                if mesh_hasnormals:
+                    if poly.use_smooth:
+                        fn = vertex.normal
+                    else:
+                        fn = poly.normal
+                else:
+                    fn = None
+
+                fuv = [uv_layer.data[loop_index].uv for uv_layer in b_mesh.uv_layers]
+
+                # TODO [geomotry][mesh] Need to map b_verts -> n_verts
+                if mesh_hasvcol:
+                    f_col = list(b_mesh.vertex_colors[0].data[loop_index].color)
+                else:
+                    f_col = None
+
+                vertquad = (fv, fuv, fn, f_col)
+
+                # check for duplicate vertquad?
+                f_index[i] = len(vertquad_list)
+                if vertmap[vertex_index] is not None:
+                    # iterate only over vertices with the same vertex index
+                    for j in vertmap[vertex_index]:
+                        # check if they have the same uvs, normals and colors
+                        if self.is_new_face_corner_data(vertquad, vertquad_list[j]):
+                            continue
+                        # all tests passed: so yes, we already have a vert with the same face corner data!
+                        f_index[i] = j
+                        break
+
+                if f_index[i] > 65535:
+                    raise io_scene_niftools.utils.logging.NifError("Too many vertices. Decimate your mesh and try again.")
+
+                if f_index[i] == len(vertquad_list):
+                    # first: add it to the vertex map
+                    if not vertmap[vertex_index]:
+                        vertmap[vertex_index] = []
+                    vertmap[vertex_index].append(len(vertquad_list))
+                    # new (vert, uv-vert, normal, vcol) quad: add it
+                    vertquad_list.append(vertquad)
+
+                    # add the vertex
+                    vertlist.append(vertquad[0])
+                    if mesh_hasnormals:
+                        normlist.append(vertquad[2])
+                    if mesh_hasvcol:
+                        vcollist.append(vertquad[3])
+                    if mesh_uv_layers:
+                        uvlist.append(vertquad[1])
+
+            # now add the (hopefully, convex) face, in triangles
+            for i in range(f_numverts - 2):
+                if (b_obj.scale.x + b_obj.scale.y + b_obj.scale.z) > 0:
+                    f_indexed = (f_index[0], f_index[1 + i], f_index[2 + i])
+                else:
+                    f_indexed = (f_index[0], f_index[2 + i], f_index[1 + i])
+                trilist.append(f_indexed)
+
+                # add body part number
+                if bpy.context.scene.niftools_scene.game not in ('FALLOUT_3', 'SKYRIM') or not bodypartgroups:
+                    # TODO: or not self.EXPORT_FO3_BODYPARTS):
+                    bodypartfacemap.append(0)
+                else:
+                    for bodypartname, bodypartindex, bodypartverts in bodypartgroups:
+                        if set(b_vert_index for b_vert_index in poly.vertices) <= bodypartverts:
+                            bodypartfacemap.append(bodypartindex)
+                            break
+                    else:
+                        # this signals an error
+                        polygons_without_bodypart.append(poly)
+
+        return vertlist, normlist, vcollist, uvlist, trilist, bodypartfacemap, polygons_without_bodypart, vertmap
+
+    def get_geom_data(self, b_obj, b_mesh, b_mat, material_index, mesh_hasnormals, mesh_hasvcol, bodypartgroups):
+        """Extract the unique (vert, uv-vert, normal, vcol) quads of the polygons using b_mat in bulk.
+
+        Face corner data is read with foreach_get and exact duplicates are removed with a single unique over the corner
+        table. The remaining corners of a vertex are merged within epsilon like is_new_face_corner_data does, and
+        vertices keep the order of their first corner, so the result matches get_geom_data_reference.
+        """
+        mesh_uv_layers = b_mesh.uv_layers
+        num_verts = len(b_mesh.vertices)
+        num_polys = len(b_mesh.polygons)
+        num_loops = len(b_mesh.loops)
+        vertmap = [None for _ in range(num_verts)]  # blender vertex -> nif vertices
+
+        # polygon table
+        loop_start = np.empty(num_polys, dtype=np.int32)
+        loop_total = np.empty(num_polys, dtype=np.int32)
+        poly_material = np.empty(num_polys, dtype=np.int32)
+        b_mesh.polygons.foreach_get("loop_start", loop_start)
+        b_mesh.polygons.foreach_get("loop_total", loop_total)
+        b_mesh.polygons.foreach_get("material_index", poly_material)
+
+        # does the face belong to this trishape? (ignore degenerate polygons)
+        poly_mask = loop_total >= 3
+        if b_mat is not None:
+            poly_mask &= poly_material == material_index
+        polys = np.flatnonzero(poly_mask)
+        if not len(polys):
+            return [], [], [], [], [], [], [], vertmap
+
+        if mesh_uv_layers and not b_mesh.uv_layer_stencil:
+            # if we have uv coordinates double check that we have uv data
+            NifLog.warn(f"No UV map for texture associated with selected mesh '{b_mesh.name}'.")
+
+        # corners of the selected polygons, in polygon order
+        counts = loop_total[polys].astype(np.int64)
+        offsets = np.cumsum(counts) - counts
+        corner_poly = np.repeat(polys, counts)
+        corners = np.repeat(loop_start[polys], counts) + np.arange(counts.sum()) - np.repeat(offsets, counts)
+
+        loop_vert = np.empty(num_loops, dtype=np.int32)
+        b_mesh.loops.foreach_get("vertex_index", loop_vert)
+        corner_vert = loop_vert[corners]
+
+        vert_co = np.empty(num_verts * 3, dtype=np.float32)
+        b_mesh.vertices.foreach_get("co", vert_co)
+        vert_co = vert_co.reshape(-1, 3)
+
+        # only face corners of the same blender vertex are merged, so the vertex index leads the key
+        keys = [corner_vert.reshape(-1, 1).astype(np.float64)]
+
+        if mesh_uv_layers:
+            corner_uv = np.empty((len(corners), len(mesh_uv_layers), 2), dtype=np.float32)
+            loop_uv = np.empty(num_loops * 2, dtype=np.float32)
+            for i, uv_layer in enumerate(mesh_uv_layers):
+                uv_layer.data.foreach_get("uv", loop_uv)
+                corner_uv[:, i] = loop_uv.reshape(-1, 2)[corners]
+            keys.append(corner_uv.reshape(len(corners), -1))
+
+        if mesh_hasnormals:
+            # smooth = vertex normal, non-smooth = face normal
+            vert_normal = np.empty(num_verts * 3, dtype=np.float32)
+            poly_normal = np.empty(num_polys * 3, dtype=np.float32)
+            poly_smooth = np.empty(num_polys, dtype=bool)
+            b_mesh.vertices.foreach_get("normal", vert_normal)
+            b_mesh.polygons.foreach_get("normal", poly_normal)
+            b_mesh.polygons.foreach_get("use_smooth", poly_smooth)
+            corner_normal = np.where(poly_smooth[corner_poly, None],
+                                     vert_normal.reshape(-1, 3)[corner_vert],
+                                     poly_normal.reshape(-1, 3)[corner_poly])
+            keys.append(corner_normal)
+
+        if mesh_hasvcol:
+            loop_col = np.empty(num_loops * 4, dtype=np.float32)
+            b_mesh.vertex_colors[0].data.foreach_get("color", loop_col)
+            corner_col = loop_col.reshape(-1, 4)[corners]
+            keys.append(corner_col)
+
+        # find (vert, uv-vert, normal, vcol) quads, numbered by their first occurrence
+        # identical corners always end up on the same vertex, so only the first corner of each is compared
+        keys = np.hstack(keys)
+        _, first, inverse = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+        order = np.argsort(first, kind="stable")
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        candidates = first[order]
+        merged = self.merge_face_corners(corner_vert[candidates], keys[candidates, 1:], NifOp.props.epsilon)
+        is_new = merged == np.arange(len(merged))
+        nif_index = np.cumsum(is_new) - 1
+        f_index = nif_index[merged][rank[inverse.reshape(-1)]]
+        unique_corners = candidates[is_new]
+
+        if len(unique_corners) > 65536:
+            raise io_scene_niftools.utils.logging.NifError("Too many vertices. Decimate your mesh and try again.")
+
+        unique_verts = corner_vert[unique_corners]
+        for nif_index, b_vert_index in enumerate(unique_verts.tolist()):
+            if vertmap[b_vert_index] is None:
+                vertmap[b_vert_index] = []
+            vertmap[b_vert_index].append(nif_index)
+
+        vertlist = vert_co[unique_verts].tolist()
+        normlist = corner_normal[unique_corners].tolist() if mesh_hasnormals else []
+        vcollist = corner_col[unique_corners].tolist() if mesh_hasvcol else []
+        uvlist = corner_uv[unique_corners].tolist() if mesh_uv_layers else []
+
+        # now add the (hopefully, convex) faces, in triangles
+        tri_counts = counts - 2
+        tri_first = np.repeat(offsets, tri_counts)
+        tri_step = np.arange(tri_counts.sum()) - np.repeat(np.cumsum(tri_counts) - tri_counts, tri_counts)
+        tri_a = f_index[tri_first]
+        tri_b = f_index[tri_first + 1 + tri_step]
+        tri_c = f_index[tri_first + 2 + tri_step]
+        if (b_obj.scale.x + b_obj.scale.y + b_obj.scale.z) > 0:
+            triangles = np.column_stack((tri_a, tri_b, tri_c))
+        else:
+            triangles = np.column_stack((tri_a, tri_c, tri_b))
+        trilist = [tuple(tri) for tri in triangles.tolist()]
+
+        # add body part number
+        polygons_without_bodypart = []
+        if bpy.context.scene.niftools_scene.game not in ('FALLOUT_3', 'SKYRIM') or not bodypartgroups:
+            bodypartfacemap = [0] * len(trilist)
+        else:
+            poly_part = np.zeros(len(polys), dtype=np.int64)
+            poly_assigned = np.zeros(len(polys), dtype=bool)
+            for bodypartname, bodypartindex, bodypartverts in bodypartgroups:
+                vert_in_part = np.zeros(num_verts, dtype=bool)
+                vert_in_part[list(bodypartverts)] = True
+                poly_in_part = np.logical_and.reduceat(vert_in_part[corner_vert], offsets) & ~poly_assigned
+                poly_part[poly_in_part] = bodypartindex
+                poly_assigned |= poly_in_part
+            tri_assigned = np.repeat(poly_assigned, tri_counts)
+            bodypartfacemap = np.repeat(poly_part, tri_counts)[tri_assigned].tolist()
+            # this signals an error
+            polygons_without_bodypart = [b_mesh.polygons[i] for i in np.repeat(polys, tri_counts)[~tri_assigned].tolist()]
+
+        return vertlist, normlist, vcollist, uvlist, trilist, bodypartfacemap, polygons_without_bodypart, vertmap
+
+    @staticmethod
+    def merge_face_corners(verts, data, epsilon):
+        """Merge face corners in order of first occurrence, like is_new_face_corner_data: each corner is merged into the
+        first earlier unmerged corner of the same vertex whose data differs by at most epsilon in every component.
+        Returns the index of the corner each corner is merged into, which is its own index if it starts a new vertex."""
+        merged = np.arange(len(verts))
+        if not data.shape[1]:
+            return merged
+        # sort by vertex, then by occurrence, so the corners of a vertex are neighbours
+        order = np.lexsort((merged, verts))
+        sorted_verts = verts[order]
+        # find the vertices which have corners within epsilon of each other, the others need no merging
+        near = np.zeros(len(verts), dtype=bool)
+        offset = 1
+        while offset < len(verts):
+            same_vert = sorted_verts[offset:] == sorted_verts[:-offset]
+            if not same_vert.any():
+                break
+            pairs = np.flatnonzero(same_vert)
+            close = np.all(np.abs(data[order[pairs + offset]] - data[order[pairs]]) <= epsilon, axis=1)
+            near[pairs[close]] = True
+            near[pairs[close] + offset] = True
+            offset += 1
+        if not near.any():
+            return merged
+        # greedy merge the few vertices that need it, in order of occurrence
+        starts = np.flatnonzero(np.r_[True, sorted_verts[1:] != sorted_verts[:-1]])
+        ends = np.r_[starts[1:], len(verts)]
+        for group in np.unique(np.searchsorted(starts, np.flatnonzero(near), side="right") - 1).tolist():
+            kept = []
+            for corner in order[starts[group]:ends[group]].tolist():
+                for kept_corner in kept:
+                    if np.all(np.abs(data[corner] - data[kept_corner]) <= epsilon):
+                        merged[corner] = kept_corner
+                        break
+                else:
+                    kept.append(corner)
+        return merged
+
+    def get_skin_weights(self, b_obj, b_mesh, bone_names):
+        """Read the bone weights of all vertices in a single pass over the mesh.
+
+        Returns the names of the bones influencing the mesh, in vertex group order, and a sparse table of
+        (vertex index, bone index, weight) arrays, where the weights of each vertex are normalized to sum to one.
+        Vertices without any weight are selected and raise an error.
+        """
+        group_bone = np.full(len(b_obj.vertex_groups), -1, dtype=np.int64)
+        bone_influences = []
+        for b_group in b_obj.vertex_groups:
+            if b_group.name in bone_names:
+                group_bone[b_group.index] = len(bone_influences)
+                bone_influences.append(b_group.name)
+
+        pairs = [(b_vert.index, g.group, g.weight) for b_vert in b_mesh.vertices for g in b_vert.groups]
+        verts, groups, weights = (np.array(column) for column in zip(*pairs)) if pairs else (np.zeros(0, dtype=np.int64), ) * 3
+
+        # vertices must be assigned to at least one vertex group
+        unweighted = np.flatnonzero(np.bincount(verts.astype(np.int64), minlength=len(b_mesh.vertices)) == 0)
+        self.select_unweighted_vertices(unweighted.tolist())
+
+        # keep the bone groups, and normalize over them
+        bones = group_bone[groups.astype(np.int64)]
+        is_bone = bones >= 0
+        verts, bones, weights = verts[is_bone].astype(np.int64), bones[is_bone], weights[is_bone].astype(np.float64)
+        norm = np.bincount(verts, weights, minlength=len(b_mesh.vertices))
+        has_norm = norm[verts] != 0
+        verts, bones, weights = verts[has_norm], bones[has_norm], weights[has_norm] / norm[verts[has_norm]]
+        return bone_influences, (verts, bones, weights)
+
+    @staticmethod
+    def get_vertmap_index(vertmap, num_vertices):
+        """Flatten the blender vertex -> nif vertices map into an array holding the blender vertex index of each
+        nif vertex, so per blender vertex data can be scattered to the trishape vertices as data[nif_to_b]."""
+        nif_to_b = np.full(num_vertices, -1, dtype=np.int64)
+        for b_vert_index, nif_indices in enumerate(vertmap):
+            if nif_indices:
+                nif_to_b[nif_indices] = b_vert_index
+        return nif_to_b
+
+    @staticmethod
+    def get_trishape_weights(skin_weights, nif_to_b, num_b_vertices):
+        """Map the bone weights of the blender mesh onto the vertices of one trishape.
+
+        Returns the bone names and, for each bone, a dict of trishape vertex index to weight.
+        """
+        bone_influences, (verts, bones, weights) = skin_weights
+        # a blender vertex can be split into several trishape vertices, which all get its weight
+        nif_order = np.argsort(nif_to_b, kind="stable")
+        counts = np.bincount(nif_to_b[nif_to_b >= 0], minlength=num_b_vertices)
+        starts = np.searchsorted(nif_to_b[nif_order], np.arange(num_b_vertices))
+        row_counts = counts[verts]
+        rows = np.repeat(np.arange(len(verts)), row_counts)
+        within = np.arange(len(rows)) - np.repeat(np.cumsum(row_counts) - row_counts, row_counts)
+        nif_verts = nif_order[starts[verts[rows]] + within]
+        row_bones = bones[rows]
+        row_weights = weights[rows]
+
+        bone_vertex_weights = [{} for _ in bone_influences]
+        for bone, nif_vert, weight in zip(row_bones.tolist(), nif_verts.tolist(), row_weights.tolist()):
+            bone_vertex_weights[bone][nif_vert] = weight
+        return bone_influences, bone_vertex_weights
+
     def get_bone_block(self, b_bone):
         """For a blender bone, return the corresponding nif node from the blocks that have already been exported"""
-        for n_block, b_obj in block_store.block_to_obj.items():
-            if isinstance(n_block, NifFormat.NiNode) and b_bone == b_obj:
-                return n_block
+        for n_block in block_store.get_blocks_for_obj(b_bone, NifFormat.NiNode):
+            return n_block
         raise io_scene_niftools.utils.logging.NifError(f"Bone '{b_bone.name}' not found.")
 
     def get_body_part_groups(self, b_obj, b_mesh):
@@ -508,12 +781,8 @@ class Mesh:
             skininst = block_store.create_block("BSDismemberSkinInstance", b_obj)
         else:
             skininst = block_store.create_block("NiSkinInstance", b_obj)
-        for block in block_store.block_to_obj:
-            if isinstance(block, NifFormat.NiNode):
-                if block.name.decode() == n_root_name:
-                    skininst.skeleton_root = block
-                    break
-        else:
+        skininst.skeleton_root = block_store.get_node_by_name(n_root_name)
+        if not skininst.skeleton_root:
             raise io_scene_niftools.utils.logging.NifError(f"Skeleton root '{n_root_name}' not found.")
 
         # create skinning data and link it
@@ -0,0 +1,366 @@
+"""Script to keep the exported trishapes of unchanged mesh objects in memory, for incremental re-export."""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2016, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the NIF File Format Library and Tools
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+
+import hashlib
+
+import bpy
+import numpy as np
+from pyffi.formats.nif import NifFormat
+from pyffi.object_models.xml.struct_ import StructBase
+
+from io_scene_niftools.modules.nif_export.block_registry import block_store
+from io_scene_niftools.utils.singleton import NifOp, NifData
+from io_scene_niftools.utils.logging import NifLog
+
+
+class TriShapeSnapshot:
+    """Private copy of the trishape subtrees exported for one mesh object: the trishapes with their data, properties,
+    skin and morph controllers, as they were right after export_tri_shapes, before any post-processing."""
+
+    def __init__(self, blocks, roots, interned, node_names):
+        # copied blocks in registration order
+        self.blocks = blocks
+        # the copied trishapes, children of the parent node
+        self.roots = roots
+        # copied blocks which were shared with other objects, and must be shared again when spliced -> intern keys
+        self.interned = interned
+        # nodes outside the subtree, such as bones and the skeleton root, linked from it -> their name
+        self.node_names = node_names
+
+
+class TriShapeCache:
+    """Cache of the exported trishapes of mesh objects, which lives for the whole blender session.
+
+    Each object is keyed by a hash of its evaluated mesh, materials, modifiers, transform, armature, shape keys,
+    niftools properties and the export settings. On a hit a fresh copy of the stored subtree is spliced into the
+    block graph instead of exporting the mesh again."""
+
+    # object name -> (key, snapshot)
+    entries = {}
+
+    # number of meshes reused and exported during the current export
+    hits = 0
+    misses = 0
+
+    # operator properties which do not change the exported blocks
+    IGNORED_SETTINGS = {"filepath", "filter_glob", "profile_path", "use_incremental_export", "force_full_export"}
+
+    # properties which only change the node editor or modifier panel layout
+    IGNORED_RNA = {"rna_type", "users", "use_fake_user", "is_evaluated", "original", "session_uid", "tag", "select",
+                   "location", "width", "height", "dimensions", "preview", "show_expanded", "is_active"}
+
+    @staticmethod
+    def clear():
+        TriShapeCache.entries.clear()
+        TriShapeCache.reset_stats()
+
+    @staticmethod
+    def reset_stats():
+        TriShapeCache.hits = 0
+        TriShapeCache.misses = 0
+
+    @staticmethod
+    def log_stats():
+        if TriShapeCache.hits or TriShapeCache.misses:
+            NifLog.info(f"Reused {TriShapeCache.hits} of {TriShapeCache.hits + TriShapeCache.misses} meshes "
+                        f"from the incremental export cache")
+
+    @staticmethod
+    def add_values(hasher, *values):
+        hasher.update(repr(values).encode())
+
+    @staticmethod
+    def add_array(hasher, collection, attribute, width=1, dtype=np.float32):
+        """Hash an attribute of all items of a blender collection, read in one go."""
+        values = np.empty(len(collection) * width, dtype=dtype)
+        collection.foreach_get(attribute, values)
+        TriShapeCache.add_values(hasher, attribute, len(values))
+        hasher.update(values.tobytes())
+
+    @staticmethod
+    def to_hashable(value):
+        if isinstance(value, (set, frozenset)):
+            return tuple(sorted(value))
+        if isinstance(value, bpy.types.ID):
+            return value.name_full, getattr(value, "filepath", None)
+        if hasattr(value, "__len__") and not isinstance(value, (str, bytes)):
+            return tuple(TriShapeCache.to_hashable(item) for item in value)
+        return value
+
+    @staticmethod
+    def add_rna(hasher, struct, depth=0):
+        """Hash the property values of a blender struct. Data-blocks are hashed by name, property groups and
+        collections are followed depth levels deep."""
+        if struct is None:
+            TriShapeCache.add_values(hasher, None)
+            return
+        if not hasattr(struct, "bl_rna"):
+            # operator properties of a headless export
+            TriShapeCache.add_values(hasher, sorted((name, TriShapeCache.to_hashable(value))
+                                                    for name, value in vars(struct).items()
+                                                    if name not in TriShapeCache.IGNORED_SETTINGS))
+            return
+        for prop in struct.bl_rna.properties:
+            name = prop.identifier
+            if name in TriShapeCache.IGNORED_RNA or name in TriShapeCache.IGNORED_SETTINGS:
+                continue
+            value = getattr(struct, name, None)
+            if prop.type == 'POINTER' and not isinstance(value, bpy.types.ID):
+                if depth and isinstance(value, bpy.types.PropertyGroup):
+                    TriShapeCache.add_rna(hasher, value, depth - 1)
+            elif prop.type == 'COLLECTION':
+                if depth:
+                    TriShapeCache.add_values(hasher, name, len(value))
+                    for item in value:
+                        TriShapeCache.add_rna(hasher, item, depth - 1)
+            else:
+                TriShapeCache.add_values(hasher, name, TriShapeCache.to_hashable(value))
+
+    @staticmethod
+    def add_mesh(hasher, b_mesh):
+        """Hash the geometry, uv and vertex color layers of the evaluated mesh."""
+        add_array = TriShapeCache.add_array
+        add_array(hasher, b_mesh.vertices, "co", 3)
+        add_array(hasher, b_mesh.vertices, "normal", 3)
+        add_array(hasher, b_mesh.loops, "vertex_index", dtype=np.int32)
+        add_array(hasher, b_mesh.polygons, "loop_start", dtype=np.int32)
+        add_array(hasher, b_mesh.polygons, "loop_total", dtype=np.int32)
+        add_array(hasher, b_mesh.polygons, "material_index", dtype=np.int32)
+        add_array(hasher, b_mesh.polygons, "use_smooth", dtype=bool)
+        add_array(hasher, b_mesh.polygons, "normal", 3)
+        for uv_layer in b_mesh.uv_layers:
+            add_array(hasher, uv_layer.data, "uv", 2)
+        for vertex_color in b_mesh.vertex_colors:
+            add_array(hasher, vertex_color.data, "color", 4)
+
+    @staticmethod
+    def add_materials(hasher, b_mesh):
+        """Hash the materials with their niftools properties, animation and shader nodes."""
+        for b_mat in b_mesh.materials:
+            TriShapeCache.add_rna(hasher, b_mat, depth=1)
+            if b_mat is None:
+                continue
+            TriShapeCache.add_action(hasher, b_mat)
+            if not b_mat.node_tree:
+                continue
+            TriShapeCache.add_action(hasher, b_mat.node_tree)
+            for b_node in b_mat.node_tree.nodes:
+                TriShapeCache.add_values(hasher, b_node.bl_idname, b_node.name)
+                TriShapeCache.add_rna(hasher, b_node)
+                for b_socket in b_node.inputs:
+                    TriShapeCache.add_values(hasher, b_socket.identifier,
+                                             TriShapeCache.to_hashable(getattr(b_socket, "default_value", None)))
+            TriShapeCache.add_values(hasher, [(link.from_node.name, link.from_socket.identifier,
+                                               link.to_node.name, link.to_socket.identifier)
+                                              for link in b_mat.node_tree.links])
+
+    @staticmethod
+    def add_skin(hasher, b_obj):
+        """Hash the vertex weights and the rest pose of the armature."""
+        TriShapeCache.add_values(hasher, [b_group.name for b_group in b_obj.vertex_groups])
+        if b_obj.vertex_groups:
+            TriShapeCache.add_values(hasher, [(b_group.group, b_group.weight)
+                                              for b_vert in b_obj.data.vertices for b_group in b_vert.groups])
+        b_armature = b_obj.find_armature() or (b_obj.parent if b_obj.parent and b_obj.parent.type == 'ARMATURE' else None)
+        if b_armature:
+            TriShapeCache.add_values(hasher, b_armature.name, TriShapeCache.to_hashable(b_armature.matrix_world))
+            TriShapeCache.add_rna(hasher, b_armature.data.niftools)
+            TriShapeCache.add_values(hasher, [(b_bone.name, b_bone.parent.name if b_bone.parent else None,
+                                               TriShapeCache.to_hashable(b_bone.matrix_local))
+                                              for b_bone in b_armature.data.bones])
+
+    @staticmethod
+    def add_shape_keys(hasher, b_obj):
+        """Hash the shape keys and their animation."""
+        b_key = b_obj.data.shape_keys
+        if not b_key:
+            return
+        TriShapeCache.add_values(hasher, b_key.use_relative)
+        for key_block in b_key.key_blocks:
+            TriShapeCache.add_values(hasher, key_block.name)
+            TriShapeCache.add_array(hasher, key_block.data, "co", 3)
+        TriShapeCache.add_action(hasher, b_key)
+
+    @staticmethod
+    def add_action(hasher, b_id):
+        """Hash the keyframes of the action animating a data-block."""
+        b_action = b_id.animation_data.action if b_id.animation_data else None
+        if not b_action:
+            TriShapeCache.add_values(hasher, None)
+            return
+        TriShapeCache.add_values(hasher, b_action.name, tuple(b_action.frame_range), bpy.context.scene.render.fps)
+        for fcu in b_action.fcurves:
+            TriShapeCache.add_values(hasher, fcu.data_path, fcu.array_index, fcu.extrapolation)
+            TriShapeCache.add_array(hasher, fcu.keyframe_points, "co", 2)
+            TriShapeCache.add_values(hasher, [key.interpolation for key in fcu.keyframe_points])
+
+    @staticmethod
+    def get_key(b_obj, b_mesh, n_parent, trishape_name):
+        """Hash everything export_tri_shapes reads to build the trishapes of b_obj."""
+        hasher = hashlib.sha256()
+        add_values = TriShapeCache.add_values
+        add_values(hasher, b_obj.name, trishape_name, type(n_parent).__name__, n_parent.name if n_parent else None)
+        add_values(hasher, TriShapeCache.to_hashable(b_obj.matrix_local), TriShapeCache.to_hashable(b_obj.matrix_world))
+        TriShapeCache.add_rna(hasher, b_obj.niftools)
+        for b_part in b_obj.niftools_part_flags:
+            TriShapeCache.add_rna(hasher, b_part)
+        for b_mod in b_obj.modifiers:
+            TriShapeCache.add_rna(hasher, b_mod)
+        TriShapeCache.add_mesh(hasher, b_mesh)
+        TriShapeCache.add_materials(hasher, b_mesh)
+        TriShapeCache.add_skin(hasher, b_obj)
+        TriShapeCache.add_shape_keys(hasher, b_obj)
+        # export settings
+        TriShapeCache.add_rna(hasher, bpy.context.scene.niftools_scene)
+        TriShapeCache.add_rna(hasher, NifOp.props)
+        add_values(hasher, NifData.data.version, NifData.data.user_version, NifData.data.user_version_2)
+        return hasher.hexdigest()
+
+    @staticmethod
+    def iter_links(value):
+        """Yield the Ref and Ptr instances of a block, following nested structs and arrays."""
+        if isinstance(value, NifFormat.Ref):
+            yield value
+        elif isinstance(value, list):
+            # arrays wrap their elements, iterate the raw items
+            for item in list.__iter__(value):
+                yield from TriShapeCache.iter_links(item)
+        elif isinstance(value, StructBase):
+            for attr in value._get_filtered_attribute_list():
+                if attr.type_._has_links:
+                    yield from TriShapeCache.iter_links(getattr(value, f"_{attr.name}_value_"))
+
+    @staticmethod
+    def copy_blocks(blocks, get_external):
+        """Copy blocks, relinking the copies to each other. Links to other blocks are replaced by get_external(block).
+        Returns a dict of block -> copy."""
+        copies = {block: type(block)().deepcopy(block) for block in blocks}
+        for n_copy in copies.values():
+            for link in TriShapeCache.iter_links(n_copy):
+                n_block = link.get_value()
+                if n_block is not None:
+                    link.set_value(copies[n_block] if n_block in copies else get_external(n_block))
+        return copies
+
+    @staticmethod
+    def get_subtree(roots):
+        """All blocks referenced by roots, recursively, including the roots."""
+        subtree = {}
+        stack = list(roots)
+        while stack:
+            n_block = stack.pop()
+            if n_block not in subtree:
+                subtree[n_block] = None
+                stack.extend(n_block.get_refs())
+        return subtree
+
+    @staticmethod
+    def store(b_obj, key, n_parent, new_blocks):
+        """Keep a copy of the blocks which export_tri_shapes created for b_obj.
+        Objects whose export also created or linked blocks outside their trishapes are not stored."""
+        TriShapeCache.misses += 1
+        roots = [n_block for n_block in new_blocks if isinstance(n_block, NifFormat.NiGeometry)]
+        if not roots or not n_parent or any(n_root not in n_parent.children for n_root in roots):
+            return
+        subtree = TriShapeCache.get_subtree(roots)
+        if any(n_block not in subtree for n_block in new_blocks):
+            # eg. a texture effect was inserted as parent of the trishapes
+            return
+        new_blocks = set(new_blocks)
+        if any(n_block not in new_blocks and not block_store.is_interned(n_block) for n_block in subtree):
+            return
+
+        node_names = {}
+
+        def get_external(n_block):
+            # only nodes which can be found again by name in the next export, such as bones
+            if not isinstance(n_block, NifFormat.NiNode) or block_store.get_node_by_name(n_block.name) is not n_block:
+                raise KeyError(n_block)
+            node_names[n_block] = n_block.name
+            return n_block
+
+        # keep export order, so the spliced blocks are registered in the same order
+        blocks = sorted(subtree, key=block_store.get_block_index)
+        try:
+            copies = TriShapeCache.copy_blocks(blocks, get_external)
+        except KeyError:
+            return
+        snapshot = TriShapeSnapshot(
+            blocks=[copies[n_block] for n_block in blocks],
+            roots=[copies[n_root] for n_root in roots],
+            interned={copies[n_block]: block_store.get_intern_keys(n_block)
+                      for n_block in subtree if block_store.is_interned(n_block)},
+            node_names=node_names)
+        TriShapeCache.entries[b_obj.name] = (key, snapshot)
+
+    @staticmethod
+    def splice(b_obj, key, n_parent):
+        """Add a copy of the stored trishapes of b_obj to n_parent, if b_obj did not change since it was stored.
+        Returns the last trishape, or None on a miss."""
+        key_snapshot = TriShapeCache.entries.get(b_obj.name)
+        if not key_snapshot or key_snapshot[0] != key:
+            return None
+        snapshot = key_snapshot[1]
+        nodes = {n_node: block_store.get_node_by_name(name) for n_node, name in snapshot.node_names.items()}
+        if not all(nodes.values()):
+            return None
+        copies = TriShapeCache.copy_blocks(snapshot.blocks, nodes.__getitem__)
+        # share properties and textures with the other exported objects again
+        shared = {}
+        for n_block in snapshot.blocks:
+            n_copy = copies[n_block]
+            if n_block in snapshot.interned:
+                key, get_key = snapshot.interned[n_block]
+                n_shared = block_store.intern_block(n_copy, b_obj, key=key, get_key=get_key)
+                if n_shared is not n_copy:
+                    shared[n_copy] = n_shared
+                    continue
+            else:
+                block_store.register_block(n_copy, b_obj)
+        if shared:
+            for n_copy in copies.values():
+                for link in TriShapeCache.iter_links(n_copy):
+                    if link.get_value() in shared:
+                        link.set_value(shared[link.get_value()])
+        for n_root in snapshot.roots:
+            n_parent.add_child(copies[n_root])
+        TriShapeCache.hits += 1
+        NifLog.info(f"Reused exported trishapes of {b_obj.name}")
+        return copies[snapshot.roots[-1]]
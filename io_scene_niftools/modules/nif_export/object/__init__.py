@@ -50,6 +50,7 @@ from io_scene_niftools.modules.nif_export.collision.havok import BhkCollision
 from io_scene_niftools.modules.nif_export.geometry.mesh import Mesh
 from io_scene_niftools.modules.nif_export.property.object import ObjectDataProperty
 from io_scene_niftools.modules.nif_export.block_registry import block_store
+from io_scene_niftools.nif_common import NifCommon
 from io_scene_niftools.utils import math
 from io_scene_niftools.utils.logging import NifLog
 
@@ -163,7 +164,9 @@ class Object:
         if b_obj.type not in self.export_types:
             return None
         if b_obj.type == 'MESH':
-            if self.export_collision(b_obj, n_parent):
+            with NifCommon.phase("collision"):
+                is_collision = self.export_collision(b_obj, n_parent)
+            if is_collision:
                 return
             else:
                 # -> mesh data.
@@ -176,7 +179,8 @@ class Object:
 
                 # If this has children or animations or more than one material it gets wrapped in a purpose made NiNode.
                 if not (b_action or b_obj.children or is_multimaterial or has_track):
-                    return self.mesh_helper.export_tri_shapes(b_obj, n_parent, b_obj.name)
+                    with NifCommon.phase("mesh"):
+                        return self.mesh_helper.export_tri_shapes(b_obj, n_parent, b_obj.name)
 
                 # set transform on trishapes rather than NiNodes for skinned meshes to fix an issue with clothing slots
                 if b_obj.parent and b_obj.parent.type == 'ARMATURE' and b_action:
@@ -198,11 +202,13 @@ class Object:
         math.set_object_matrix(b_obj, node)
 
         # export object animation
-        self.transform_anim.export_transforms(node, b_obj, b_action)
-        self.object_anim.export_visibility(node, b_action)
+        with NifCommon.phase("animation"):
+            self.transform_anim.export_transforms(node, b_obj, b_action)
+            self.object_anim.export_visibility(node, b_action)
         # if it is a mesh, export the mesh as trishape children of this ninode
         if b_obj.type == 'MESH':
-            return self.mesh_helper.export_tri_shapes(b_obj, node)
+            with NifCommon.phase("mesh"):
+                return self.mesh_helper.export_tri_shapes(b_obj, node)
         # if it is an armature, export the bones as ninode children of this ninode
         elif b_obj.type == 'ARMATURE':
             self.armaturehelper.export_bones(b_obj, node)
@@ -220,10 +226,9 @@ class Object:
             # special case: objects parented to armature bones - find the nif parent bone
             if b_parent.type == 'ARMATURE' and b_child.parent_bone != "":
                 parent_bone = b_parent.data.bones[b_child.parent_bone]
-                assert (parent_bone in block_store.block_to_obj.values())
-                for temp_parent, obj in block_store.block_to_obj.items():
-                    if obj == parent_bone:
-                        break
+                parent_blocks = block_store.get_blocks_for_obj(parent_bone)
+                assert parent_blocks
+                temp_parent = parent_blocks[0]
             self.export_node(b_child, temp_parent)
 
     def export_collision(self, b_obj, n_parent):
@@ -75,14 +75,10 @@ class ObjectProperty:
             # todo [property] refactor this
             # add textures
             if bpy.context.scene.niftools_scene.game == 'FALLOUT_3':
-                bsshader = self.bss_helper.export_bs_shader_property(b_mat)
-
-                block_store.register_block(bsshader)
+                bsshader = block_store.intern_block(self.bss_helper.export_bs_shader_property(b_mat))
                 n_block.add_property(bsshader)
             elif bpy.context.scene.niftools_scene.game == 'SKYRIM':
-                bsshader = self.bss_helper.export_bs_shader_property(b_mat)
-
-                block_store.register_block(bsshader)
+                bsshader = block_store.intern_block(self.bss_helper.export_bs_shader_property(b_mat))
                 # TODO [pyffi] Add helper function to allow adding bs_property / general list addition
                 n_block.bs_properties[0] = bsshader
                 n_block.bs_properties.update_size()
@@ -98,7 +94,6 @@ class ObjectProperty:
                     applymode=self.texture_helper.get_n_apply_mode_from_b_blend_type('MIX'),
                     b_mat=b_mat)
 
-                block_store.register_block(n_nitextureprop)
                 n_block.add_property(n_nitextureprop)
 
     def get_matching_block(self, block_type, **kwargs):
@@ -106,28 +101,12 @@ class ObjectProperty:
         # go over all blocks of block_type
 
         NifLog.debug(f"Looking for {block_type} block. Kwargs: {kwargs}")
-        for block in block_store.block_to_obj:
-            # if isinstance(block, block_type):
-            if block_type in str(type(block)):
-                # skip blocks that don't match additional conditions
-                for param, attribute in kwargs.items():
-                    # now skip this block if any of the conditions does not match
-                    if attribute is not None:
-                        ret_attr = getattr(block, param, None)
-                        if ret_attr != attribute:
-                            NifLog.debug(f"break, {param} != {attribute}, returns {ret_attr}")
-                            break
-                else:
-                    # we did not break out of the loop, so all checks went through, so we can use this block
-                    NifLog.debug(f"Found existing {block_type} block matching all criteria!")
-                    return block
-        # we are still here, so we must create a block of this type and set all attributes accordingly
-        NifLog.debug(f"Created new {block_type} block because none matched the required criteria!")
-        block = block_store.create_block(block_type)
-        for param, attribute in kwargs.items():
-            if attribute is not None:
-                setattr(block, param, attribute)
-        return block
+        # the block is identified by its type and the required attributes, parameters set to None are ignored
+        criteria = tuple((param, attribute) for param, attribute in sorted(kwargs.items()) if attribute is not None)
+        block = getattr(NifFormat, block_type)()
+        for param, attribute in criteria:
+            setattr(block, param, attribute)
+        return block_store.intern_block(block, key=criteria)
 
     def export_root_node_properties(self, n_root):
         """Wrapper for exporting properties that are commonly attached to the nif root"""
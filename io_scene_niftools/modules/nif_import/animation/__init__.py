@@ -37,6 +37,7 @@
 #
 # ***** END LICENSE BLOCK *****
 import bpy
+import numpy as np
 
 from pyffi.formats.nif import NifFormat
 
@@ -45,6 +46,9 @@ from io_scene_niftools.utils.logging import NifLog
 
 FPS = 30
 
+# values of the fcurve keyframe interpolation enum, as expected by foreach_set
+INTERPOLATION_MODES = {"CONSTANT": 0, "LINEAR": 1, "BEZIER": 2}
+
 
 class Animation:
 
@@ -146,6 +150,38 @@ class Animation:
         for fcurve, k in zip(fcurves, key):
             fcurve.keyframe_points.insert(frame, k).interpolation = interp
 
+    def add_keys(self, fcurves, times, keys, interp):
+        """
+        Add a sequence of keys (each len=n) at the given times to a set of fcurves (len=n) in one batch per fcurve.
+        Gives the same result as calling add_key for each key, including later keys replacing earlier keys
+        that round to the same frame.
+        """
+        if not len(times):
+            return
+        if any(fcurve.keyframe_points for fcurve in fcurves):
+            # merging into existing keys, let blender sort it out
+            for t, key in zip(times, keys):
+                self.add_key(fcurves, t, key, interp)
+            return
+        frames = np.array([round(t * animation.FPS) for t in times], dtype=np.float32)
+        values = np.array(keys, dtype=np.float32).reshape(len(frames), -1)
+        # keep only the last key per frame, sorted by frame
+        rev_frames = frames[::-1]
+        unique_frames, rev_index = np.unique(rev_frames, return_index=True)
+        index = len(frames) - 1 - rev_index
+        num_keys = len(unique_frames)
+        co = np.empty((num_keys, 2), dtype=np.float32)
+        co[:, 0] = unique_frames
+        interpolation = np.full(num_keys, INTERPOLATION_MODES[interp], dtype=np.int32)
+        for i, fcurve in enumerate(fcurves):
+            co[:, 1] = values[index, i]
+            fcurve.keyframe_points.add(num_keys)
+            # handles start on the key, update() recalculates the auto handles from there
+            for attr in ("co", "handle_left", "handle_right"):
+                fcurve.keyframe_points.foreach_set(attr, co.ravel())
+            fcurve.keyframe_points.foreach_set("interpolation", interpolation)
+            fcurve.update()
+
     # import animation groups
     def import_text_keys(self, n_block, b_action):
         """Gets and imports a NiTextKeyExtraData"""
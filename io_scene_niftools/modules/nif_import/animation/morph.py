@@ -38,7 +38,7 @@
 # ***** END LICENSE BLOCK *****
 
 import bpy
-import mathutils
+import numpy as np
 from pyffi.formats.nif import NifFormat
 
 from io_scene_niftools.modules.nif_import import animation
@@ -72,7 +72,10 @@ class MorphAnimation(Animation):
                 sk_basis = b_obj.shape_key_add(name=keyname)
 
                 # get base vectors and import all morphs
-                baseverts = morphData.morphs[0].vectors
+                base_coords = self.get_mesh_coords(b_mesh)
+                baseverts = self.get_vectors(morphData.morphs[0].vectors)
+                num_base = min(len(base_coords), len(baseverts))
+                base_coords[:num_base] = baseverts[:num_base]
 
                 shape_action = self.create_action(b_obj.data.shape_keys, b_obj.name + "-Morphs")
                 
@@ -83,9 +86,9 @@ class MorphAnimation(Animation):
                         keyname = f'Key {idxMorph}'
                     NifLog.info(f"Inserting key '{keyname}'")
                     # get vectors
-                    morph_verts = morphData.morphs[idxMorph].vectors
-                    self.morph_mesh(b_mesh, baseverts, morph_verts)
+                    morph_verts = self.get_vectors(morphData.morphs[idxMorph].vectors)
                     shape_key = b_obj.shape_key_add(name=keyname, from_mix=False)
+                    self.set_shape_key_coords(shape_key, base_coords, morph_verts)
 
                     # first find the keys
                     # older versions store keys in the morphData
@@ -106,42 +109,52 @@ class MorphAnimation(Animation):
                     fcu = self.create_fcurves(shape_action, "value", (0,), flags=n_morphCtrl.flags, keyname=shape_key.name)
                     
                     # set keyframes
-                    for key in morph_data.keys:
-                        self.add_key(fcu, key.time, (key.value,), interp)
+                    self.add_keys(fcu, [key.time for key in morph_data.keys],
+                                  [(key.value,) for key in morph_data.keys], interp)
 
     def import_egm_morphs(self, b_obj):
         """Import all EGM morphs as shape keys for blender object."""
         b_mesh = b_obj.data
-        sym_morphs = [list(morph.get_relative_vertices()) for morph in EGMData.data.sym_morphs]
-        asym_morphs = [list(morph.get_relative_vertices()) for morph in EGMData.data.asym_morphs]
+        n_morphs = list(EGMData.data.sym_morphs) + list(EGMData.data.asym_morphs)
+        num_sym = len(EGMData.data.sym_morphs)
+        morph_deltas = self.get_egm_deltas(n_morphs)
 
         # insert base key at frame 1, using absolute keys
         sk_basis = b_obj.shape_key_add(name="Basis")
         b_mesh.shape_keys.use_relative = False
 
-        # TODO: I'm not entirely sure that changing the morphs to f-strings won't
-        # TODO: break anything. They _shouldn't_.
-        morphs = ([(morph, f"EGM SYM {i}") for i, morph in enumerate(sym_morphs)] +
-                  [(morph, f"EGM ASYM {i}") for i, morph in enumerate(asym_morphs)])
-
-        base_verts = [v.co for v in b_mesh.vertices]
-        for morph_verts, key_name in morphs:
-            # convert tuples into vector here so we can simply add in morph_mesh()
-            for b_v_index, (bv, mv) in enumerate(zip(base_verts, morph_verts)):
-                b_mesh.vertices[b_v_index].co = bv + mathutils.Vector(mv)
-            # TODO [animation] unused variable is it required
+        base_coords = self.get_mesh_coords(b_mesh)
+        for i, deltas in enumerate(morph_deltas):
+            key_name = f"EGM SYM {i}" if i < num_sym else f"EGM ASYM {i - num_sym}"
             shape_key = b_obj.shape_key_add(name=key_name, from_mix=False)
-
-    def morph_mesh(self, b_mesh, baseverts, morphverts):
-        """Transform a mesh to be in the shape given by morphverts."""
-        # for each vertex calculate the key position from base
-        # pos + delta offset
-        # length check disabled
-        # as sometimes, oddly, the morph has more vertices...
-        # assert(len(baseverts) == len(morphverts))
-        for b_v_index, (bv, mv) in enumerate(zip(baseverts, morphverts)):
-            # pyffi vector3
-            v = bv + mv
-            # if applytransform:
-            # v *= transform
-            b_mesh.vertices[b_v_index].co = v.as_tuple()
+            self.set_shape_key_coords(shape_key, base_coords, deltas)
+
+    @staticmethod
+    def get_vectors(n_vectors):
+        """Return the pyffi vectors as an (N, 3) array."""
+        return np.array([(v.x, v.y, v.z) for v in n_vectors], dtype=np.float32).reshape(-1, 3)
+
+    @staticmethod
+    def get_egm_deltas(n_morphs):
+        """Decode the relative vertices of all egm morphs into one (M, N, 3) array."""
+        if not n_morphs:
+            return np.empty((0, 0, 3), dtype=np.float32)
+        scales = np.array([n_morph.scale for n_morph in n_morphs], dtype=np.float32)
+        vertices = np.array([[(v.x, v.y, v.z) for v in n_morph.vertices] for n_morph in n_morphs], dtype=np.float32)
+        return vertices.reshape(len(n_morphs), -1, 3) * scales[:, None, None]
+
+    @staticmethod
+    def get_mesh_coords(b_mesh):
+        """Return the vertex coordinates of the mesh as an (N, 3) array."""
+        coords = np.empty(len(b_mesh.vertices) * 3, dtype=np.float32)
+        b_mesh.vertices.foreach_get("co", coords)
+        return coords.reshape(-1, 3)
+
+    @staticmethod
+    def set_shape_key_coords(shape_key, base_coords, deltas):
+        """Write base_coords + deltas into the shape key in one go, the mesh vertices are left untouched.
+        Sometimes, oddly, the morph has more vertices than the mesh, those are ignored."""
+        coords = base_coords.copy()
+        num_vertices = min(len(coords), len(deltas))
+        coords[:num_vertices] += deltas[:num_vertices]
+        shape_key.data.foreach_set("co", coords.ravel())
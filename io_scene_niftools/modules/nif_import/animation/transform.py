@@ -38,6 +38,7 @@
 # ***** END LICENSE BLOCK *****
 
 import mathutils
+import numpy as np
 
 from functools import singledispatch
 from bisect import bisect_left
@@ -177,13 +178,13 @@ class TransformAnimation(Animation):
             # just do these temp steps to avoid generating empty fcurves down the line
             trans_temp = [mathutils.Vector(tup) for tup in n_kfc.get_translations()]
             if trans_temp:
-                translations = zip(times, trans_temp)
+                translations = list(zip(times, trans_temp))
             rot_temp = [mathutils.Quaternion(tup) for tup in n_kfc.get_rotations()]
             if rot_temp:
-                rotations = zip(times, rot_temp)
+                rotations = list(zip(times, rot_temp))
             scale_temp = list(n_kfc.get_scales())
             if scale_temp:
-                scales = zip(times, scale_temp)
+                scales = list(zip(times, scale_temp))
             # Bsplines are Bezier curves
             interp_rot = interp_loc = interp_scale = "BEZIER"
         else:
@@ -211,7 +212,7 @@ class TransformAnimation(Animation):
                     x_r = interpolate(times_all, times_x, [key.value for key in n_kfd.xyz_rotations[0].keys])
                     y_r = interpolate(times_all, times_y, [key.value for key in n_kfd.xyz_rotations[1].keys])
                     z_r = interpolate(times_all, times_z, [key.value for key in n_kfd.xyz_rotations[2].keys])
-                eulers = zip(times_all, zip(x_r, y_r, z_r))
+                eulers = list(zip(times_all, zip(x_r, y_r, z_r)))
             else:
                 b_obj.rotation_mode = "QUATERNION"
                 rotations = [(key.time, key.value) for key in n_kfd.quaternion_keys]
@@ -232,33 +233,35 @@ class TransformAnimation(Animation):
         if eulers:
             NifLog.debug('Rotation keys..(euler)')
             fcurves = self.create_fcurves(b_action, "rotation_euler", range(3), flags, bone_name)
-            for t, val in eulers:
-                key = mathutils.Euler(val)
-                if bone_name:
-                    key = math.import_keymat(n_bone_bind_rot_inv, key.to_matrix().to_4x4()).to_euler()
-                self.add_key(fcurves, t, key, interp_rot)
+            times = [t for t, val in eulers]
+            keys = np.array([val for t, val in eulers])
+            if bone_name:
+                keys = math.import_keymat_eulers(n_bone_bind_rot_inv, keys)
+            self.add_keys(fcurves, times, keys, interp_rot)
         elif rotations:
             NifLog.debug('Rotation keys...(quaternions)')
             fcurves = self.create_fcurves(b_action, "rotation_quaternion", range(4), flags, bone_name)
-            for t, val in rotations:
-                key = mathutils.Quaternion([val.w, val.x, val.y, val.z])
-                if bone_name:
-                    key = math.import_keymat(n_bone_bind_rot_inv, key.to_matrix().to_4x4()).to_quaternion()
-                self.add_key(fcurves, t, key, interp_rot)
+            times = [t for t, val in rotations]
+            keys = np.array([(val.w, val.x, val.y, val.z) for t, val in rotations])
+            if bone_name:
+                keys = math.import_keymat_quaternions(n_bone_bind_rot_inv, keys)
+            self.add_keys(fcurves, times, keys, interp_rot)
         if translations:
             NifLog.debug('Translation keys...')
             fcurves = self.create_fcurves(b_action, "location", range(3), flags, bone_name)
-            for t, val in translations:
-                key = mathutils.Vector([val.x, val.y, val.z])
-                if bone_name:
-                    key = math.import_keymat(n_bone_bind_rot_inv, mathutils.Matrix.Translation(key - n_bone_bind_trans)).to_translation()
-                self.add_key(fcurves, t, key, interp_loc)
+            times = [t for t, val in translations]
+            keys = np.array([(val.x, val.y, val.z) for t, val in translations])
+            if bone_name:
+                keys = math.import_keymat_translations(n_bone_bind_rot_inv, keys - np.array(n_bone_bind_trans))
+            self.add_keys(fcurves, times, keys, interp_loc)
         if scales:
             NifLog.debug('Scale keys...')
             fcurves = self.create_fcurves(b_action, "scale", range(3), flags, bone_name)
+            times, keys = [], []
             for t, val in scales:
-                key = (val, val, val)
-                self.add_key(fcurves, t, key, interp_scale)
+                times.append(t)
+                keys.append((val, val, val))
+            self.add_keys(fcurves, times, keys, interp_scale)
 
     def import_transforms(self, n_block, b_obj, bone_name=None):
         """Loads an animation attached to a nif block."""
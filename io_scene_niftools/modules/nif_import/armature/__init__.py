@@ -58,8 +58,11 @@ class Armature:
 
     def __init__(self):
         self.transform_anim = TransformAnimation()
-        # this is used to hold lists of bones for each armature during mark_armatures_bones
+        # this is used to hold the bones for each armature during mark_armatures_bones
+        # as an ordered set (dict with None values), to keep lookups O(1) and the node order deterministic
         self.dict_armatures = {}
+        # maps each bone to the armature root it was first marked for
+        self.bone_to_armature = {}
         # to get access to the nif bone in object mode
         self.name_to_block = {}
 
@@ -290,8 +293,7 @@ class Armature:
                     skelroot = ni_block
             else:
                 skelroot = ni_block
-            if skelroot not in self.dict_armatures:
-                self.dict_armatures[skelroot] = []
+            self.add_armature(skelroot)
             NifLog.info(f"Selecting node '{skelroot.name}' as skeleton root")
             # add bones
             self.populate_bone_tree(skelroot)
@@ -305,7 +307,7 @@ class Armature:
                 skelroot = ni_block
                 # raise nif_utils.NifError(f"nif has no armature '{b_armature_obj.name}'")
             NifLog.debug(f"Identified '{skelroot.name}' as armature")
-            self.dict_armatures[skelroot] = []
+            self.add_armature(skelroot)
             for bone_name in b_armature_obj.data.bones.keys():
                 # blender bone naming -> nif bone naming
                 nif_bone_name = block_store_export.get_bone_name_for_nif(bone_name)
@@ -314,7 +316,7 @@ class Armature:
                 # add it to the name list if there is a bone with that name
                 if bone_block:
                     NifLog.info(f"Identified nif block '{nif_bone_name}' with bone '{bone_name}' in selected armature")
-                    self.dict_armatures[skelroot].append(bone_block)
+                    self.add_bone(skelroot, bone_block)
                     self.complete_bone_tree(bone_block, skelroot)
 
         # search for all NiTriShape or NiTriStrips blocks...
@@ -328,8 +330,7 @@ class Armature:
                 skininst = ni_block.skin_instance
                 skelroot = skininst.skeleton_root
                 if NifOp.props.process == "EVERYTHING":
-                    if skelroot not in self.dict_armatures:
-                        self.dict_armatures[skelroot] = []
+                    if self.add_armature(skelroot):
                         NifLog.debug(f"'{skelroot.name}' is an armature")
                 elif NifOp.props.process == "GEOMETRY_ONLY":
                     if skelroot not in self.dict_armatures:
@@ -339,8 +340,7 @@ class Armature:
                     # boneBlock can be None; see pyffi issue #3114079
                     if not boneBlock:
                         continue
-                    if boneBlock not in self.dict_armatures[skelroot]:
-                        self.dict_armatures[skelroot].append(boneBlock)
+                    if self.add_bone(skelroot, boneBlock):
                         NifLog.debug(f"'{boneBlock.name}' is a bone of armature '{skelroot.name}'")
                     # now we "attach" the bone to the armature:
                     # we make sure all NiNodes from this bone all the way
@@ -365,8 +365,7 @@ class Armature:
             if isinstance(bone, NifFormat.NiLODNode):
                 # LOD nodes are never bones
                 continue
-            if bone not in self.dict_armatures[skelroot]:
-                self.dict_armatures[skelroot].append(bone)
+            if self.add_bone(skelroot, bone):
                 NifLog.debug(f"'{bone.name}' marked as extra bone of armature '{skelroot.name}'")
 
     def complete_bone_tree(self, bone, skelroot):
@@ -378,9 +377,8 @@ class Armature:
         boneparent = bone._parent
         if boneparent != skelroot:
             # parent is not the skeleton root
-            if boneparent not in self.dict_armatures[skelroot]:
-                # neither is it marked as a bone: so mark the parent as a bone
-                self.dict_armatures[skelroot].append(boneparent)
+            # if neither is it marked as a bone: so mark the parent as a bone
+            if self.add_bone(skelroot, boneparent):
                 # store the coordinates for realignement autodetection 
                 NifLog.debug(f"'{boneparent.name}' is a bone of armature '{skelroot.name}'")
             # now the parent is marked as a bone
@@ -388,12 +386,26 @@ class Armature:
             # this time starting from the parent bone
             self.complete_bone_tree(boneparent, skelroot)
 
+    def add_armature(self, skelroot):
+        """Marks skelroot as an armature root. Returns True if it was not marked yet."""
+        if skelroot in self.dict_armatures:
+            return False
+        self.dict_armatures[skelroot] = {}
+        return True
+
+    def add_bone(self, skelroot, bone):
+        """Marks bone as a bone of armature skelroot. Returns True if it was not marked for this armature yet."""
+        bones = self.dict_armatures[skelroot]
+        if bone in bones:
+            return False
+        bones[bone] = None
+        self.bone_to_armature.setdefault(bone, skelroot)
+        return True
+
     def is_bone(self, ni_block):
         """Tests a NiNode to see if it has been marked as a bone."""
         if ni_block:
-            for bones in self.dict_armatures.values():
-                if ni_block in bones:
-                    return True
+            return ni_block in self.bone_to_armature
 
     def is_armature_root(self, ni_block):
         """Tests a block to see if it's an armature."""
@@ -42,13 +42,15 @@ import mathutils
 import operator
 from functools import reduce, singledispatch
 
+import numpy as np
+
 from pyffi.formats.nif import NifFormat
-from pyffi.utils.quickhull import qhull3d
 
 from io_scene_niftools.modules.nif_import import collision
 from io_scene_niftools.modules.nif_import.collision import Collision
 from io_scene_niftools.modules.nif_import.object import Object
 from io_scene_niftools.utils import consts
+from io_scene_niftools.utils.hull import ConvexHull
 from io_scene_niftools.utils.singleton import NifData
 from io_scene_niftools.utils.logging import NifLog
 
@@ -269,7 +271,7 @@ class BhkCollision(Collision):
         # find vertices (and fix scale)
         scaled_verts = [(self.HAVOK_SCALE * n_vert.x, self.HAVOK_SCALE * n_vert.y, self.HAVOK_SCALE * n_vert.z)
                         for n_vert in bhk_shape.vertices]
-        verts, faces = qhull3d(scaled_verts)
+        verts, faces = ConvexHull.get_hull(scaled_verts)
 
         b_obj = Object.mesh_from_data("convexpoly", verts, faces)
         radius = bhk_shape.radius * self.HAVOK_SCALE
@@ -282,36 +284,35 @@ class BhkCollision(Collision):
 
         # create mesh for each sub shape
         hk_objects = []
-        vertex_offset = 0
         subshapes = bhk_shape.sub_shapes
 
         if not subshapes:
             # fallout 3 stores them in the data
             subshapes = bhk_shape.data.sub_shapes
 
+        n_data = bhk_shape.data
+        verts = np.array([(n_vert.x, n_vert.y, n_vert.z) for n_vert in n_data.vertices], dtype=np.float64).reshape(-1, 3)
+        verts *= self.HAVOK_SCALE
+        tris = np.array([(t.triangle.v_1, t.triangle.v_2, t.triangle.v_3) for t in n_data.triangles], dtype=np.int64).reshape(-1, 3)
+
+        # bucket the triangles by the sub shape that owns their first vertex, in a single pass
+        vertex_ends = np.cumsum([subshape.num_vertices for subshape in subshapes], dtype=np.int64)
+        vertex_starts = vertex_ends - [subshape.num_vertices for subshape in subshapes]
+        tri_subshapes = np.searchsorted(vertex_ends, tris[:, 0], side='right')
+        # triangles outside of all sub shapes are dropped, the stable sort keeps the file order within each bucket
+        order = np.argsort(tri_subshapes, kind='stable')
+        bucket_ends = np.searchsorted(tri_subshapes[order], np.arange(len(subshapes)), side='right')
+        bucket_starts = np.concatenate(([0], bucket_ends[:-1])).astype(np.int64)
+
         for subshape_num, subshape in enumerate(subshapes):
-            verts = []
-            faces = []
-            for vert_index in range(vertex_offset, vertex_offset + subshape.num_vertices):
-                n_vert = bhk_shape.data.vertices[vert_index]
-                verts.append((n_vert.x * self.HAVOK_SCALE,
-                              n_vert.y * self.HAVOK_SCALE,
-                              n_vert.z * self.HAVOK_SCALE))
-
-            for bhk_triangle in bhk_shape.data.triangles:
-                bhk_tri = bhk_triangle.triangle
-                if (vertex_offset <= bhk_tri.v_1) and (bhk_tri.v_1 < vertex_offset + subshape.num_vertices):
-                    faces.append((bhk_tri.v_1 - vertex_offset,
-                                  bhk_tri.v_2 - vertex_offset,
-                                  bhk_tri.v_3 - vertex_offset))
-                else:
-                    continue
-
-            b_obj = Object.mesh_from_data(f'poly{subshape_num:d}', verts, faces)
+            vertex_offset = vertex_starts[subshape_num]
+            sub_verts = verts[vertex_offset:vertex_ends[subshape_num]].tolist()
+            sub_faces = (tris[order[bucket_starts[subshape_num]:bucket_ends[subshape_num]]] - vertex_offset).tolist()
+
+            b_obj = Object.mesh_from_data(f'poly{subshape_num:d}', sub_verts, sub_faces)
             radius = min(vert.co.length for vert in b_obj.data.vertices)
             self.set_b_collider(b_obj, bounds_type="MESH", radius=radius, n_obj=subshape)
 
-            vertex_offset += subshape.num_vertices
             hk_objects.append(b_obj)
 
         return hk_objects
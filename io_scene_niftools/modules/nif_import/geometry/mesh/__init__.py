@@ -47,6 +47,7 @@ from io_scene_niftools.modules.nif_import.geometry import mesh
 from io_scene_niftools.modules.nif_import.geometry.vertex import Vertex
 from io_scene_niftools.modules.nif_import.property.material import Material
 from io_scene_niftools.modules.nif_import.property.geometry.mesh import MeshPropertyProcessor
+from io_scene_niftools.nif_common import NifCommon
 from io_scene_niftools.utils import math
 from io_scene_niftools.utils.singleton import NifOp
 from io_scene_niftools.utils.logging import NifLog
@@ -87,18 +88,22 @@ class Mesh:
         self.set_face_smooth(b_mesh, is_smooth)
 
         # store additional data layers
-        Vertex.map_uv_layer(b_mesh, n_tri_data)
-        Vertex.map_vertex_colors(b_mesh, n_tri_data)
-        Vertex.map_normals(b_mesh, n_tri_data)
+        loop_vertex_indices = Vertex.get_loop_vertex_indices(b_mesh)
+        Vertex.map_uv_layer(b_mesh, n_tri_data, loop_vertex_indices)
+        Vertex.map_vertex_colors(b_mesh, n_tri_data, loop_vertex_indices)
+        Vertex.map_normals(b_mesh, n_tri_data, loop_vertex_indices)
 
-        self.mesh_prop_processor.process_property_list(n_block, b_obj)
+        with NifCommon.phase("material"):
+            self.mesh_prop_processor.process_property_list(n_block, b_obj)
 
         # import skinning info, for meshes affected by bones
-        VertexGroup.import_skin(n_block, b_obj)
+        with NifCommon.phase("skin"):
+            VertexGroup.import_skin(n_block, b_obj)
 
         # import morph controller
         if NifOp.props.animation:
-            self.morph_anim.import_morph_controller(n_block, b_obj)
+            with NifCommon.phase("animation"):
+                self.morph_anim.import_morph_controller(n_block, b_obj)
 
         # todo [mesh] remove doubles here using blender operator
 
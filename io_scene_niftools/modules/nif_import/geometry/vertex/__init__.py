@@ -37,49 +37,59 @@
 #
 # ***** END LICENSE BLOCK *****
 
+import numpy as np
+
 from io_scene_niftools.utils.singleton import NifOp
 
 
 class Vertex:
 
     @staticmethod
-    def map_vertex_colors(b_mesh, n_tri_data):
+    def get_loop_vertex_indices(b_mesh):
+        """Get the vertex index of each loop, to gather the per vertex nif data into blender's per loop layers.
+        Compute this once per mesh and pass it to the map functions."""
+        loop_vertex_indices = np.empty(len(b_mesh.loops), dtype=np.int32)
+        b_mesh.loops.foreach_get("vertex_index", loop_vertex_indices)
+        return loop_vertex_indices
+
+    @staticmethod
+    def map_vertex_colors(b_mesh, n_tri_data, loop_vertex_indices=None):
         if n_tri_data.has_vertex_colors:
+            if loop_vertex_indices is None:
+                loop_vertex_indices = Vertex.get_loop_vertex_indices(b_mesh)
+            colors = np.array([(col.r, col.g, col.b, col.a) for col in n_tri_data.vertex_colors], dtype=np.float32)
             b_mesh.vertex_colors.new(name=f"RGBA")
-            b_mesh.vertex_colors[-1].data.foreach_set("color", [channel for col in [n_tri_data.vertex_colors[loop.vertex_index] for loop in b_mesh.loops] for channel in (col.r, col.g, col.b, col.a)])
+            b_mesh.vertex_colors[-1].data.foreach_set("color", colors[loop_vertex_indices].ravel())
 
     @staticmethod
-    def map_uv_layer(b_mesh, n_tri_data):
+    def map_uv_layer(b_mesh, n_tri_data, loop_vertex_indices=None):
         """ UV coordinates, NIF files only support 'sticky' UV coordinates, and duplicates vertices to emulate hard edges and UV seam.
             So whenever a hard edge or a UV seam is present the mesh, vertices are duplicated.
             Blender only must duplicate vertices for hard edges; duplicating for UV seams would introduce unnecessary hard edges."""
+        if loop_vertex_indices is None:
+            loop_vertex_indices = Vertex.get_loop_vertex_indices(b_mesh)
 
         # "sticky" UV coordinates: these are transformed in Blender UV's
         for uv_i, uv_set in enumerate(n_tri_data.uv_sets):
+            uvs = np.array([(uv.u, 1.0 - uv.v) for uv in uv_set], dtype=np.float32)
             b_mesh.uv_layers.new(name=f"UV{uv_i}")
-            b_mesh.uv_layers[-1].data.foreach_set("uv", [coord for uv in [uv_set[loop.vertex_index] for loop in b_mesh.loops] for coord in (uv.u, 1.0 - uv.v)])
+            b_mesh.uv_layers[-1].data.foreach_set("uv", uvs[loop_vertex_indices].ravel())
 
     @staticmethod
-    def map_normals(b_mesh, n_tri_data):
+    def map_normals(b_mesh, n_tri_data, loop_vertex_indices=None):
         """Import nif normals as custom normals."""
         if not n_tri_data.has_normals:
             return
         assert len(b_mesh.vertices) == len(n_tri_data.normals)
         # set normals
         if NifOp.props.use_custom_normals:
+            if loop_vertex_indices is None:
+                loop_vertex_indices = Vertex.get_loop_vertex_indices(b_mesh)
             # map normals so we can set them to the edge corners (stored per loop)
-            no_array = []
-            for face in b_mesh.polygons:
-                for vertex_index in face.vertices:
-                    # no_array.append(model.normals[vertex_index])
-                    # no_array.append(mathutils.Vector(n_tri_data.normals[vertex_index]).normalized())
-                    no_array.append(n_tri_data.normals[vertex_index].as_tuple())
-                    # no_array.append((0,0,1))
-                # no_array.append(model.tangents[vertex_index])
-                # face.use_smooth = True
+            normals = np.array([(n.x, n.y, n.z) for n in n_tri_data.normals], dtype=np.float32)
 
             b_mesh.use_auto_smooth = True
-            b_mesh.normals_split_custom_set(no_array)
+            b_mesh.normals_split_custom_set(normals[loop_vertex_indices])
 
     @staticmethod
     def get_uv_layer_name(uvset):
@@ -36,6 +36,7 @@
 # POSSIBILITY OF SUCH DAMAGE.
 #
 # ***** END LICENSE BLOCK *****
+import numpy as np
 from pyffi.formats.nif import NifFormat
 
 from io_scene_niftools.modules.nif_import.object.block_registry import block_store
@@ -45,6 +46,60 @@ from io_scene_niftools.utils.logging import NifLog
 class VertexGroup:
     """Class that maps weighted vertices to specific groups"""
 
+    @staticmethod
+    def skin_vertices(vertices, bone_indices, weights, bone_transforms):
+        """Linear blend skinning of vertices, using pyffi's row vector convention for the transforms.
+
+        :param vertices: (N, 3) vertex positions.
+        :param bone_indices: (N, K) index of the bone of each influence, pad with any bone and a zero weight.
+        :param weights: (N, K) weight of each influence.
+        :param bone_transforms: (B, 4, 4) transform of each bone.
+        :return: (N, 3) skinned vertex positions and (N,) sum of weights per vertex.
+        """
+        vertices = np.asarray(vertices, dtype=np.float64)
+        weights = np.asarray(weights, dtype=np.float64)
+        transforms = np.asarray(bone_transforms, dtype=np.float64)[np.asarray(bone_indices, dtype=np.int64)]
+        # v * M for each influence, then the weighted sum over the influences
+        transformed = np.einsum('ni,nkij->nkj', vertices, transforms[:, :, :3, :3]) + transforms[:, :, 3, :3]
+        return np.einsum('nk,nkj->nj', weights, transformed), weights.sum(axis=1)
+
+    @staticmethod
+    def get_bone_transforms(n_geom):
+        """Get the (B, 4, 4) skinning transform of each bone of a skinned geometry."""
+        skin_inst = n_geom.skin_instance
+        skin_data = skin_inst.data
+        skel_root = skin_inst.skeleton_root
+        skin_offset = skin_data.get_transform()
+        bone_transforms = []
+        for bone_block, bone_data in zip(skin_inst.bones, skin_data.bone_list):
+            transform = bone_data.get_transform() * bone_block.get_transform(skel_root) * skin_offset
+            bone_transforms.append(transform.as_list())
+        return np.array(bone_transforms, dtype=np.float64).reshape(-1, 4, 4)
+
+    @staticmethod
+    def get_skin_deformation_from_data(n_geom):
+        """Skin the vertices of a geometry with the weights of its NiSkinData, like pyffi's get_skin_deformation"""
+        # raises NifFormat.NifError on broken skins, like pyffi does
+        n_geom._validate_skin()
+        skin_data = n_geom.skin_instance.data
+        num_vertices = n_geom.data.num_vertices
+        # gather the sparse per bone weights into (N, K) arrays, padded with zero weights
+        vertex_bones = [[] for _ in range(num_vertices)]
+        vertex_weights = [[] for _ in range(num_vertices)]
+        for bone_index, bone_data in enumerate(skin_data.bone_list):
+            for skin_weight in bone_data.vertex_weights:
+                vertex_bones[skin_weight.index].append(bone_index)
+                vertex_weights[skin_weight.index].append(skin_weight.weight)
+        num_influences = max((len(bones) for bones in vertex_bones), default=0)
+        bone_indices = np.zeros((num_vertices, num_influences), dtype=np.int64)
+        weights = np.zeros((num_vertices, num_influences), dtype=np.float64)
+        for i, (bones, bone_weights) in enumerate(zip(vertex_bones, vertex_weights)):
+            bone_indices[i, :len(bones)] = bones
+            weights[i, :len(bone_weights)] = bone_weights
+
+        vertices = np.array([(v.x, v.y, v.z) for v in n_geom.data.vertices], dtype=np.float64).reshape(-1, 3)
+        return VertexGroup.skin_vertices(vertices, bone_indices, weights, VertexGroup.get_bone_transforms(n_geom))
+
     @staticmethod
     def get_skin_deformation_from_partition(n_geom):
         """ Workaround because pyffi does not support this skinning method """
@@ -53,48 +108,42 @@ class VertexGroup:
         #              so that NiGeometry.get_skin_deformation() deals with this as intended
 
         # mostly a copy from pyffi...
-        skin_inst = n_geom.skin_instance
-        skin_data = skin_inst.data
-        skin_partition = skin_inst.skin_partition
-        skel_root = skin_inst.skeleton_root
-        vertices = [NifFormat.Vector3() for _ in range(n_geom.data.num_vertices)]
+        skin_partition = n_geom.skin_instance.skin_partition
+        num_vertices = n_geom.data.num_vertices
+        old_vertices = np.array([(v.x, v.y, v.z) for v in n_geom.data.vertices], dtype=np.float64).reshape(-1, 3)
+        bone_transforms = VertexGroup.get_bone_transforms(n_geom)
 
         # ignore normals for now, not needed for import
-        sum_weights = [0.0 for _ in range(n_geom.data.num_vertices)]
-        skin_offset = skin_data.get_transform()
-
-        # store one transform per bone
-        bone_transforms = []
-        for i, bone_block in enumerate(skin_inst.bones):
-            bone_data = skin_data.bone_list[i]
-            bone_offset = bone_data.get_transform()
-            bone_matrix = bone_block.get_transform(skel_root)
-            transform = bone_offset * bone_matrix * skin_offset
-            bone_transforms.append(transform)
+        vertices = np.zeros((num_vertices, 3), dtype=np.float64)
+        sum_weights = np.zeros(num_vertices, dtype=np.float64)
 
         # now the actual unique bit
         for block in skin_partition.skin_partition_blocks:
-            # create all vgroups for this block's bones
-            block_bone_transforms = [bone_transforms[i] for i in block.bones]
+            if not block.num_vertices:
+                continue
+            vertex_map = np.array(block.vertex_map, dtype=np.int64)
+            # skip verts that were already processed in an earlier block
+            todo = sum_weights[vertex_map] == 0
+            # map the block's bone indices to the skin's bone indices, only use positive weights
+            block_bones = np.array(block.bones, dtype=np.int64)
+            bone_indices = block_bones[VertexGroup.get_partition_bone_indices(block)]
+            weights = np.array([list(weights) for weights in block.vertex_weights], dtype=np.float64)
+            weights[weights < 0] = 0
+            block_vertices, block_sums = VertexGroup.skin_vertices(
+                old_vertices[vertex_map[todo]], bone_indices[todo], weights[todo], bone_transforms)
+            vertices[vertex_map[todo]] = block_vertices
+            sum_weights[vertex_map[todo]] = block_sums
 
-            # go over each vert in this block
-            for vert_index, vertex_weights, bone_indices in zip(block.vertex_map, block.vertex_weights, block.bone_indices):
-                # skip verts that were already processed in an earlier block
-                if sum_weights[vert_index] != 0:
-                    continue
+        return vertices, sum_weights
 
-                # go over all 4 weight / bone pairs and transform this vert
-                for weight, b_i in zip(vertex_weights, bone_indices):
-                    if weight > 0:
-                        transform = block_bone_transforms[b_i]
-                        vertices[vert_index] += weight * (n_geom.data.vertices[vert_index] * transform)
-                        sum_weights[vert_index] += weight
-
-        for i, s in enumerate(sum_weights):
-            if abs(s - 1.0) > 0.01:
-                print(f"Vertex {i:d} has weights not summing to one: {sum_weights['i']:d}")
-
-        return vertices
+    @staticmethod
+    def get_partition_bone_indices(block):
+        """Get the (N, K) index into the bones of a skin partition block for each weight of its vertices. Blocks
+        without bone indices weight the vertices with the block's bones in order."""
+        shape = (block.num_vertices, block.num_weights_per_vertex)
+        if block.has_bone_indices:
+            return np.array([list(indices) for indices in block.bone_indices], dtype=np.int64).reshape(shape)
+        return np.broadcast_to(np.arange(block.num_weights_per_vertex, dtype=np.int64), shape)
 
     @staticmethod
     def apply_skin_deformation(n_data):
@@ -108,16 +157,34 @@ class VertexGroup:
             skininst = n_geom.skin_instance
             skindata = skininst.data
             if skindata.has_vertex_weights:
-                vertices = n_geom.get_skin_deformation()[0]
+                vertices, sum_weights = VertexGroup.get_skin_deformation_from_data(n_geom)
             else:
                 NifLog.info("PyFFI does not support this type of skinning, so here's a workaround...")
-                vertices = VertexGroup.get_skin_deformation_from_partition(n_geom)
+                vertices, sum_weights = VertexGroup.get_skin_deformation_from_partition(n_geom)
+
+            bad_weights = np.count_nonzero(np.abs(sum_weights - 1.0) > 0.01)
+            if bad_weights:
+                NifLog.warn(f"{bad_weights} vertices of {n_geom.name} have weights not summing to one")
 
             # finally we can actually set the data
-            for vold, vnew in zip(n_geom.data.vertices, vertices):
-                vold.x = vnew.x
-                vold.y = vnew.y
-                vold.z = vnew.z
+            for vold, (x, y, z) in zip(n_geom.data.vertices, vertices.tolist()):
+                vold.x = x
+                vold.y = y
+                vold.z = z
+
+    @staticmethod
+    def add_weights(b_obj, group_weights):
+        """Assign weights to vertex groups, with one add() call per distinct weight in each group.
+
+        :param group_weights: Maps group names to a dict of vertex index to weight.
+        """
+        for group_name, vertex_weights in group_weights.items():
+            v_group = b_obj.vertex_groups[group_name]
+            verts_by_weight = {}
+            for vert, weight in vertex_weights.items():
+                verts_by_weight.setdefault(weight, []).append(vert)
+            for weight, verts in verts_by_weight.items():
+                v_group.add(verts, weight, 'REPLACE')
 
     @staticmethod
     def import_skin(ni_block, b_obj):
@@ -126,6 +193,8 @@ class VertexGroup:
         if skininst:
             skindata = skininst.data
             bones = skininst.bones
+            # collect all weights first, later weights for the same vertex and group replace earlier ones
+            group_weights = {}
             # the usual case
             if skindata.has_vertex_weights:
                 bone_weights = skindata.bone_list
@@ -134,15 +203,13 @@ class VertexGroup:
                     if not n_bone:
                         continue
 
-                    vertex_weights = bone_weights[idx].vertex_weights
                     group_name = block_store.import_name(n_bone)
                     if group_name not in b_obj.vertex_groups:
-                        v_group = b_obj.vertex_groups.new(name=group_name)
+                        b_obj.vertex_groups.new(name=group_name)
 
-                    for skinWeight in vertex_weights:
-                        vert = skinWeight.index
-                        weight = skinWeight.weight
-                        v_group.add([vert], weight, 'REPLACE')
+                    vertex_weights = group_weights.setdefault(group_name, {})
+                    for skinWeight in bone_weights[idx].vertex_weights:
+                        vertex_weights[skinWeight.index] = skinWeight.weight
 
             # WLP2 - hides the weights in the partition
             else:
@@ -151,17 +218,20 @@ class VertexGroup:
                     # create all vgroups for this block's bones
                     block_bone_names = [block_store.import_name(bones[i]) for i in block.bones]
                     for group_name in block_bone_names:
-                        b_obj.vertex_groups.new(name=group_name)
+                        if group_name not in b_obj.vertex_groups:
+                            b_obj.vertex_groups.new(name=group_name)
+                    block_weights = [group_weights.setdefault(group_name, {}) for group_name in block_bone_names]
 
                     # go over each vert in this block
-                    for vert, vertex_weights, bone_indices in zip(block.vertex_map, block.vertex_weights, block.bone_indices):
+                    block_bone_indices = VertexGroup.get_partition_bone_indices(block).tolist()
+                    for vert, vertex_weights, bone_indices in zip(block.vertex_map, block.vertex_weights, block_bone_indices):
 
                         # assign this vert's 4 weights to its 4 vgroups (at max)
                         for w, b_i in zip(vertex_weights, bone_indices):
                             if w > 0:
-                                group_name = block_bone_names[b_i]
-                                v_group = b_obj.vertex_groups[group_name]
-                                v_group.add([vert], w, 'REPLACE')
+                                block_weights[b_i][vert] = w
+
+            VertexGroup.add_weights(b_obj, group_weights)
 
         # import body parts as vertex groups
         if isinstance(skininst, NifFormat.BSDismemberSkinInstance):
@@ -175,10 +245,11 @@ class VertexGroup:
 
                 # create vertex group if it did not exist yet
                 if group_name not in b_obj.vertex_groups:
-                    v_group = b_obj.vertex_groups.new(name=group_name)
+                    b_obj.vertex_groups.new(name=group_name)
                     skinpart_index = len(skinpart_list)
                     skinpart_list.append((skinpart_index, group_name))
                     bodypart_flag.append(bodypart.part_flag)
+                v_group = b_obj.vertex_groups[group_name]
 
                 # find vertex indices of this group
                 groupverts = [v_index for v_index in skinpartblock.vertex_map]
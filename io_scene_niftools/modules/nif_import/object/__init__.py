@@ -37,11 +37,14 @@
 #
 # ***** END LICENSE BLOCK *****
 
+import itertools
+
 import bpy
 from pyffi.formats.nif import NifFormat
 
 from io_scene_niftools.modules.nif_import.geometry.mesh import Mesh
 from io_scene_niftools.modules.nif_import.object.block_registry import block_store
+from io_scene_niftools.nif_common import NifCommon
 from io_scene_niftools.utils import math
 from io_scene_niftools.utils.singleton import NifOp
 from io_scene_niftools.utils.logging import NifLog
@@ -61,6 +64,8 @@ class Object:
 
     def __init__(self):
         self.mesh = Mesh()
+        # shape data -> (instance key, blender mesh), to link shapes sharing their data to one mesh
+        self.instanced_meshes = {}
 
     @staticmethod
     def create_b_obj(n_block, b_obj_data, name=""):
@@ -119,10 +124,11 @@ class Object:
         else:
             raise RuntimeError(f"Unexpected object type {b_obj.__class__:s}")
 
-    def create_mesh_object(self, n_block):
+    def create_mesh_object(self, n_block, b_mesh=None):
         ni_name = n_block.name.decode()
-        # create mesh data
-        b_mesh = bpy.data.meshes.new(ni_name)
+        # create mesh data, unless it is shared with another object
+        if b_mesh is None:
+            b_mesh = bpy.data.meshes.new(ni_name)
 
         # create mesh object and link to data
         b_obj = self.create_b_obj(n_block, b_mesh)
@@ -137,9 +143,25 @@ class Object:
 
     def import_geometry_object(self, b_armature, n_block):
         # it's a shape node and we're not importing skeleton only
-        b_obj = self.create_mesh_object(n_block)
+        instance_key = self.get_instance_key(n_block)
+        n_data = n_block.data
+        b_mesh = None
+        if instance_key is not None and n_data in self.instanced_meshes:
+            key, b_mesh = self.instanced_meshes[n_data]
+            if key != instance_key:
+                b_mesh = None
+        b_obj = self.create_mesh_object(n_block, b_mesh)
         b_obj.matrix_local = math.import_matrix(n_block)  # set transform matrix for the mesh
-        self.mesh.import_mesh(n_block, b_obj)
+        if b_mesh:
+            NifLog.info(f"Linking mesh {b_mesh.name} of shared shape data")
+            # the properties that end up on the object, rather than the mesh, are still needed
+            with NifCommon.phase("material"):
+                b_mat = b_mesh.materials[0] if b_mesh.materials else None
+                self.mesh.mesh_prop_processor.process_object_properties(n_block, b_obj, b_mat)
+        else:
+            self.mesh.import_mesh(n_block, b_obj)
+            if instance_key is not None and n_data not in self.instanced_meshes:
+                self.instanced_meshes[n_data] = (instance_key, b_obj.data)
         bpy.context.view_layer.objects.active = b_obj
         # store flags etc
         self.import_object_flags(n_block, b_obj)
@@ -148,6 +170,15 @@ class Object:
             self.append_armature_modifier(b_obj, b_armature)
         return b_obj
 
+    @staticmethod
+    def get_instance_key(n_block):
+        """Return the properties which end up in the blender mesh besides the shape data, shapes with the same data
+        and key can be linked to one mesh. Returns None for skinned and morphed shapes, which need a mesh of their own."""
+        if n_block.skin_instance or math.find_controller(n_block, NifFormat.NiGeomMorpherController):
+            return None
+        return tuple(id(n_prop) for n_prop in itertools.chain(n_block.properties, n_block.bs_properties)
+                     if n_prop is not None)
+
     # TODO [object][property] Replace with object level property processing
     @staticmethod
     def import_object_flags(n_block, b_obj):
@@ -38,6 +38,7 @@
 # ***** END LICENSE BLOCK *****
 
 import bpy
+from pyffi.formats.nif import NifFormat
 
 from functools import singledispatch
 import itertools
@@ -46,12 +47,20 @@ from io_scene_niftools.modules.nif_import.property.geometry.niproperty import Ni
 from io_scene_niftools.modules.nif_import.property.nodes_wrapper import NodesWrapper
 from io_scene_niftools.modules.nif_import.property.shader.bsshaderlightingproperty import BSShaderLightingPropertyProcessor
 from io_scene_niftools.modules.nif_import.property.shader.bsshaderproperty import BSShaderPropertyProcessor
+from io_scene_niftools.utils import math
 from io_scene_niftools.utils.logging import NifLog
 
 
 class MeshPropertyProcessor:
 
+    # properties which change the object rather than the material, processed for every object
+    OBJECT_PROPERTIES = (NifFormat.NiWireframeProperty, )
+
     def __init__(self):
+        # materials of this import, keyed on the identity of the property blocks and on their content
+        self.materials_by_id = {}
+        self.materials_by_hash = {}
+
         # get processor singletons
         self.nodes_wrapper = NodesWrapper()
         self.processors = (
@@ -75,6 +84,20 @@ class MeshPropertyProcessor:
         if not props:
             return
 
+        # reuse the material of an identical property set
+        id_key, get_hash_key = self.get_material_keys(n_block, b_mesh, props)
+        b_mat = self.materials_by_id.get(id_key)
+        if b_mat is None:
+            hash_key = get_hash_key()
+            b_mat = self.materials_by_hash.get(hash_key)
+            if b_mat is not None:
+                self.materials_by_id[id_key] = b_mat
+        if b_mat is not None:
+            NifLog.debug("Reused material %s", b_mat.name)
+            b_mesh.materials.append(b_mat)
+            self.process_object_properties(n_block, b_obj, b_mat)
+            return
+
         # just to avoid duped materials, a first pass, make sure a named material is created or retrieved
         for prop in props:
             if prop.name:
@@ -100,6 +123,26 @@ class MeshPropertyProcessor:
         b_mesh.materials.append(b_mat)
 
         # set the vars on every processor
+        self.set_processor_vars(n_block, b_obj, b_mesh, b_mat)
+
+        # run all processors
+        for prop in props:
+            NifLog.debug(f"{type(prop)} property found")
+            self.process_property(prop)
+
+        self.nodes_wrapper.connect_to_output(b_mesh.vertex_colors)
+        self.materials_by_id[id_key] = b_mat
+        self.materials_by_hash[hash_key] = b_mat
+
+    def process_object_properties(self, n_block, b_obj, b_mat=None):
+        """Process only the properties of n_block which change b_obj rather than its material, for objects whose
+        material or whole mesh is shared with an object that was imported before."""
+        self.set_processor_vars(n_block, b_obj, b_obj.data, b_mat)
+        for prop in itertools.chain(n_block.properties, n_block.bs_properties):
+            if isinstance(prop, self.OBJECT_PROPERTIES):
+                self.process_property(prop)
+
+    def set_processor_vars(self, n_block, b_obj, b_mesh, b_mat):
         for processor in self.processors:
             processor.n_block = n_block
             processor.b_obj = b_obj
@@ -107,12 +150,19 @@ class MeshPropertyProcessor:
             processor.b_mat = b_mat
             processor.nodes_wrapper = self.nodes_wrapper
 
-        # run all processors
-        for prop in props:
-            NifLog.debug(f"{type(prop)} property found")
-            self.process_property(prop)
+    @staticmethod
+    def get_material_keys(n_block, b_mesh, props):
+        """Return the keys of the material for props: a cheap one on block identity, and a function computing one on
+        block content. Besides the properties, the material depends on the vertex colors and the uv controller."""
+        n_uv_ctrl = math.find_controller(n_block, NifFormat.NiUVController)
+        has_vcol = bool(b_mesh.vertex_colors)
+        id_key = (tuple(id(prop) for prop in props), id(n_uv_ctrl), has_vcol)
 
-        self.nodes_wrapper.connect_to_output(b_mesh.vertex_colors)
+        def get_hash_key():
+            return (tuple((type(prop), prop.get_hash()) for prop in props),
+                    n_uv_ctrl.get_hash() if n_uv_ctrl else None, has_vcol)
+
+        return id_key, get_hash_key
 
     def process_property(self, prop):
         """Base method to warn user that this property is not supported"""
@@ -0,0 +1,155 @@
+"""This script contains a cached, case-insensitive index of texture search directories."""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2020, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the NIF File Format Library and Tools
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import os
+
+from io_scene_niftools.utils.logging import NifLog
+
+# alternate extensions to try when the referenced file is missing, in order of preference
+TEXTURE_EXTENSIONS = ('.dds', '.png', '.tga', '.bmp', '.jpg')
+
+
+class TextureIndex:
+    """Case-insensitive map of the texture search directories.
+
+    Directories are listed lazily, only those along the requested texture paths, and each one at most once. After
+    that textures are resolved with dictionary lookups instead of probing the file system. The index lives for the
+    whole Blender session; call :meth:`refresh` when files were added or removed.
+    """
+
+    def __init__(self):
+        # directory -> ({lower case name: absolute path of subdirectory}, {lower case name: absolute path of file},
+        #               {lower case name without extension: {extension: absolute path of file}})
+        self._dirs = {}
+        self.hits = 0
+        self.misses = 0
+
+    def refresh(self):
+        """Forget all listed directories, they will be listed again on the next lookup."""
+        self._dirs = {}
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def num_files(self):
+        return sum(len(files) for _, files, _ in self._dirs.values())
+
+    def _list(self, dirpath):
+        """List dirpath once and store its entries."""
+        listing = self._dirs.get(dirpath)
+        if listing is None:
+            subdirs = {}
+            files = {}
+            stems = {}
+            NifLog.debug(f"Indexing textures in {dirpath}")
+            try:
+                entries = sorted(os.scandir(dirpath), key=lambda entry: entry.name)
+            except OSError:
+                entries = []
+            for entry in entries:
+                name = entry.name.lower()
+                # keep the first match, like a case-insensitive file system would
+                if entry.is_dir():
+                    subdirs.setdefault(name, entry.path)
+                else:
+                    files.setdefault(name, entry.path)
+                    stem, ext = os.path.splitext(name)
+                    stems.setdefault(stem, {}).setdefault(ext, entry.path)
+            listing = self._dirs[dirpath] = subdirs, files, stems
+        return listing
+
+    def find(self, fn, texdir):
+        """Find texture file fn (a relative path, using os.sep) below texdir.
+
+        Alternate extensions are tried if the file itself does not exist.
+
+        :return: The absolute path of the texture, or None if it was not found.
+        """
+        root = os.path.abspath(texdir)
+        rel_path = os.path.normpath(fn).lower()
+        # a little trick, to satisfy many Morrowind mods: strip one of the two 'textures' from the path
+        if rel_path.startswith('textures' + os.sep) and root.lower().endswith(os.sep + 'textures'):
+            rel_path = rel_path[9:]
+
+        *dirnames, filename = rel_path.split(os.sep)
+        dirpath = root
+        for dirname in dirnames:
+            if dirname == os.curdir:
+                continue
+            dirpath = self._list(dirpath)[0].get(dirname)
+            if dirpath is None:
+                return None
+        _, files, stems = self._list(dirpath)
+
+        path = files.get(filename)
+        if path is None:
+            alternates = stems.get(os.path.splitext(filename)[0], {})
+            for ext in TEXTURE_EXTENSIONS:
+                if ext in alternates:
+                    path = alternates[ext]
+                    break
+        return path
+
+    def resolve(self, fn, search_path_list):
+        """Find texture file fn in the first search directory that contains it.
+
+        :return: The absolute path of the texture, or None if it was not found.
+        """
+        if os.path.isabs(fn):
+            # nothing to search for
+            path = fn if os.path.exists(fn) else None
+        else:
+            for texdir in search_path_list:
+                path = self.find(fn, texdir)
+                if path:
+                    break
+            else:
+                path = None
+        if path:
+            self.hits += 1
+        else:
+            self.misses += 1
+            NifLog.debug(f"Texture '{fn}' not found in {search_path_list}")
+        return path
+
+
+texture_index = TextureIndex()
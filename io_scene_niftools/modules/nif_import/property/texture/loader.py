@@ -37,14 +37,13 @@
 #
 # ***** END LICENSE BLOCK *****
 
-from functools import reduce
-import operator
 import os.path
 
 import bpy
 from pyffi.formats.nif import NifFormat
 
 from io_scene_niftools.modules.nif_import.property import texture
+from io_scene_niftools.modules.nif_import.property.texture.index import texture_index
 from io_scene_niftools.utils.singleton import NifOp
 from io_scene_niftools.utils.logging import NifLog
 
@@ -136,33 +135,10 @@ class TextureLoader:
         if art_index != -1:
             search_path_list.append(import_path[:art_index] + 'shared')
 
-        # go through all texture search paths
-        for texdir in search_path_list:
-            texdir = texdir.replace('\\', os.sep)
-            texdir = texdir.replace('/', os.sep)
-            # go through all possible file names, try alternate extensions too; for linux, also try lower case versions of filenames
-            texfns = reduce(operator.add,
-                            [[fn[:-4] + ext, fn[:-4].lower() + ext]
-                             for ext in ('.DDS', '.dds', '.PNG', '.png',
-                                         '.TGA', '.tga', '.BMP', '.bmp',
-                                         '.JPG', '.jpg')])
-
-            texfns = [fn, fn.lower()] + list(set(texfns))
-            for texfn in texfns:
-                # now a little trick, to satisfy many Morrowind mods
-                if texfn[:9].lower() == 'textures' + os.sep and texdir[-9:].lower() == os.sep + 'textures':
-                    # strip one of the two 'textures' from the path
-                    tex = os.path.join(texdir[:-9], texfn)
-                else:
-                    tex = os.path.join(texdir, texfn)
-
-                # "ignore case" on linuxW
-                tex = bpy.path.resolve_ncase(tex)
-                NifLog.debug(f"Searching {tex}")
-                if os.path.exists(tex):
-                    return self.load_image(tex)
-
-        else:
+        # go through all texture search paths, using the cached directory index
+        search_path_list = [texdir.replace('\\', os.sep).replace('/', os.sep) for texdir in search_path_list]
+        tex = texture_index.resolve(fn, search_path_list)
+        if not tex:
             tex = os.path.join(search_path_list[0], fn)
-        # probably not found, but load a dummy regardless
+        # probably not found if there is no match, but load a dummy regardless
         return self.load_image(tex)
@@ -37,6 +37,11 @@
 #
 # ***** END LICENSE BLOCK *****
 
+import cProfile
+from contextlib import contextmanager
+import functools
+import time
+
 import bpy
 import pyffi
 
@@ -52,6 +57,10 @@ class NifCommon:
 
     SELECTED_OBJECTS = []
 
+    # phase path, the names of the running phases -> [seconds, calls] of the current import or export, see phase()
+    PHASE_TIMES = {}
+    _phase_stack = []
+
     def __init__(self, operator, context):
         """Common initialization functions for executing the import/export operators: """
 
@@ -70,6 +79,65 @@ class NifCommon:
     @staticmethod
     def apply_scale(data, scale):
         NifLog.info(f"Scale Correction set to {scale}")
-        toaster = pyffi.spells.nif.NifToaster()
-        toaster.scale = scale
-        pyffi.spells.nif.fix.SpellScale(data=data, toaster=toaster).recurse()
\ No newline at end of file
+        with NifCommon.phase("scale spell"):
+            toaster = pyffi.spells.nif.NifToaster()
+            toaster.scale = scale
+            pyffi.spells.nif.fix.SpellScale(data=data, toaster=toaster).recurse()
+
+    @staticmethod
+    @contextmanager
+    def phase(name):
+        """Add the time spent in the with block to the named phase, eg. "mesh" or "write".
+        Nested phases are also counted in their parents, re-entering a running phase is not counted twice. A phase is
+        timed separately for each parent it runs in. The log buffer is reported to the operator at the end of each outermost phase."""
+        if name in NifCommon._phase_stack:
+            yield
+            return
+        NifCommon._phase_stack.append(name)
+        phase_time = NifCommon.PHASE_TIMES.setdefault(tuple(NifCommon._phase_stack), [0.0, 0])
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            phase_time[0] += time.perf_counter() - start
+            phase_time[1] += 1
+            NifCommon._phase_stack.pop()
+            if not NifCommon._phase_stack:
+                NifLog.flush()
+
+    @staticmethod
+    def log_phase_times():
+        if not NifCommon.PHASE_TIMES:
+            return
+        lines = [f"{'Phase':<24}{'Seconds':>10}{'Calls':>8}"]
+        # list each phase below its parent, in the order they first ran
+        order = {path: index for index, path in enumerate(NifCommon.PHASE_TIMES)}
+        for path in sorted(order, key=lambda path: [order[path[:depth]] for depth in range(1, len(path) + 1)]):
+            seconds, calls = NifCommon.PHASE_TIMES[path]
+            lines.append(f"{'  ' * (len(path) - 1) + path[-1]:<24}{seconds:>10.3f}{calls:>8}")
+        NifLog.info("Phase timings:\n" + "\n".join(lines))
+
+    @staticmethod
+    def profile_execute(execute):
+        """Decorator for execute(): times its phases, and runs it under cProfile when the profile path is set."""
+
+        @functools.wraps(execute)
+        def wrapper(self, *args, **kwargs):
+            NifCommon.PHASE_TIMES.clear()
+            NifCommon._phase_stack.clear()
+            profile_path = NifOp.props.profile_path
+            try:
+                if not profile_path:
+                    return execute(self, *args, **kwargs)
+                profile_path = bpy.path.abspath(profile_path)
+                profiler = cProfile.Profile()
+                try:
+                    return profiler.runcall(execute, self, *args, **kwargs)
+                finally:
+                    profiler.dump_stats(profile_path)
+                    NifLog.info(f"Wrote profile to {profile_path}")
+            finally:
+                NifCommon.log_phase_times()
+                NifLog.flush()
+
+        return wrapper
\ No newline at end of file
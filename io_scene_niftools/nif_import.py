@@ -37,12 +37,15 @@
 #
 # ***** END LICENSE BLOCK *****
 
+import glob
+import os
 
 import bpy
 import pyffi.spells.nif.fix
 from pyffi.formats.nif import NifFormat
 
 import io_scene_niftools.utils.logging
+from io_scene_niftools.file_io.loader import NifLoader
 from io_scene_niftools.file_io.nif import NifFile
 from io_scene_niftools.modules.nif_import.animation import Animation
 from io_scene_niftools.modules.nif_import.animation.object import ObjectAnimation
@@ -57,6 +60,7 @@ from io_scene_niftools.modules.nif_import.object import Object
 from io_scene_niftools.modules.nif_import.object.types import NiTypes
 from io_scene_niftools.modules.nif_import import scene
 from io_scene_niftools.modules.nif_import.property.object import ObjectProperty
+from io_scene_niftools.modules.nif_import.property.texture.index import texture_index
 
 from io_scene_niftools.nif_common import NifCommon
 from io_scene_niftools.utils import math
@@ -69,10 +73,94 @@ class NifImport(NifCommon):
     def __init__(self, operator, context):
         NifCommon.__init__(self, operator, context)
 
+    @NifCommon.profile_execute
     def execute(self):
         """Main import function."""
-        self.load_files()  # needs to be first to provide version info.
+        file_paths = self.get_file_paths()
+        if len(file_paths) > 1 or NifOp.props.batch_pattern:
+            return self.execute_batch(file_paths)
 
+        with self.phase("parse"):
+            self.load_files()  # needs to be first to provide version info.
+        texture_index.reset_stats()
+
+        # find and store this list now of selected objects as creating new objects adds them to the selection list
+        self.SELECTED_OBJECTS = bpy.context.selected_objects[:]
+
+        self.init_helpers()
+        if self.import_data() != {'FINISHED'}:
+            return {'CANCELLED'}
+
+        NifLog.info(f"Textures: {texture_index.hits} found, {texture_index.misses} missing")
+        NifLog.info("Finished")
+        return {'FINISHED'}
+
+    def execute_batch(self, file_paths):
+        """Import several files, each into its own collection.
+        The files are read in parallel, but their scene objects are created one file at a time.
+        Blender data such as materials and images, and the texture index are shared by all files."""
+        NifLog.info(f"Batch importing {len(file_paths)} files")
+        texture_index.reset_stats()
+        self.SELECTED_OBJECTS = bpy.context.selected_objects[:]
+        b_scene_collection = bpy.context.scene.collection
+
+        failed = []
+        # texture search and skeleton detection read the path of the file being imported
+        dialog_path = NifOp.props.filepath
+        for file_path, data, exception in NifLoader(NifOp.props.batch_workers).load(file_paths):
+            NifLog.info(f"Importing {file_path}")
+            try:
+                if exception:
+                    raise NifError(f"Could not read {file_path}: {exception}")
+                NifFile.check_version(data)
+            except NifError:
+                failed.append(file_path)
+                continue
+
+            NifData.init(data)
+            if NifOp.props.override_scene_info:
+                scene.import_version_info(data)
+
+            old_objects = set(b_scene_collection.objects.keys())
+            self.init_helpers()
+            NifOp.props.filepath = file_path
+            try:
+                result = self.import_data()
+            finally:
+                NifOp.props.filepath = dialog_path
+            if result != {'FINISHED'}:
+                failed.append(file_path)
+                continue
+
+            # move everything imported from this file into its own collection
+            b_collection = bpy.data.collections.new(os.path.splitext(os.path.basename(file_path))[0])
+            b_scene_collection.children.link(b_collection)
+            for b_obj in b_scene_collection.objects[:]:
+                if b_obj.name not in old_objects:
+                    b_collection.objects.link(b_obj)
+                    b_scene_collection.objects.unlink(b_obj)
+
+        NifLog.info(f"Textures: {texture_index.hits} found, {texture_index.misses} missing")
+        if failed:
+            NifLog.warn(f"Failed to import {len(failed)} of {len(file_paths)} files: {', '.join(failed)}")
+        NifLog.info("Finished")
+        return {'FINISHED'}
+
+    @staticmethod
+    def get_file_paths():
+        """Get the paths of all files to import: the selected files, and any files matching the batch pattern."""
+        dirname = os.path.dirname(NifOp.props.filepath)
+        file_paths = [os.path.join(dirname, file.name) for file in NifOp.props.files if file.name]
+        if NifOp.props.batch_pattern:
+            pattern = os.path.join(dirname, NifOp.props.batch_pattern)
+            file_paths.extend(sorted(glob.glob(pattern, recursive=True)))
+        elif not file_paths:
+            file_paths = [NifOp.props.filepath]
+        # skip duplicates but keep the order
+        return list(dict.fromkeys(os.path.normpath(file_path) for file_path in file_paths))
+
+    def init_helpers(self):
+        """Create the helpers that keep track of the blocks of the nif being imported."""
         self.armaturehelper = Armature()
         self.boundhelper = Bound()
         self.bhkhelper = BhkCollision()
@@ -81,9 +169,8 @@ class NifImport(NifCommon):
         self.object_anim = ObjectAnimation()
         self.transform_anim = TransformAnimation()
 
-        # find and store this list now of selected objects as creating new objects adds them to the selection list
-        self.SELECTED_OBJECTS = bpy.context.selected_objects[:]
-
+    def import_data(self):
+        """Import the roots of the loaded nif data into the scene."""
         # catch nif import errors
         try:
             # check that one armature is selected in 'import geometry + parent
@@ -105,7 +192,8 @@ class NifImport(NifCommon):
             if NifOp.props.send_detached_geoms_to_node_pos:
                 pyffi.spells.nif.fix.SpellSendDetachedGeometriesToNodePosition(data=NifData.data).recurse()
             if NifOp.props.apply_skin_deformation:
-                VertexGroup.apply_skin_deformation(NifData.data)
+                with self.phase("skin"):
+                    VertexGroup.apply_skin_deformation(NifData.data)
 
             # store scale correction
             bpy.context.scene.niftools_scene.scale_correction = NifOp.props.scale_correction
@@ -129,12 +217,12 @@ class NifImport(NifCommon):
 
                 # import this root block
                 NifLog.debug(f"Root block: {root.get_global_display()}")
-                self.import_root(root)
+                with self.phase("node tree"):
+                    self.import_root(root)
 
         except NifError:
             return {'CANCELLED'}
 
-        NifLog.info("Finished")
         return {'FINISHED'}
 
     def load_files(self):
@@ -211,9 +299,10 @@ class NifImport(NifCommon):
         if not n_block:
             return None
 
-        NifLog.info(f"Importing data for block '{n_block.name.decode()}'")
+        NifLog.debug("Importing data for block '%s'", n_block.name.decode())
         if isinstance(n_block, NifFormat.NiTriBasedGeom) and NifOp.props.process != "SKELETON_ONLY":
-            return self.objecthelper.import_geometry_object(b_armature, n_block)
+            with self.phase("mesh"):
+                return self.objecthelper.import_geometry_object(b_armature, n_block)
 
         elif isinstance(n_block, NifFormat.NiNode):
             # import object
@@ -254,8 +343,9 @@ class NifImport(NifCommon):
 
             # import collision objects & bounding box
             if NifOp.props.process != "SKELETON_ONLY":
-                b_children.extend(self.import_collision(n_block))
-                b_children.extend(self.boundhelper.import_bounding_box(n_block))
+                with self.phase("collision"):
+                    b_children.extend(self.import_collision(n_block))
+                    b_children.extend(self.boundhelper.import_bounding_box(n_block))
 
             # set bind pose for children
             self.objecthelper.set_object_bind(b_obj, b_children, b_armature)
@@ -273,8 +363,9 @@ class NifImport(NifCommon):
                 # import object level animations (non-skeletal)
                 if NifOp.props.animation:
                     # self.animationhelper.import_text_keys(n_block)
-                    self.transform_anim.import_transforms(n_block, b_obj)
-                    self.object_anim.import_visibility(n_block, b_obj)
+                    with self.phase("animation"):
+                        self.transform_anim.import_transforms(n_block, b_obj)
+                        self.object_anim.import_visibility(n_block, b_obj)
 
             return b_obj
 
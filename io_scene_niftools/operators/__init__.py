@@ -40,7 +40,7 @@
 
 import bpy
 from io_scene_niftools.utils.decorators import register_modules, unregister_modules
-from io_scene_niftools.operators import object, geometry, nif_import_op, nif_export_op, kf_import_op, egm_import_op, kf_export_op
+from io_scene_niftools.operators import object, geometry, texture, nif_import_op, nif_export_op, kf_import_op, egm_import_op, kf_export_op
 
 
 # noinspection PyUnusedLocal
@@ -59,7 +59,7 @@ def menu_func_export(self, context):
     self.layout.operator(kf_export_op.KfExportOperator.bl_idname, text="NetImmerse/Gamebryo (.kf)")
 
 
-MODS = [object, geometry, nif_import_op, nif_export_op, kf_import_op, kf_export_op, egm_import_op]
+MODS = [object, geometry, texture, nif_import_op, nif_export_op, kf_import_op, kf_export_op, egm_import_op]
 
 
 def register():
@@ -41,6 +41,7 @@ import bpy
 from bpy.types import Operator
 from bpy_extras.io_utils import ExportHelper
 
+from io_scene_niftools.modules.nif_export.collision.mopp import MoppCache
 from io_scene_niftools.nif_export import NifExport
 from io_scene_niftools.operators.common_op import CommonDevOperator, CommonNif, CommonScale
 from io_scene_niftools.utils.decorators import register_classes, unregister_classes
@@ -85,6 +86,13 @@ class NifExportOperator(Operator, ExportHelper, CommonDevOperator, CommonNif, Co
         default=True,
         options={'HIDDEN'})
 
+    # Split vertices with the per-loop reference algorithm instead of the vectorized one (for parity tests).
+    reference_vertex_split: bpy.props.BoolProperty(
+        name="Reference Vertex Split",
+        description="Split vertices with the slow per-loop reference algorithm.",
+        default=False,
+        options={'HIDDEN'})
+
     # Flatten skin.
     flatten_skin: bpy.props.BoolProperty(
         name="Flatten Skin",
@@ -128,6 +136,24 @@ class NifExportOperator(Operator, ExportHelper, CommonDevOperator, CommonNif, Co
         description="Remove duplicate materials",
         default=True)
 
+    # Reuse mopps of unchanged collisions from the on-disk cache.
+    use_mopp_cache: bpy.props.BoolProperty(
+        name="Cache Mopps",
+        description="Reuse generated mopps of unchanged collisions from an on-disk cache.",
+        default=True)
+
+    # Reuse the exported trishapes of mesh objects which did not change since the previous export.
+    use_incremental_export: bpy.props.BoolProperty(
+        name="Incremental Export",
+        description="Reuse the exported trishapes of mesh objects which did not change since the previous export in this session.",
+        default=False)
+
+    # Ignore the incremental export cache for this export.
+    force_full_export: bpy.props.BoolProperty(
+        name="Force Full Export",
+        description="Export all meshes again and refresh the incremental export cache.",
+        default=False)
+
     def draw(self, context):
         pass
 
@@ -140,8 +166,21 @@ class NifExportOperator(Operator, ExportHelper, CommonDevOperator, CommonNif, Co
         return NifExport(self, context).execute()
 
 
+class MoppCacheClearOperator(Operator):
+    """Remove all mopps from the on-disk cache"""
+    bl_idname = "export_scene.nif_clear_mopp_cache"
+    bl_label = "Clear Mopp Cache"
+
+    def execute(self, context):
+        mopp_cache = MoppCache()
+        count = mopp_cache.clear()
+        self.report({'INFO'}, f"Removed {count} mopps from {mopp_cache.directory}")
+        return {'FINISHED'}
+
+
 classes = [
-    NifExportOperator
+    NifExportOperator,
+    MoppCacheClearOperator
 ]
 
 
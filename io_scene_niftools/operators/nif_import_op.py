@@ -38,7 +38,7 @@
 # ***** END LICENSE BLOCK *****
 
 import bpy
-from bpy.types import Operator, Panel
+from bpy.types import Operator, Panel, PropertyGroup
 from bpy_extras.io_utils import ImportHelper
 
 from io_scene_niftools.nif_import import NifImport
@@ -112,6 +112,23 @@ class NifImportOperator(Operator, ImportHelper, CommonScale, CommonDevOperator,
         description="Merge vertices that have identical location and normal values.",
         default=False)
 
+    # Files selected in the file browser, more than one triggers a batch import.
+    files: bpy.props.CollectionProperty(type=PropertyGroup)
+
+    # Glob pattern for batch import of a directory tree.
+    batch_pattern: bpy.props.StringProperty(
+        name="Batch Pattern",
+        description="Import all files matching this pattern, relative to the folder of the selected file, "
+                    "eg. **/*.nif. Leave empty to import only the selected files.",
+        default="")
+
+    # Number of files read in parallel during batch import.
+    batch_workers: bpy.props.IntProperty(
+        name="Batch Workers",
+        description="Number of files read in parallel during batch import.",
+        default=4,
+        min=1, max=32)
+
     def draw(self, context):
         pass
 
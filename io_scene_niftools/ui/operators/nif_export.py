@@ -144,6 +144,13 @@ class OperatorExportOptimisePanel(OperatorSetting, Panel):
         layout.prop(operator, "stitch_strips")
         layout.prop(operator, "force_dds")
         layout.prop(operator, "optimise_materials")
+        row = layout.row(align=True)
+        row.prop(operator, "use_mopp_cache")
+        row.operator("export_scene.nif_clear_mopp_cache", text="", icon='TRASH')
+        layout.prop(operator, "use_incremental_export")
+        row = layout.row()
+        row.enabled = operator.use_incremental_export
+        row.prop(operator, "force_full_export")
 
 
 classes = [
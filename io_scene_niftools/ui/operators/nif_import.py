@@ -166,12 +166,38 @@ class OperatorImportAnimationPanel(OperatorSetting, Panel):
         layout.use_property_decorate = False  # No animation
 
 
+class OperatorImportBatchPanel(OperatorSetting, Panel):
+    bl_options = {'DEFAULT_CLOSED'}
+
+    bl_label = "Batch"
+    bl_idname = "NIFTOOLS_PT_import_operator_batch"
+
+    @classmethod
+    def poll(cls, context):
+        sfile = context.space_data
+        operator = sfile.active_operator
+
+        return operator.bl_idname == "IMPORT_SCENE_OT_nif"
+
+    def draw(self, context):
+        layout = self.layout
+        layout.use_property_split = True
+        layout.use_property_decorate = False  # No animation.
+
+        sfile = context.space_data
+        operator = sfile.active_operator
+
+        layout.prop(operator, "batch_pattern")
+        layout.prop(operator, "batch_workers")
+
+
 classes = [
     OperatorImportIncludePanel,
     OperatorImportTransformPanel,
     OperatorImportGeometryPanel,
     OperatorImportArmaturePanel,
-    OperatorImportAnimationPanel
+    OperatorImportAnimationPanel,
+    OperatorImportBatchPanel
 ]
 
 
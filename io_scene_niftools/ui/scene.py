@@ -65,6 +65,7 @@ class ScenePanel(SceneButtonsPanel, Panel):
         layout = self.layout
         row = layout.column()
         row.prop(nif_scene_props, "game")
+        row.operator("scene.niftools_texture_index_refresh", icon='FILE_REFRESH')
 
 
 class SceneVersionInfoPanel(SceneButtonsPanel, Panel):
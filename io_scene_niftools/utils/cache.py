@@ -0,0 +1,149 @@
+"""This module stores json values in a directory and evicts the least recently used ones"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2016, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the NIF File Format Library and Tools
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import hashlib
+import json
+import os
+import tempfile
+
+from io_scene_niftools.utils.logging import NifLog
+
+
+class DiskCache:
+    """Content addressed cache of json values, one file per key.
+
+    Every hit touches the entry, so the modification times order the entries by last use. When the
+    total size of the directory grows above max_size, the least recently used entries are removed.
+    """
+
+    SUFFIX = ".json"
+
+    def __init__(self, directory, max_size):
+        self.directory = directory
+        self.max_size = max_size
+
+    @staticmethod
+    def hash_key(*chunks):
+        """Get the key of the given bytes chunks."""
+        digest = hashlib.sha256()
+        for chunk in chunks:
+            # prefix the length so that different splits of the same bytes give different keys
+            digest.update(len(chunk).to_bytes(8, "little"))
+            digest.update(chunk)
+        return digest.hexdigest()
+
+    def get_path(self, key):
+        return os.path.join(self.directory, key + self.SUFFIX)
+
+    def get(self, key):
+        """Get the value stored for key, or None on a miss."""
+        path = self.get_path(key)
+        try:
+            with open(path, "r") as stream:
+                value = json.load(stream)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            NifLog.debug(f"Dropping unreadable cache entry {path}: {e}")
+            self.remove(path)
+            return None
+        # mark as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return value
+
+    def put(self, key, value):
+        """Store value for key, then evict entries if the cache grew too large."""
+        os.makedirs(self.directory, exist_ok=True)
+        # write to a temporary file first so readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as stream:
+                json.dump(value, stream)
+            os.replace(tmp_path, self.get_path(key))
+        except OSError:
+            self.remove(tmp_path)
+            raise
+        self.evict()
+
+    def get_entries(self):
+        """Get (modification time, size, path) of every entry, least recently used first."""
+        entries = []
+        try:
+            dir_entries = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return entries
+        for dir_entry in dir_entries:
+            if dir_entry.name.endswith(self.SUFFIX):
+                try:
+                    stat = dir_entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, dir_entry.path))
+        entries.sort()
+        return entries
+
+    def get_size(self):
+        return sum(size for _, size, _ in self.get_entries())
+
+    def evict(self):
+        """Remove the least recently used entries until the cache fits in max_size."""
+        entries = self.get_entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_size:
+                break
+            self.remove(path)
+            total -= size
+
+    def clear(self):
+        """Remove all entries, returns the number of removed entries."""
+        entries = self.get_entries()
+        for _, _, path in entries:
+            self.remove(path)
+        return len(entries)
+
+    @staticmethod
+    def remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
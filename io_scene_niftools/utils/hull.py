@@ -0,0 +1,209 @@
+"""This module computes convex hulls with a vectorized quickhull and memoizes them"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2016, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the NIF File Format Library and Tools
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+from collections import OrderedDict
+import hashlib
+
+import numpy as np
+
+
+def _plane(points, a, b, c):
+    """Unit normal and offset of the plane through points a, b, c, zero normal if degenerate."""
+    normal = np.cross(points[b] - points[a], points[c] - points[a])
+    length = np.linalg.norm(normal)
+    if length < 1e-12:
+        return np.zeros(3), 0.0
+    normal /= length
+    return normal, float(normal @ points[a])
+
+
+def _hull_2d(points, normal, precision):
+    """Indices of the convex hull of coplanar points, counter clockwise around normal (monotone chain)."""
+    # build a basis of the plane
+    u = np.cross(normal, (1.0, 0.0, 0.0) if abs(normal[0]) < 0.9 else (0.0, 1.0, 0.0))
+    u /= np.linalg.norm(u)
+    v = np.cross(normal, u)
+    coords = np.stack((points @ u, points @ v), axis=1)
+    order = np.lexsort((coords[:, 1], coords[:, 0]))
+
+    def cross(o, a, b):
+        return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+    def half_hull(indices):
+        chain = []
+        for i in indices:
+            while len(chain) >= 2 and cross(coords[chain[-2]], coords[chain[-1]], coords[i]) <= precision * np.linalg.norm(coords[i] - coords[chain[-2]]):
+                chain.pop()
+            chain.append(i)
+        return chain
+
+    lower = half_hull(order)
+    upper = half_hull(order[::-1])
+    return lower[:-1] + upper[:-1]
+
+
+def quickhull(vertices, precision=0.0001):
+    """Return the convex hull of vertices like pyffi's qhull3d: a list of the extreme vertices
+    and a list of triangles indexing into it, wound counter clockwise seen from the outside.
+    Distances below precision count as zero. Coplanar input gives a fan of triangles,
+    colinear or singular input gives no triangles."""
+    points = np.asarray(vertices, dtype=np.float64).reshape(-1, 3)
+    if not len(points):
+        return [], []
+
+    # find a simplex to start from, along the axis of largest extent
+    axis = np.argmax(points.max(axis=0) - points.min(axis=0))
+    i0, i1 = int(np.argmin(points[:, axis])), int(np.argmax(points[:, axis]))
+    direction = points[i1] - points[i0]
+    if np.linalg.norm(direction) <= precision:
+        return [tuple(points[i0].tolist())], []
+    direction /= np.linalg.norm(direction)
+    line_dists = np.linalg.norm(np.cross(points - points[i0], direction), axis=1)
+    i2 = int(np.argmax(line_dists))
+    if line_dists[i2] <= precision:
+        return [tuple(points[i0].tolist()), tuple(points[i1].tolist())], []
+    normal, offset = _plane(points, i0, i1, i2)
+    plane_dists = points @ normal - offset
+    i3 = int(np.argmax(np.abs(plane_dists)))
+    if abs(plane_dists[i3]) <= precision:
+        # coplanar
+        indices = _hull_2d(points, normal, precision)
+        return [tuple(v) for v in points[indices].tolist()], [(0, i + 1, i + 2) for i in range(len(indices) - 2)]
+
+    # the base simplex, with all faces pointing outwards
+    if plane_dists[i3] > 0:
+        i1, i2 = i2, i1
+    faces = {}
+    edge_faces = {}
+    outside = {}
+    all_points = np.arange(len(points))
+    next_id = 0
+
+    def add_face(a, b, c):
+        nonlocal next_id
+        face_id = next_id
+        next_id += 1
+        normal, offset = _plane(points, a, b, c)
+        faces[face_id] = (a, b, c, normal, offset)
+        for edge in ((a, b), (b, c), (c, a)):
+            edge_faces[edge] = face_id
+        return face_id
+
+    def assign(face_ids, candidates):
+        """Give each candidate point to the new face it is farthest outside of."""
+        if not len(candidates) or not face_ids:
+            return
+        normals = np.array([faces[f][3] for f in face_ids])
+        offsets = np.array([faces[f][4] for f in face_ids])
+        dists = points[candidates] @ normals.T - offsets
+        best = np.argmax(dists, axis=1)
+        is_outside = dists[np.arange(len(candidates)), best] > precision
+        for k, face_id in enumerate(face_ids):
+            face_points = candidates[is_outside & (best == k)]
+            if len(face_points):
+                outside[face_id] = face_points
+
+    simplex = [add_face(a, b, c) for a, b, c in ((i0, i1, i2), (i0, i3, i1), (i1, i3, i2), (i2, i3, i0))]
+    assign(simplex, all_points)
+
+    while outside:
+        face_id, candidates = next(iter(outside.items()))
+        a, b, c, normal, offset = faces[face_id]
+        pivot = int(candidates[np.argmax(points[candidates] @ normal - offset)])
+
+        # walk the faces that see the pivot, the horizon is the boundary of that region
+        visible = {face_id}
+        stack = [face_id]
+        horizon = []
+        while stack:
+            a, b, c = faces[stack.pop()][:3]
+            for edge in ((a, b), (b, c), (c, a)):
+                neighbour = edge_faces[edge[::-1]]
+                if neighbour in visible:
+                    continue
+                n_normal, n_offset = faces[neighbour][3:]
+                if points[pivot] @ n_normal - n_offset > precision:
+                    visible.add(neighbour)
+                    stack.append(neighbour)
+                else:
+                    horizon.append(edge)
+
+        # remove the visible faces, and close the hole with a cone from the horizon to the pivot
+        candidates = [outside.pop(f) for f in visible if f in outside]
+        candidates = np.concatenate(candidates) if candidates else np.empty(0, dtype=np.int64)
+        candidates = candidates[candidates != pivot]
+        for f in visible:
+            a, b, c = faces.pop(f)[:3]
+            for edge in ((a, b), (b, c), (c, a)):
+                if edge_faces.get(edge) == f:
+                    del edge_faces[edge]
+        cone = [add_face(a, b, pivot) for a, b in horizon]
+        assign(cone, candidates)
+
+    # remap the triangles to indices into the extreme vertices
+    triangles = np.array([face[:3] for face in faces.values()], dtype=np.int64)
+    hull_indices, triangles = np.unique(triangles, return_inverse=True)
+    return [tuple(v) for v in points[hull_indices].tolist()], [tuple(t) for t in triangles.reshape(-1, 3).tolist()]
+
+
+class ConvexHull:
+    """Memoizes convex hulls by the contents of their vertex buffer, as identical hulls repeat across files."""
+
+    MAX_ENTRIES = 1024
+    _hulls = OrderedDict()
+
+    @staticmethod
+    def get_hull(vertices, precision=0.0001):
+        """Return the extreme vertices and triangles of the convex hull of vertices, see quickhull."""
+        points = np.ascontiguousarray(vertices, dtype=np.float64).reshape(-1, 3)
+        key = hashlib.sha256(points.tobytes() + np.float64(precision).tobytes()).digest()
+        hull = ConvexHull._hulls.get(key)
+        if hull is None:
+            verts, triangles = quickhull(points, precision)
+            hull = (tuple(verts), tuple(triangles))
+            ConvexHull._hulls[key] = hull
+            if len(ConvexHull._hulls) > ConvexHull.MAX_ENTRIES:
+                ConvexHull._hulls.popitem(last=False)
+        else:
+            ConvexHull._hulls.move_to_end(key)
+        return list(hull[0]), list(hull[1])
+
+    @staticmethod
+    def clear():
+        ConvexHull._hulls.clear()
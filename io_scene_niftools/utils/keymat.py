@@ -0,0 +1,189 @@
+"""Batched space conversions of animation keys, on numpy arrays only."""
+
+# ***** BEGIN LICENSE BLOCK *****
+# 
+# Copyright © 2016, NIF File Format Library and Tools contributors.
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+# 
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+# 
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+# 
+#    * Neither the name of the NIF File Format Library and Tools
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import numpy as np
+
+
+def _rotation_3x3(matrix):
+    """Get the upper left 3x3 block of a matrix (mathutils, array or nested sequence) as a float array."""
+    return np.array(matrix, dtype=np.float64)[:3, :3]
+
+
+def quaternion_multiply(q1, q2):
+    """Hamilton product of (..., 4) w, x, y, z quaternion arrays, with broadcasting."""
+    w1, x1, y1, z1 = np.moveaxis(np.asarray(q1, dtype=np.float64), -1, 0)
+    w2, x2, y2, z2 = np.moveaxis(np.asarray(q2, dtype=np.float64), -1, 0)
+    return np.stack((w1 * w2 - x1 * x2 - y1 * y2 - z1 * z2,
+                     w1 * x2 + x1 * w2 + y1 * z2 - z1 * y2,
+                     w1 * y2 - x1 * z2 + y1 * w2 + z1 * x2,
+                     w1 * z2 + x1 * y2 - y1 * x2 + z1 * w2), axis=-1)
+
+
+def matrix_to_quaternion(matrix):
+    """Convert a single 3x3 rotation matrix to a w, x, y, z quaternion array."""
+    m = _rotation_3x3(matrix)
+    trace = m[0, 0] + m[1, 1] + m[2, 2]
+    if trace > 0.0:
+        s = 2.0 * np.sqrt(1.0 + trace)
+        q = (0.25 * s, (m[2, 1] - m[1, 2]) / s, (m[0, 2] - m[2, 0]) / s, (m[1, 0] - m[0, 1]) / s)
+    elif m[0, 0] > m[1, 1] and m[0, 0] > m[2, 2]:
+        s = 2.0 * np.sqrt(1.0 + m[0, 0] - m[1, 1] - m[2, 2])
+        q = ((m[2, 1] - m[1, 2]) / s, 0.25 * s, (m[0, 1] + m[1, 0]) / s, (m[0, 2] + m[2, 0]) / s)
+    elif m[1, 1] > m[2, 2]:
+        s = 2.0 * np.sqrt(1.0 + m[1, 1] - m[0, 0] - m[2, 2])
+        q = ((m[0, 2] - m[2, 0]) / s, (m[0, 1] + m[1, 0]) / s, 0.25 * s, (m[1, 2] + m[2, 1]) / s)
+    else:
+        s = 2.0 * np.sqrt(1.0 + m[2, 2] - m[0, 0] - m[1, 1])
+        q = ((m[1, 0] - m[0, 1]) / s, (m[0, 2] + m[2, 0]) / s, (m[1, 2] + m[2, 1]) / s, 0.25 * s)
+    q = np.array(q)
+    return q / np.linalg.norm(q)
+
+
+def eulers_to_matrices(eulers):
+    """Convert (N, 3) XYZ euler angles to (N, 3, 3) rotation matrices, like mathutils.Euler.to_matrix."""
+    eulers = np.asarray(eulers, dtype=np.float64).reshape(-1, 3)
+    cx, cy, cz = np.cos(eulers).T
+    sx, sy, sz = np.sin(eulers).T
+    return np.stack((np.stack((cy * cz, sx * sy * cz - cx * sz, cx * sy * cz + sx * sz), axis=-1),
+                     np.stack((cy * sz, sx * sy * sz + cx * cz, cx * sy * sz - sx * cz), axis=-1),
+                     np.stack((-sy, sx * cy, cx * cy), axis=-1)), axis=1)
+
+
+def _compatible_eulers(eulers, old_eulers):
+    """Shift eulers by full turns to be closest to old_eulers, like blender's compatible_eul."""
+    eulers = eulers.copy()
+    delta = eulers - old_eulers
+    # correct differences of about 360 degrees first
+    big = delta > 5.1
+    eulers[big] -= np.floor(delta[big] / (2 * np.pi) + 0.5) * 2 * np.pi
+    small = delta < -5.1
+    eulers[small] += np.floor(-delta[small] / (2 * np.pi) + 0.5) * 2 * np.pi
+    delta = eulers - old_eulers
+    # then flip any single axis that is still more than 180 degrees off while the others are close
+    abs_delta = np.abs(delta)
+    for axis in range(3):
+        others = [i for i in range(3) if i != axis]
+        flip = (abs_delta[:, axis] > 3.2) & np.all(abs_delta[:, others] < 1.6, axis=1)
+        eulers[flip, axis] -= np.copysign(2 * np.pi, delta[flip, axis])
+    return eulers
+
+
+def matrices_to_eulers(matrices, compat=None):
+    """Convert (N, 3, 3) rotation matrices to (N, 3) XYZ euler angles, like mathutils.Matrix.to_euler.
+    If compat eulers are given, each result is made compatible with (ie. closest to) its compat euler."""
+    m = np.asarray(matrices, dtype=np.float64).reshape(-1, 3, 3)
+    cy = np.hypot(m[:, 0, 0], m[:, 1, 0])
+    regular = cy > 16 * np.finfo(np.float32).eps
+    # the two possible solutions, they only differ away from gimbal lock
+    eul1 = np.where(regular[:, None],
+                    np.stack((np.arctan2(m[:, 2, 1], m[:, 2, 2]),
+                              np.arctan2(-m[:, 2, 0], cy),
+                              np.arctan2(m[:, 1, 0], m[:, 0, 0])), axis=-1),
+                    np.stack((np.arctan2(-m[:, 1, 2], m[:, 1, 1]),
+                              np.arctan2(-m[:, 2, 0], cy),
+                              np.zeros(len(m))), axis=-1))
+    eul2 = np.where(regular[:, None],
+                    np.stack((np.arctan2(-m[:, 2, 1], -m[:, 2, 2]),
+                              np.arctan2(-m[:, 2, 0], -cy),
+                              np.arctan2(-m[:, 1, 0], -m[:, 0, 0])), axis=-1),
+                    eul1)
+    if compat is None:
+        d1 = np.abs(eul1).sum(axis=1)
+        d2 = np.abs(eul2).sum(axis=1)
+    else:
+        compat = np.asarray(compat, dtype=np.float64).reshape(-1, 3)
+        eul1 = _compatible_eulers(eul1, compat)
+        eul2 = _compatible_eulers(eul2, compat)
+        d1 = np.abs(eul1 - compat).sum(axis=1)
+        d2 = np.abs(eul2 - compat).sum(axis=1)
+    return np.where((d1 > d2)[:, None], eul2, eul1)
+
+
+def _normalized(quaternions):
+    return quaternions / np.linalg.norm(quaternions, axis=-1, keepdims=True)
+
+
+def import_keymat_quaternions(correction, rest_rot_inv, quaternions):
+    """Batched math.import_keymat for (N, 4) w, x, y, z rotation keys, with the bone correction matrix."""
+    q_correction = matrix_to_quaternion(correction)
+    q_pre = quaternion_multiply(q_correction, matrix_to_quaternion(rest_rot_inv))
+    q_post = q_correction * (1, -1, -1, -1)
+    quaternions = np.asarray(quaternions, dtype=np.float64).reshape(-1, 4)
+    return _normalized(quaternion_multiply(quaternion_multiply(q_pre, quaternions), q_post))
+
+
+def import_keymat_eulers(correction, rest_rot_inv, eulers):
+    """Batched math.import_keymat for (N, 3) XYZ euler rotation keys, with the bone correction matrix."""
+    c = _rotation_3x3(correction)
+    return matrices_to_eulers(c @ _rotation_3x3(rest_rot_inv) @ eulers_to_matrices(eulers) @ c.T)
+
+
+def import_keymat_translations(correction, rest_rot_inv, translations):
+    """Batched math.import_keymat for (N, 3) translation keys, with the bone correction matrix."""
+    rot = _rotation_3x3(correction) @ _rotation_3x3(rest_rot_inv)
+    return np.asarray(translations, dtype=np.float64).reshape(-1, 3) @ rot.T
+
+
+def export_keymat_quaternions(correction, rest_rot, quaternions, bone):
+    """Batched math.export_keymat for (N, 4) w, x, y, z rotation keys, with the bone correction matrix."""
+    q_pre = matrix_to_quaternion(rest_rot)
+    quaternions = np.asarray(quaternions, dtype=np.float64).reshape(-1, 4)
+    if bone:
+        q_correction = matrix_to_quaternion(correction)
+        q_pre = quaternion_multiply(q_pre, q_correction * (1, -1, -1, -1))
+        quaternions = quaternion_multiply(quaternions, q_correction)
+    return _normalized(quaternion_multiply(q_pre, quaternions))
+
+
+def export_keymat_eulers(correction, rest_rot, eulers, bone):
+    """Batched math.export_keymat for (N, 3) XYZ euler rotation keys, with the bone correction matrix.
+    Each result is kept compatible with its input key."""
+    matrices = eulers_to_matrices(eulers)
+    if bone:
+        c = _rotation_3x3(correction)
+        matrices = c.T @ matrices @ c
+    return matrices_to_eulers(_rotation_3x3(rest_rot) @ matrices, compat=eulers)
+
+
+def export_keymat_translations(correction, rest_rot, translations, bone):
+    """Batched math.export_keymat for (N, 3) translation keys, with the bone correction matrix."""
+    rot = _rotation_3x3(rest_rot)
+    if bone:
+        rot = rot @ _rotation_3x3(correction).T
+    return np.asarray(translations, dtype=np.float64).reshape(-1, 3) @ rot.T
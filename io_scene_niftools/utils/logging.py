@@ -36,8 +36,10 @@
 # POSSIBILITY OF SUCH DAMAGE.
 #
 # ***** END LICENSE BLOCK *****
-import inspect
+import collections
+import itertools
 import logging
+import sys
 
 from io_scene_niftools.utils.consts import LOGGER_PYFFI, LOGGER_PLUGIN
 
@@ -50,52 +52,106 @@ class _MockOperator:
 
 
 class NifLog:
-    """A simple custom exception class for export errors. This module require initialisation of an operator reference to function."""  
-    
+    """A simple custom exception class for export errors. This module require initialisation of an operator reference to function.
+
+    Messages below the plugin log level are dropped before they are formatted. The others are logged straight away and
+    kept in a bounded ring buffer, which is reported to the operator in one go on flush(), ie. once per phase."""
+
     # Injectable operator reference used to perform reporting, default to simple logging
     op = _MockOperator()
 
+    # Messages below this level are dropped, set from the plugin log level by init()
+    level = logging.DEBUG
+
+    # Maximum number of messages kept in the buffer
+    BUFFER_SIZE = 10000
+
+    # Ring buffer of the most recent (level name, message) records, readable by tests and the command line
+    buffer = collections.deque(maxlen=BUFFER_SIZE)
+
+    # Number of records at the end of the buffer that have not been reported to the operator yet
+    _unreported = 0
+
+    _logger = logging.getLogger(LOGGER_PLUGIN)
+
+    @staticmethod
+    def is_enabled(level):
+        """Whether messages of the given logging level are kept, use to skip building expensive messages."""
+        return level >= NifLog.level
+
     @staticmethod
-    def debug(message):
-        """Report a debug message."""
-        NifLog.op.report({'DEBUG'}, str(message))
-        logging.getLogger("niftools").debug(str(message))
+    def _log(level, message, args):
+        if level < NifLog.level:
+            return
+        message = str(message) % args if args else str(message)
+        NifLog._logger.log(level, message)
+        NifLog.buffer.append((logging.getLevelName(level), message))
+        NifLog._unreported = min(NifLog._unreported + 1, NifLog.BUFFER_SIZE)
 
     @staticmethod
-    def info(message):
-        """Report an informative message."""
-        NifLog.op.report({'INFO'}, str(message))
-        logging.getLogger("niftools").info(str(message))
+    def debug(message, *args):
+        """Report a debug message, formatted with the % operator if args are given."""
+        NifLog._log(logging.DEBUG, message, args)
 
     @staticmethod
-    def warn(message):
-        """Report a warning message."""
-        NifLog.op.report({'WARNING'}, str(message))
-        logging.getLogger("niftools").warning(str(message))
+    def info(message, *args):
+        """Report an informative message, formatted with the % operator if args are given."""
+        NifLog._log(logging.INFO, message, args)
 
     @staticmethod
-    def error(message):
+    def warn(message, *args):
+        """Report a warning message, formatted with the % operator if args are given."""
+        NifLog._log(logging.WARNING, message, args)
+
+    @staticmethod
+    def error(message, *args):
         """Report an error and return ``{'FINISHED'}``. To be called by
         the :meth:`execute` method, as::
 
             return error('Something went wrong.')
 
         Blender will raise an exception that is passed to the caller.
+        Errors are reported to the operator immediately, together with any message still in the buffer.
 
         .. seealso::
 
             The :ref:`error reporting <dev-design-error-reporting>` design.
         """
-        NifLog.op.report({'ERROR'}, message)
-        logging.getLogger("niftools").error(str(message))
+        NifLog._log(logging.ERROR, message, args)
+        NifLog.flush()
         return {'FINISHED'}
-    
+
+    @staticmethod
+    def get_messages(level=logging.DEBUG):
+        """Return the buffered messages of at least the given logging level, oldest first."""
+        return [message for level_name, message in NifLog.buffer if logging.getLevelName(level_name) >= level]
+
+    @staticmethod
+    def flush():
+        """Report the messages logged since the last flush to the operator, one report per run of equal levels."""
+        if not NifLog._unreported:
+            return
+        records = list(NifLog.buffer)[-NifLog._unreported:]
+        NifLog._unreported = 0
+        for level_name, group in itertools.groupby(records, key=lambda record: record[0]):
+            # blender has no critical report type
+            report_level = 'ERROR' if level_name == 'CRITICAL' else level_name
+            NifLog.op.report({report_level}, "\n".join(message for _, message in group))
+
+    @staticmethod
+    def clear():
+        """Empty the buffer without reporting it."""
+        NifLog.buffer.clear()
+        NifLog._unreported = 0
+
     @staticmethod
     def init(operator):
         NifLog.op = operator
+        NifLog.clear()
 
         niftools_level_num = getattr(logging, operator.properties.plugin_log_level)
         logging.getLogger(LOGGER_PLUGIN).setLevel(niftools_level_num)
+        NifLog.level = niftools_level_num
 
         pyffi_level_num = getattr(logging, operator.properties.pyffi_log_level)
         logging.getLogger(LOGGER_PYFFI).setLevel(pyffi_level_num)
@@ -104,9 +160,10 @@ class NifLog:
 class NifError(Exception):
     """A simple custom exception class for export errors."""
     def __init__(self, msg):
-        caller = inspect.getframeinfo(inspect.stack()[1][0])
+        # the caller's frame only, inspect.stack() would build the context of every frame on the stack
+        caller = sys._getframe(1)
         NifLog.error(f"{msg:s}")
-        NifLog.error(f"{caller.filename:s}:{caller.lineno:d}")
+        NifLog.error(f"{caller.f_code.co_filename:s}:{caller.f_lineno:d}")
     pass
 
 
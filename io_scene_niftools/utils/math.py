@@ -41,6 +41,7 @@ from bpy_extras.io_utils import axis_conversion
 import mathutils
 from pyffi.formats.nif import NifFormat
 
+from io_scene_niftools.utils import keymat
 from io_scene_niftools.utils.logging import NifLog
 
 THETA_THRESHOLD_NEGY = 1.0e-9
@@ -80,6 +81,36 @@ def export_keymat(rest_rot, key_matrix, bone):
         return rest_rot @ key_matrix
 
 
+def import_keymat_quaternions(rest_rot_inv, quaternions):
+    """Batched import_keymat for (N, 4) w, x, y, z rotation keys."""
+    return keymat.import_keymat_quaternions(correction, rest_rot_inv, quaternions)
+
+
+def import_keymat_eulers(rest_rot_inv, eulers):
+    """Batched import_keymat for (N, 3) XYZ euler rotation keys."""
+    return keymat.import_keymat_eulers(correction, rest_rot_inv, eulers)
+
+
+def import_keymat_translations(rest_rot_inv, translations):
+    """Batched import_keymat for (N, 3) translation keys."""
+    return keymat.import_keymat_translations(correction, rest_rot_inv, translations)
+
+
+def export_keymat_quaternions(rest_rot, quaternions, bone):
+    """Batched export_keymat for (N, 4) w, x, y, z rotation keys."""
+    return keymat.export_keymat_quaternions(correction, rest_rot, quaternions, bone)
+
+
+def export_keymat_eulers(rest_rot, eulers, bone):
+    """Batched export_keymat for (N, 3) XYZ euler rotation keys, each kept compatible with its input key."""
+    return keymat.export_keymat_eulers(correction, rest_rot, eulers, bone)
+
+
+def export_keymat_translations(rest_rot, translations, bone):
+    """Batched export_keymat for (N, 3) translation keys."""
+    return keymat.export_keymat_translations(correction, rest_rot, translations, bone)
+
+
 def get_bind_matrix(bone):
     """Get a nif armature-space matrix from a blender bone. """
     bind = correction @ correction_inv @ bone.matrix_local @ correction
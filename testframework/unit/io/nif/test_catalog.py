@@ -0,0 +1,91 @@
+"""Unit testing that the nif catalog indexes headers incrementally"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2019, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the NIF File Format Library and Tools
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+
+import nose
+
+from concurrent.futures.process import BrokenProcessPool
+import os
+import shutil
+import tempfile
+import types
+
+from io_scene_niftools.file_io.catalog import NifCatalog
+
+
+class TestNifCatalog:
+
+    def setup(self):
+        self.root_dir = tempfile.mkdtemp()
+        working_dir = os.path.dirname(__file__)
+        shutil.copy(os.path.join(working_dir, "readable.nif"), self.root_dir)
+        shutil.copy(os.path.join(working_dir, "notnif.txt"), os.path.join(self.root_dir, "notnif.nif"))
+        self.catalog = NifCatalog(os.path.join(self.root_dir, "catalog.sqlite"), max_workers=1)
+
+    def teardown(self):
+        self.catalog.close()
+        shutil.rmtree(self.root_dir)
+
+    def test_update(self):
+        nose.tools.assert_equal(self.catalog.update(self.root_dir), (2, 0, 1))
+        readable = os.path.join(self.root_dir, "readable.nif")
+        nose.tools.assert_equal(self.catalog.find(version=335544325), [readable])
+        nose.tools.assert_true(self.catalog.get_block_types(readable))
+        nose.tools.assert_equal([path for path, _ in self.catalog.get_errors()], [os.path.join(self.root_dir, "notnif.nif")])
+
+    def test_update_incremental(self):
+        self.catalog.update(self.root_dir)
+        # only the file that could not be read is inspected again
+        nose.tools.assert_equal(self.catalog.update(self.root_dir), (1, 0, 1))
+        os.remove(os.path.join(self.root_dir, "notnif.nif"))
+        nose.tools.assert_equal(self.catalog.update(self.root_dir), (0, 1, 0))
+        nose.tools.assert_equal(self.catalog.get_errors(), [])
+
+    def test_update_broken_pool(self):
+        def map_broken(func, file_paths, header_only=False):
+            for file_path in file_paths:
+                yield file_path, None, BrokenProcessPool("A child process terminated abruptly")
+
+        loader = self.catalog.loader
+        self.catalog.loader = types.SimpleNamespace(map=map_broken)
+        nose.tools.assert_equal(self.catalog.update(self.root_dir), (2, 0, 2))
+        nose.tools.assert_equal(self.catalog.get_errors(), [])
+        # the files were not stored, so they are inspected by the next update
+        self.catalog.loader = loader
+        nose.tools.assert_equal(self.catalog.update(self.root_dir), (2, 0, 1))
@@ -0,0 +1,102 @@
+"""Tests for the mopp cache"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2019, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the NIF File Format Library and Tools
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import os
+import shutil
+import tempfile
+
+import nose
+import pyffi.utils.mopp
+from pyffi.formats.nif import NifFormat
+
+from io_scene_niftools.modules.nif_export.collision.mopp import MoppCache
+
+
+class TestMoppCache:
+    """Only mopps of havok's generator are cached, not pyffi's simple fallback mopp"""
+
+    def setup(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = MoppCache(self.directory)
+        self.mopper = pyffi.utils.mopp.getMopperCredits, pyffi.utils.mopp.getMopperOriginScaleCodeWelding
+        self.calls = 0
+
+    def teardown(self):
+        pyffi.utils.mopp.getMopperCredits, pyffi.utils.mopp.getMopperOriginScaleCodeWelding = self.mopper
+        shutil.rmtree(self.directory)
+
+    @staticmethod
+    def n_create_mopp():
+        n_shape = NifFormat.bhkPackedNiTriStripsShape()
+        n_shape.add_shape(triangles=[(0, 1, 2), (0, 2, 3)], normals=[(0, 0, 1), (0, 0, 1)],
+                          vertices=[(0, 0, 0), (1, 0, 0), (1, 1, 0), (0, 1, 0)])
+        n_mopp = NifFormat.bhkMoppBvTreeShape()
+        n_mopp.shape = n_shape
+        return n_mopp
+
+    def get_havok_mopp(self, vertices, triangles, material_indices=None):
+        self.calls += 1
+        return (0.5, 0.5, 0.5), 100.0, [1, 2, 3], [7] * len(triangles)
+
+    @staticmethod
+    def get_missing_mopper(*args):
+        raise OSError("mopper.exe not found")
+
+    def test_havok_mopp(self):
+        pyffi.utils.mopp.getMopperCredits = lambda: "Mopper"
+        pyffi.utils.mopp.getMopperOriginScaleCodeWelding = self.get_havok_mopp
+        for hit in (False, True):
+            n_mopp = self.n_create_mopp()
+            nose.tools.assert_equal(self.cache.update_mopp(n_mopp), hit)
+            nose.tools.assert_equal(list(n_mopp.mopp_data), [1, 2, 3])
+            nose.tools.assert_equal([hktri.welding_info for hktri in n_mopp.shape.data.triangles], [7, 7])
+        nose.tools.assert_equal(self.calls, 1)
+
+    def test_simple_mopp(self):
+        pyffi.utils.mopp.getMopperCredits = self.get_missing_mopper
+        pyffi.utils.mopp.getMopperOriginScaleCodeWelding = self.get_missing_mopper
+        n_mopp = self.n_create_mopp()
+        nose.tools.assert_false(self.cache.update_mopp(n_mopp))
+        nose.tools.assert_true(n_mopp.mopp_data_size)
+        nose.tools.assert_equal(os.listdir(self.directory), [])
+        # once the mopper works again, the mopp is generated by havok
+        pyffi.utils.mopp.getMopperCredits = lambda: "Mopper"
+        pyffi.utils.mopp.getMopperOriginScaleCodeWelding = self.get_havok_mopp
+        nose.tools.assert_false(self.cache.update_mopp(self.n_create_mopp()))
+        nose.tools.assert_equal(self.calls, 1)
@@ -0,0 +1,125 @@
+"""Tests the vectorized face corner splitting against the per loop reference"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2019, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the NIF File Format Library and Tools
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import types
+
+import bpy
+import nose
+import numpy as np
+
+from io_scene_niftools.modules.nif_export.geometry.mesh import Mesh
+from io_scene_niftools.utils.singleton import NifOp
+
+
+class TestGeomData:
+    """Compares get_geom_data with get_geom_data_reference on a grid with seams, flat and smooth faces, two uv layers
+    and vertex colors, including face corner data that differs by about epsilon"""
+
+    EPSILON = 0.005
+
+    def setup(self):
+        self.props = NifOp.props
+        NifOp.props = types.SimpleNamespace(epsilon=self.EPSILON)
+        bpy.context.scene.niftools_scene.game = 'OBLIVION'
+        self.mesh = Mesh()
+        self.b_obj = types.SimpleNamespace(scale=types.SimpleNamespace(x=1.0, y=1.0, z=1.0))
+        self.b_mesh = self.b_create_mesh()
+
+    def teardown(self):
+        NifOp.props = self.props
+        bpy.data.meshes.remove(self.b_mesh)
+
+    def b_create_mesh(self, size=4):
+        rng = np.random.default_rng(0)
+        verts = [(x, y, rng.uniform(-0.2, 0.2)) for y in range(size + 1) for x in range(size + 1)]
+        faces = [(y * (size + 1) + x, y * (size + 1) + x + 1, (y + 1) * (size + 1) + x + 1, (y + 1) * (size + 1) + x)
+                 for y in range(size) for x in range(size)]
+        b_mesh = bpy.data.meshes.new("TestGeomData")
+        b_mesh.from_pydata(verts, [], faces)
+        b_mesh.update()
+        num_polys = len(b_mesh.polygons)
+        num_loops = len(b_mesh.loops)
+        b_mesh.polygons.foreach_set("use_smooth", rng.random(num_polys) < 0.5)
+        b_mesh.polygons.foreach_set("material_index", rng.integers(2, size=num_polys).astype(np.int32))
+
+        loop_vert = np.empty(num_loops, dtype=np.int32)
+        b_mesh.loops.foreach_get("vertex_index", loop_vert)
+        loop_poly = np.repeat(np.arange(num_polys), 4)
+        for layer in range(2):
+            # uvs per vertex, with a seam along one column of faces, and jitter around epsilon
+            uv = np.array(verts)[loop_vert, :2] / size
+            uv[loop_poly % size == 1, 0] += 0.5
+            uv += rng.uniform(-self.EPSILON, self.EPSILON, size=uv.shape)
+            b_mesh.uv_layers.new(name=f"UVMap{layer}").data.foreach_set("uv", uv.ravel())
+        # colors per face, so every vertex has several, and some that only differ by about epsilon
+        col = np.repeat(rng.random((num_polys, 4)), 4, axis=0)
+        col[::3] = col[0] + rng.uniform(-self.EPSILON, self.EPSILON, size=col[::3].shape)
+        b_mesh.vertex_colors.new().data.foreach_set("color", np.clip(col, 0.0, 1.0).ravel())
+        return b_mesh
+
+    def assert_same_geom_data(self, b_mat, material_index, mesh_hasnormals, mesh_hasvcol):
+        args = (self.b_obj, self.b_mesh, b_mat, material_index, mesh_hasnormals, mesh_hasvcol, [])
+        reference = self.mesh.get_geom_data_reference(*args)
+        vertlist, normlist, vcollist, uvlist, trilist, bodypartfacemap, polygons_without_bodypart, vertmap = \
+            self.mesh.get_geom_data(*args)
+        nose.tools.assert_true(np.allclose(vertlist, [tuple(v) for v in reference[0]]))
+        nose.tools.assert_true(np.allclose(normlist, [tuple(n) for n in reference[1]]))
+        nose.tools.assert_true(np.allclose(vcollist, reference[2]))
+        nose.tools.assert_true(np.allclose(uvlist, [[tuple(uv) for uv in uvs] for uvs in reference[3]]))
+        nose.tools.assert_equal(trilist, [tuple(tri) for tri in reference[4]])
+        nose.tools.assert_equal(bodypartfacemap, reference[5])
+        nose.tools.assert_equal(polygons_without_bodypart, reference[6])
+        nose.tools.assert_equal(vertmap, reference[7])
+
+    def test_geom_data(self):
+        for mesh_hasnormals in (True, False):
+            for mesh_hasvcol in (True, False):
+                self.assert_same_geom_data(None, 0, mesh_hasnormals, mesh_hasvcol)
+
+    def test_geom_data_per_material(self):
+        b_mat = bpy.data.materials.new("TestGeomData")
+        try:
+            for material_index in range(2):
+                self.assert_same_geom_data(b_mat, material_index, True, True)
+        finally:
+            bpy.data.materials.remove(b_mat)
+
+    def test_flipped(self):
+        self.b_obj.scale.z = -3.0
+        self.assert_same_geom_data(None, 0, True, True)
@@ -0,0 +1,214 @@
+"""Tests for linking shapes which share their data to one mesh on import"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2019, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the NIF File Format Library and Tools
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import types
+
+import bpy
+import nose
+
+from pyffi.formats.nif import NifFormat
+
+from io_scene_niftools.modules.nif_export.block_registry import block_store
+from io_scene_niftools.modules.nif_export.geometry.mesh import Mesh
+from io_scene_niftools.modules.nif_import.object import Object
+from io_scene_niftools.utils.singleton import NifOp
+
+
+class TestInstanceKey:
+
+    def setup(self):
+        self.n_data = NifFormat.NiTriShapeData()
+        self.n_mat = NifFormat.NiMaterialProperty()
+
+    def n_create_shape(self):
+        n_geom = NifFormat.NiTriShape()
+        n_geom.data = self.n_data
+        n_geom.add_property(self.n_mat)
+        return n_geom
+
+    def test_same_properties(self):
+        nose.tools.assert_equal(Object.get_instance_key(self.n_create_shape()),
+                                Object.get_instance_key(self.n_create_shape()))
+
+    def test_different_properties(self):
+        n_geom = self.n_create_shape()
+        n_geom.add_property(NifFormat.NiAlphaProperty())
+        nose.tools.assert_not_equal(Object.get_instance_key(self.n_create_shape()), Object.get_instance_key(n_geom))
+
+    def test_skinned(self):
+        n_geom = self.n_create_shape()
+        n_geom.skin_instance = NifFormat.NiSkinInstance()
+        nose.tools.assert_is_none(Object.get_instance_key(n_geom))
+
+    def test_morphed(self):
+        n_geom = self.n_create_shape()
+        n_geom.add_controller(NifFormat.NiGeomMorpherController())
+        nose.tools.assert_is_none(Object.get_instance_key(n_geom))
+
+
+class TestImportInstancing:
+    """Shapes sharing their data are linked to one mesh, but still get the properties which change the object"""
+
+    def setup(self):
+        self.props = NifOp.props
+        NifOp.props = types.SimpleNamespace(use_custom_normals=False, animation=False)
+        self.object = Object()
+        self.n_data = NifFormat.NiTriShapeData()
+        self.n_data.num_vertices = 3
+        self.n_data.has_vertices = True
+        self.n_data.vertices.update_size()
+        self.n_data.vertices[1].x = 1.0
+        self.n_data.vertices[2].y = 1.0
+        self.n_data.set_triangles([(0, 1, 2)])
+        self.n_wire = NifFormat.NiWireframeProperty()
+        self.b_objs = []
+
+    def teardown(self):
+        b_meshes = {b_obj.data for b_obj in self.b_objs}
+        b_mats = {b_mat for b_mesh in b_meshes for b_mat in b_mesh.materials}
+        for b_obj in self.b_objs:
+            bpy.data.objects.remove(b_obj)
+        for b_mesh in b_meshes:
+            bpy.data.meshes.remove(b_mesh)
+        for b_mat in b_mats:
+            bpy.data.materials.remove(b_mat)
+        NifOp.props = self.props
+
+    def import_shape(self, name):
+        n_geom = NifFormat.NiTriShape()
+        n_geom.name = name
+        n_geom.data = self.n_data
+        n_geom.add_property(self.n_wire)
+        b_obj = self.object.import_geometry_object(None, n_geom)
+        self.b_objs.append(b_obj)
+        return b_obj
+
+    def test_object_properties(self):
+        b_objs = [self.import_shape(f"Instance{i}".encode()) for i in range(2)]
+        nose.tools.assert_is(b_objs[0].data, b_objs[1].data)
+        for b_obj in b_objs:
+            nose.tools.assert_equal([b_mod.type for b_mod in b_obj.modifiers], ['WIREFRAME'])
+
+
+class TestExportInstancing:
+    """Objects linking the same mesh share their trishape data on export"""
+
+    def setup(self):
+        self.props = NifOp.props
+        NifOp.props = types.SimpleNamespace(use_incremental_export=False, force_full_export=False, stripify=False,
+                                            stitch_strips=False, reference_vertex_split=False, epsilon=0.005,
+                                            animation='ALL_NIF')
+        self.game = bpy.context.scene.niftools_scene.game
+        bpy.context.scene.niftools_scene.game = 'OBLIVION'
+        block_store.block_to_obj = {}
+        self.b_mesh = bpy.data.meshes.new("Instanced")
+        self.b_mesh.from_pydata([(0, 0, 0), (1, 0, 0), (1, 1, 0), (0, 1, 0)], [], [(0, 1, 2, 3)])
+        self.b_mesh.uv_layers.new()
+        self.b_mat = bpy.data.materials.new("Instanced")
+        self.b_mesh.materials.append(self.b_mat)
+        self.b_objs = [self.b_create_object(f"Instance{i}") for i in range(2)]
+        self.n_parent = NifFormat.NiNode()
+        self.n_parent.name = b"Scene Root"
+        self.mesh = Mesh()
+        # material and texture export are not under test
+        self.mesh.object_property = types.SimpleNamespace(export_properties=lambda b_obj, b_mat, trishape: None)
+
+    def teardown(self):
+        for b_obj in bpy.data.objects:
+            if b_obj.name.startswith("Instance"):
+                bpy.data.objects.remove(b_obj)
+        bpy.data.meshes.remove(self.b_mesh)
+        bpy.data.materials.remove(self.b_mat)
+        block_store.block_to_obj = {}
+        bpy.context.scene.niftools_scene.game = self.game
+        NifOp.props = self.props
+
+    def b_create_object(self, name):
+        b_obj = bpy.data.objects.new(name, self.b_mesh)
+        bpy.context.scene.collection.objects.link(b_obj)
+        return b_obj
+
+    def get_instance_key(self, b_obj):
+        return Mesh.get_instance_key(b_obj, self.n_parent, self.b_mat, 0)
+
+    def test_same_mesh(self):
+        nose.tools.assert_is_not_none(self.get_instance_key(self.b_objs[0]))
+        nose.tools.assert_equal(self.get_instance_key(self.b_objs[0]), self.get_instance_key(self.b_objs[1]))
+
+    def test_single_user(self):
+        bpy.data.objects.remove(self.b_objs.pop())
+        nose.tools.assert_is_none(self.get_instance_key(self.b_objs[0]))
+
+    def test_negative_scale(self):
+        """Negative scales flip the triangle winding, so the data can not be shared with unflipped objects"""
+        self.b_objs[1].scale = (1.0, 1.0, -3.0)
+        nose.tools.assert_not_equal(self.get_instance_key(self.b_objs[0]), self.get_instance_key(self.b_objs[1]))
+        b_flipped = self.b_create_object("Instance2")
+        b_flipped.scale = (-1.0, 1.0, -1.0)
+        nose.tools.assert_equal(self.get_instance_key(self.b_objs[1]), self.get_instance_key(b_flipped))
+
+    def test_skinned(self):
+        b_armature_data = bpy.data.armatures.new("Armature")
+        b_armature = bpy.data.objects.new("Armature", b_armature_data)
+        try:
+            self.b_objs[0].parent = b_armature
+            nose.tools.assert_is_none(self.get_instance_key(self.b_objs[0]))
+        finally:
+            bpy.data.objects.remove(b_armature)
+            bpy.data.armatures.remove(b_armature_data)
+
+    def test_shape_keys(self):
+        self.b_objs[0].shape_key_add(name="Basis")
+        for b_obj in self.b_objs:
+            nose.tools.assert_is_none(self.get_instance_key(b_obj))
+
+    def test_export_shared_data(self):
+        """The shapes share their data, but each has its own Oblivion tangent space extra data"""
+        n_shapes = [self.mesh.export_tri_shapes(b_obj, self.n_parent) for b_obj in self.b_objs]
+        nose.tools.assert_is_not(n_shapes[0], n_shapes[1])
+        nose.tools.assert_is(n_shapes[0].data, n_shapes[1].data)
+        nose.tools.assert_equal(len(block_store.get_blocks_of_type(NifFormat.NiTriShapeData)), 1)
+        for n_shape in n_shapes:
+            nose.tools.assert_equal([n_extra.name for n_extra in n_shape.get_extra_datas()],
+                                    [b'Tangent space (binormal & tangent vectors)'])
+
+    def test_export_flipped(self):
+        self.b_objs[1].scale = (1.0, 1.0, -1.0)
+        n_shapes = [self.mesh.export_tri_shapes(b_obj, self.n_parent) for b_obj in self.b_objs]
+        nose.tools.assert_is_not(n_shapes[0].data, n_shapes[1].data)
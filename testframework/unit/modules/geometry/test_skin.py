@@ -0,0 +1,143 @@
+"""Unit testing that the skin deformation matches the pyffi reference"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2019, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the NIF File Format Library and Tools
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import nose
+import numpy as np
+
+from pyffi.formats.nif import NifFormat
+
+from io_scene_niftools.modules.nif_import.geometry.vertex.groups import VertexGroup
+
+
+def n_create_transform(rotation, translation):
+    """Create a pyffi transform from a rotation around the z axis and a translation"""
+    cos, sin = np.cos(rotation), np.sin(rotation)
+    n_transform = NifFormat.Matrix44()
+    n_transform.set_rows((cos, sin, 0.0, 0.0),
+                         (-sin, cos, 0.0, 0.0),
+                         (0.0, 0.0, 1.0, 0.0),
+                         (translation[0], translation[1], translation[2], 1.0))
+    return n_transform
+
+
+class TestSkinDeformation:
+    """Tests the vectorized linear blend skinning against pyffi's get_skin_deformation"""
+
+    def setup(self):
+        rng = np.random.default_rng(0)
+        self.n_root = NifFormat.NiNode()
+        self.n_geom = NifFormat.NiTriShape()
+        self.n_geom.data = NifFormat.NiTriShapeData()
+        self.n_geom.data.num_vertices = 12
+        self.n_geom.data.has_vertices = True
+        self.n_geom.data.vertices.update_size()
+        for n_vert, co in zip(self.n_geom.data.vertices, rng.normal(size=(12, 3))):
+            n_vert.x, n_vert.y, n_vert.z = co
+        self.n_geom.data.num_triangles = 4
+        self.n_geom.data.triangles.update_size()
+        for i, n_tri in enumerate(self.n_geom.data.triangles):
+            n_tri.v_1, n_tri.v_2, n_tri.v_3 = 3 * i, 3 * i + 1, 3 * i + 2
+        self.n_geom.skin_instance = NifFormat.NiSkinInstance()
+        self.n_geom.skin_instance.data = NifFormat.NiSkinData()
+        self.n_geom.skin_instance.data.has_vertex_weights = True
+        self.n_geom.skin_instance.skeleton_root = self.n_root
+        self.n_root.add_child(self.n_geom)
+
+        # three bones, the first two triangles are skinned to bones 0 and 1, the others to bones 1 and 2
+        weights = rng.uniform(0.1, 1.0, size=(12, 3))
+        weights[:6, 2] = 0.0
+        weights[6:, 0] = 0.0
+        weights /= weights.sum(axis=1, keepdims=True)
+        self.n_bones = []
+        for bone_index in range(3):
+            n_bone = NifFormat.NiNode()
+            n_bone.set_transform(n_create_transform(0.5 * bone_index, (bone_index, 0.0, 1.0)))
+            self.n_root.add_child(n_bone)
+            vert_weights = {i: float(w) for i, w in enumerate(weights[:, bone_index]) if w > 0}
+            self.n_geom.add_bone(n_bone, vert_weights)
+            self.n_bones.append(n_bone)
+        self.n_geom.update_bind_position()
+
+        # pose the bones away from the bind position
+        for bone_index, n_bone in enumerate(self.n_bones):
+            n_bone.set_transform(n_create_transform(-0.7 * bone_index, (0.5, -bone_index, 2.0)))
+
+    def get_reference(self):
+        return np.array([(v.x, v.y, v.z) for v in self.n_geom.get_skin_deformation()[0]])
+
+    def test_skin_vertices(self):
+        vertices = np.array([[1.0, 2.0, 3.0], [0.0, 0.0, 0.0]])
+        bone_transforms = np.array([np.eye(4), np.eye(4)])
+        bone_transforms[1, 3, :3] = (1.0, 1.0, 1.0)
+        skinned, sum_weights = VertexGroup.skin_vertices(vertices, [[0, 1], [1, 0]], [[0.5, 0.5], [1.0, 0.0]], bone_transforms)
+        nose.tools.assert_true(np.allclose(skinned, [[1.5, 2.5, 3.5], [1.0, 1.0, 1.0]]))
+        nose.tools.assert_true(np.allclose(sum_weights, [1.0, 1.0]))
+
+    def test_skin_deformation_from_data(self):
+        reference = self.get_reference()
+        vertices, sum_weights = VertexGroup.get_skin_deformation_from_data(self.n_geom)
+        nose.tools.assert_true(np.allclose(vertices, reference, atol=1e-5))
+        nose.tools.assert_true(np.allclose(sum_weights, 1.0, atol=1e-5))
+
+    def test_skin_deformation_from_partition(self):
+        reference = self.get_reference()
+        self.n_geom.update_skin_partition(maxbonesperpartition=2, maxbonespervertex=4, stripify=False)
+        vertices, sum_weights = VertexGroup.get_skin_deformation_from_partition(self.n_geom)
+        nose.tools.assert_true(np.allclose(vertices, reference, atol=1e-5))
+        nose.tools.assert_true(np.allclose(sum_weights, 1.0, atol=1e-5))
+
+    def test_skin_deformation_from_partition_without_bone_indices(self):
+        reference = self.get_reference()
+        self.n_geom.update_skin_partition(maxbonesperpartition=2, maxbonespervertex=2, stripify=False)
+        for block in self.n_geom.skin_instance.skin_partition.skin_partition_blocks:
+            # without bone indices, the weights of each vertex follow the order of the block's bones
+            block_weights = np.zeros((block.num_vertices, block.num_bones))
+            for i, (bone_indices, weights) in enumerate(zip(block.bone_indices, block.vertex_weights)):
+                for bone_index, weight in zip(bone_indices, weights):
+                    block_weights[i, bone_index] += weight
+            block.has_bone_indices = False
+            block.bone_indices.update_size()
+            block.num_weights_per_vertex = block.num_bones
+            block.vertex_weights.update_size()
+            for weights, new_weights in zip(block.vertex_weights, block_weights.tolist()):
+                for j, weight in enumerate(new_weights):
+                    weights[j] = weight
+        vertices, sum_weights = VertexGroup.get_skin_deformation_from_partition(self.n_geom)
+        nose.tools.assert_true(np.allclose(vertices, reference, atol=1e-5))
+        nose.tools.assert_true(np.allclose(sum_weights, 1.0, atol=1e-5))
@@ -0,0 +1,157 @@
+"""Tests for splicing cached trishapes into a new export"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2019, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the NIF File Format Library and Tools
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import types
+
+import nose
+
+from pyffi.formats.nif import NifFormat
+
+from io_scene_niftools.modules.nif_export.block_registry import block_store
+from io_scene_niftools.modules.nif_export.geometry.mesh.cache import TriShapeCache
+from io_scene_niftools.modules.nif_export.property.material import MaterialProp
+
+
+class TestTriShapeCache:
+    """Stores the trishape of a fake export and splices it into the next one"""
+
+    def setup(self):
+        TriShapeCache.clear()
+        self.b_obj = types.SimpleNamespace(name="Cube")
+
+    def teardown(self):
+        TriShapeCache.clear()
+        block_store.block_to_obj = {}
+
+    @staticmethod
+    def n_export_nodes():
+        """Start a new export with a root node, a bone and a material shared with another object"""
+        block_store.block_to_obj = {}
+        n_root = block_store.create_block("NiNode")
+        n_root.name = b"Scene Root"
+        n_bone = block_store.create_block("NiNode")
+        n_bone.name = b"Bip01"
+        n_root.add_child(n_bone)
+        n_mat = NifFormat.NiMaterialProperty()
+        n_mat.glossiness = 5
+        return n_root, n_bone, block_store.intern_block(n_mat)
+
+    @staticmethod
+    def n_export_trishape(n_root, n_bone):
+        n_geom = block_store.create_block("NiTriShape")
+        n_geom.name = b"Tri Cube"
+        n_geom.data = block_store.create_block("NiTriShapeData")
+        n_geom.data.num_vertices = 3
+        n_geom.data.has_vertices = True
+        n_geom.data.vertices.update_size()
+        n_geom.data.vertices[1].x = 2.5
+        n_geom.data.set_triangles([(0, 1, 2)])
+        n_mat = NifFormat.NiMaterialProperty()
+        n_mat.glossiness = 5
+        n_geom.add_property(block_store.intern_block(n_mat))
+        n_skin = block_store.create_block("NiSkinInstance")
+        n_skin.skeleton_root = n_root
+        n_skin.num_bones = 1
+        n_skin.bones.update_size()
+        n_skin.bones[0] = n_bone
+        n_geom.skin_instance = n_skin
+        n_root.add_child(n_geom)
+        return n_geom
+
+    def store(self):
+        n_root, n_bone, _ = self.n_export_nodes()
+        block_count = block_store.get_block_count()
+        n_geom = self.n_export_trishape(n_root, n_bone)
+        TriShapeCache.store(self.b_obj, "key", n_root, block_store.get_blocks_from(block_count))
+        return n_geom
+
+    def test_splice(self):
+        n_geom = self.store()
+        n_root, n_bone, n_mat = self.n_export_nodes()
+        n_copy = TriShapeCache.splice(self.b_obj, "key", n_root)
+        nose.tools.assert_is_not(n_copy, n_geom)
+        nose.tools.assert_equal(n_copy.get_hash(), n_geom.get_hash())
+        nose.tools.assert_is(n_root.children[-1], n_copy)
+        # links out of the subtree point to the nodes of the new export
+        nose.tools.assert_is(n_copy.skin_instance.skeleton_root, n_root)
+        nose.tools.assert_is(n_copy.skin_instance.bones[0], n_bone)
+        # shared blocks are shared again
+        nose.tools.assert_is(n_copy.properties[0], n_mat)
+        nose.tools.assert_equal(block_store.get_blocks_of_type(NifFormat.NiTriShape), [n_copy])
+
+    def test_snapshot_is_private(self):
+        n_geom = self.store()
+        n_geom.data.vertices[1].x = 100.0
+        n_root, _, _ = self.n_export_nodes()
+        nose.tools.assert_equal(TriShapeCache.splice(self.b_obj, "key", n_root).data.vertices[1].x, 2.5)
+
+    def test_changed_key(self):
+        self.store()
+        n_root, _, _ = self.n_export_nodes()
+        nose.tools.assert_is_none(TriShapeCache.splice(self.b_obj, "changed", n_root))
+
+    def test_missing_bone(self):
+        self.store()
+        n_root, n_bone, _ = self.n_export_nodes()
+        n_bone.name = b"Bip02"
+        nose.tools.assert_is_none(TriShapeCache.splice(self.b_obj, "key", n_root))
+
+    def test_merged_material(self):
+        """A material property merged into the one of an earlier object is shared again when spliced"""
+        n_root, n_bone, _ = self.n_export_nodes()
+        n_mat = NifFormat.NiMaterialProperty()
+        n_mat.name = b"Earlier"
+        n_mat.glossiness = 7
+        n_mat = block_store.intern_block(n_mat, get_key=MaterialProp.get_merge_key)
+        block_count = block_store.get_block_count()
+        n_geom = self.n_export_trishape(n_root, n_bone)
+        n_merged = NifFormat.NiMaterialProperty()
+        n_merged.name = b"Later"
+        n_merged.glossiness = 7
+        n_geom.properties[0] = block_store.intern_block(n_merged, get_key=MaterialProp.get_merge_key)
+        nose.tools.assert_is(n_geom.properties[0], n_mat)
+        TriShapeCache.store(self.b_obj, "key", n_root, block_store.get_blocks_from(block_count))
+
+        n_root, n_bone, _ = self.n_export_nodes()
+        n_mat = NifFormat.NiMaterialProperty()
+        n_mat.name = b"Other"
+        n_mat.glossiness = 7
+        n_mat = block_store.intern_block(n_mat, get_key=MaterialProp.get_merge_key)
+        n_copy = TriShapeCache.splice(self.b_obj, "key", n_root)
+        nose.tools.assert_is(n_copy.properties[0], n_mat)
@@ -0,0 +1,90 @@
+"""Unit testing that the disk cache stores values and evicts the least recently used ones"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2019, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the NIF File Format Library and Tools
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import os
+import shutil
+import tempfile
+
+import nose
+
+from io_scene_niftools.utils.cache import DiskCache
+
+
+class TestDiskCache:
+
+    def setup(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = DiskCache(self.directory, max_size=1024)
+
+    def teardown(self):
+        shutil.rmtree(self.directory)
+
+    def age(self, key, seconds):
+        path = self.cache.get_path(key)
+        mtime = os.path.getmtime(path) - seconds
+        os.utime(path, (mtime, mtime))
+
+    def test_hash_key(self):
+        nose.tools.assert_equals(DiskCache.hash_key(b"ab", b"c"), DiskCache.hash_key(b"ab", b"c"))
+        nose.tools.assert_not_equal(DiskCache.hash_key(b"ab", b"c"), DiskCache.hash_key(b"a", b"bc"))
+
+    def test_get_put(self):
+        nose.tools.assert_is_none(self.cache.get("key"))
+        self.cache.put("key", {"mopp": [1, 2, 3]})
+        nose.tools.assert_equals(self.cache.get("key"), {"mopp": [1, 2, 3]})
+
+    def test_evict_least_recently_used(self):
+        value = list(range(100))
+        self.cache.put("old", value)
+        self.age("old", 20)
+        self.cache.put("used", value)
+        self.age("used", 10)
+        # a hit makes "used" the most recent entry
+        self.cache.get("used")
+        self.cache.max_size = self.cache.get_size()
+        self.cache.put("new", value)
+        nose.tools.assert_is_none(self.cache.get("old"))
+        nose.tools.assert_is_not_none(self.cache.get("used"))
+        nose.tools.assert_is_not_none(self.cache.get("new"))
+
+    def test_clear(self):
+        self.cache.put("a", 1)
+        self.cache.put("b", 2)
+        nose.tools.assert_equals(self.cache.clear(), 2)
+        nose.tools.assert_equals(self.cache.get_size(), 0)
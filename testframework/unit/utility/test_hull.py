@@ -0,0 +1,77 @@
+"""Unit testing that the convex hull matches pyffi's quickhull"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2019, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the NIF File Format Library and Tools
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import nose
+import numpy as np
+
+from pyffi.utils.quickhull import qhull3d
+
+from io_scene_niftools.utils.hull import ConvexHull, quickhull
+
+
+class TestConvexHull:
+
+    def setup(self):
+        rng = np.random.default_rng(0)
+        self.vertices = rng.normal(size=(100, 3))
+        ConvexHull.clear()
+
+    def test_same_extreme_vertices(self):
+        verts, triangles = quickhull(self.vertices)
+        n_verts, n_triangles = qhull3d([tuple(v) for v in self.vertices.tolist()])
+        nose.tools.assert_equals(sorted(verts), sorted(n_verts))
+        nose.tools.assert_equals(len(triangles), len(n_triangles))
+
+    def test_outward_triangles(self):
+        verts, triangles = quickhull(self.vertices)
+        verts = np.array(verts)
+        for a, b, c in triangles:
+            normal = np.cross(verts[b] - verts[a], verts[c] - verts[a])
+            nose.tools.assert_true(np.all((self.vertices - verts[a]) @ normal <= 1e-6))
+
+    def test_degenerate(self):
+        nose.tools.assert_equals(quickhull([(0, 0, 0), (1, 0, 0), (2, 0, 0)]), ([(0.0, 0.0, 0.0), (2.0, 0.0, 0.0)], []))
+        verts, triangles = quickhull([(0, 0, 0), (1, 0, 0), (1, 1, 0), (0, 1, 0), (0.5, 0.5, 0)])
+        nose.tools.assert_equals(len(verts), 4)
+        nose.tools.assert_equals(len(triangles), 2)
+
+    def test_memoized(self):
+        hull = ConvexHull.get_hull(self.vertices)
+        nose.tools.assert_equals(ConvexHull.get_hull(self.vertices.copy()), hull)
+        nose.tools.assert_equals(len(ConvexHull._hulls), 1)
@@ -0,0 +1,145 @@
+"""Tests for the batched animation key conversions"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2019, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the NIF File Format Library and Tools
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import nose
+
+import numpy as np
+
+from io_scene_niftools.utils import keymat
+
+
+def rotation_x(angle):
+    c, s = np.cos(angle), np.sin(angle)
+    return np.array(((1, 0, 0), (0, c, -s), (0, s, c)))
+
+
+def rotation_y(angle):
+    c, s = np.cos(angle), np.sin(angle)
+    return np.array(((c, 0, s), (0, 1, 0), (-s, 0, c)))
+
+
+def rotation_z(angle):
+    c, s = np.cos(angle), np.sin(angle)
+    return np.array(((c, -s, 0), (s, c, 0), (0, 0, 1)))
+
+
+def euler_to_matrix(euler):
+    return rotation_z(euler[2]) @ rotation_y(euler[1]) @ rotation_x(euler[0])
+
+
+def quaternion_to_matrix(quat):
+    w, x, y, z = quat / np.linalg.norm(quat)
+    return np.array(((1 - 2 * (y * y + z * z), 2 * (x * y - w * z), 2 * (x * z + w * y)),
+                     (2 * (x * y + w * z), 1 - 2 * (x * x + z * z), 2 * (y * z - w * x)),
+                     (2 * (x * z - w * y), 2 * (y * z + w * x), 1 - 2 * (x * x + y * y))))
+
+
+def to_4x4(matrix):
+    result = np.identity(4)
+    result[:3, :3] = matrix
+    return result
+
+
+def translation(vector):
+    result = np.identity(4)
+    result[:3, 3] = vector
+    return result
+
+
+class TestBatchedKeymat:
+    """Tests the batched key conversions against the per key matrix products of import_keymat and export_keymat"""
+
+    @classmethod
+    def setup_class(cls):
+        # a bone correction, a quarter turn about the z axis
+        cls.correction = to_4x4(((0, 1, 0), (-1, 0, 0), (0, 0, 1)))
+        cls.rest_rot = to_4x4(euler_to_matrix((0.3, -1.2, 2.5)))
+        cls.rest_rot_inv = np.linalg.inv(cls.rest_rot)
+        rng = np.random.default_rng(0)
+        cls.quats = rng.normal(size=(16, 4))
+        cls.quats /= np.linalg.norm(cls.quats, axis=1, keepdims=True)
+        cls.eulers = rng.uniform(-3.0, 3.0, size=(16, 3))
+        cls.translations = rng.normal(size=(16, 3))
+
+    def import_keymat(self, key_matrix):
+        return self.correction @ self.rest_rot_inv @ key_matrix @ self.correction.T
+
+    def export_keymat(self, key_matrix, bone):
+        if bone:
+            return self.rest_rot @ self.correction.T @ key_matrix @ self.correction
+        return self.rest_rot @ key_matrix
+
+    @staticmethod
+    def assert_close(a, b):
+        nose.tools.assert_true(np.allclose(a, b, atol=1e-5), f"{a} != {b}")
+
+    def test_import_quaternions(self):
+        batched = keymat.import_keymat_quaternions(self.correction, self.rest_rot_inv, self.quats)
+        for quat, result in zip(self.quats, batched):
+            self.assert_close(quaternion_to_matrix(result), self.import_keymat(to_4x4(quaternion_to_matrix(quat)))[:3, :3])
+
+    def test_import_eulers(self):
+        batched = keymat.import_keymat_eulers(self.correction, self.rest_rot_inv, self.eulers)
+        for euler, result in zip(self.eulers, batched):
+            self.assert_close(euler_to_matrix(result), self.import_keymat(to_4x4(euler_to_matrix(euler)))[:3, :3])
+
+    def test_import_translations(self):
+        batched = keymat.import_keymat_translations(self.correction, self.rest_rot_inv, self.translations)
+        for trans, result in zip(self.translations, batched):
+            self.assert_close(result, self.import_keymat(translation(trans))[:3, 3])
+
+    def test_export_quaternions(self):
+        for bone in (None, True):
+            batched = keymat.export_keymat_quaternions(self.correction, self.rest_rot, self.quats, bone)
+            for quat, result in zip(self.quats, batched):
+                self.assert_close(quaternion_to_matrix(result), self.export_keymat(to_4x4(quaternion_to_matrix(quat)), bone)[:3, :3])
+
+    def test_export_eulers(self):
+        for bone in (None, True):
+            batched = keymat.export_keymat_eulers(self.correction, self.rest_rot, self.eulers, bone)
+            for euler, result in zip(self.eulers, batched):
+                self.assert_close(euler_to_matrix(result), self.export_keymat(to_4x4(euler_to_matrix(euler)), bone)[:3, :3])
+                # compatible with the input key, so no axis jumps by a full turn or more
+                nose.tools.assert_true(np.all(np.abs(result - euler) < 2 * np.pi))
+
+    def test_export_translations(self):
+        for bone in (None, True):
+            batched = keymat.export_keymat_translations(self.correction, self.rest_rot, self.translations, bone)
+            for trans, result in zip(self.translations, batched):
+                self.assert_close(result, self.export_keymat(translation(trans), bone)[:3, 3])
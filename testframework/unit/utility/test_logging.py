@@ -0,0 +1,98 @@
+"""Tests for the buffered nif logging"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2019, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the NIF File Format Library and Tools
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import logging
+
+import nose
+
+from io_scene_niftools.utils.logging import NifLog, NifError
+
+
+class ReportCollector:
+
+    def __init__(self):
+        self.reports = []
+
+    def report(self, level, message):
+        self.reports.append((level, message))
+
+
+class TestNifLog:
+
+    def setup(self):
+        self.op, self.level = NifLog.op, NifLog.level
+        NifLog.op = ReportCollector()
+        NifLog.level = logging.INFO
+        NifLog.clear()
+
+    def teardown(self):
+        NifLog.op, NifLog.level = self.op, self.level
+        NifLog.clear()
+
+    def test_level_gating(self):
+        NifLog.debug("hidden %s", "debug")
+        NifLog.info("shown %s", "info")
+        nose.tools.assert_equals(NifLog.get_messages(), ["shown info"])
+        nose.tools.assert_false(NifLog.is_enabled(logging.DEBUG))
+
+    def test_flush(self):
+        NifLog.info("first")
+        NifLog.info("second")
+        NifLog.warn("third")
+        nose.tools.assert_equals(NifLog.op.reports, [])
+        NifLog.flush()
+        nose.tools.assert_equals(NifLog.op.reports, [({'INFO'}, "first\nsecond"), ({'WARNING'}, "third")])
+        # reported messages stay in the buffer but are not reported again
+        NifLog.flush()
+        nose.tools.assert_equals(len(NifLog.op.reports), 2)
+        nose.tools.assert_equals(NifLog.get_messages(logging.WARNING), ["third"])
+
+    def test_ring_buffer(self):
+        for i in range(NifLog.BUFFER_SIZE + 10):
+            NifLog.info("message %d", i)
+        nose.tools.assert_equals(len(NifLog.buffer), NifLog.BUFFER_SIZE)
+        nose.tools.assert_equals(NifLog.buffer[0], ('INFO', "message 10"))
+
+    def test_error(self):
+        nose.tools.assert_equals(NifLog.error("failed"), {'FINISHED'})
+        nose.tools.assert_equals(NifLog.op.reports, [({'ERROR'}, "failed")])
+
+    def test_nif_error_caller(self):
+        NifError("failed")
+        nose.tools.assert_in("test_logging.py:", NifLog.get_messages(logging.ERROR)[-1])
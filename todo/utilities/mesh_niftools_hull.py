@@ -48,7 +48,7 @@ Tooltip: 'Hull Selected Objects'
 # -------------------------------------------------------------------------- 
 
 import bpy
-import pyffi.utils.quickhull
+from io_scene_niftools.utils.hull import ConvexHull
 
 def hull_box(ob, me, selected_only):
     """Hull mesh in a box."""
@@ -130,7 +130,7 @@ def hull_convex(ob, me, selected_only, precision = 0.1):
     """Hull mesh in a convex shape."""
 
     # find convex hull
-    vertices, triangles = pyffi.utils.quickhull.qhull3d(
+    vertices, triangles = ConvexHull.get_hull(
         [tuple(v.co) for v in me.vertices if v.sel or not selected_only],
         precision = precision)
 